@@ -0,0 +1,172 @@
+"""Admission control for LLM generations.
+
+Caps concurrent Ollama generations and queues the rest fairly: waiting
+requests are served round-robin across users, so one analyst firing many
+requests cannot starve the others. Waiters that exceed the queue budget
+are shed and the caller falls back to the template answer.
+
+Everything here runs on the event loop thread, so no locking is needed.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Callable
+from typing import Any
+
+from .config import settings
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+class Ticket:
+    """One request's place in the queue; ``release()`` is idempotent."""
+
+    def __init__(self, controller: "AdmissionController", user_id: str) -> None:
+        self._controller = controller
+        self.user_id = user_id
+        self.enqueued_at = controller.clock()
+        self.granted_at: float | None = None
+        self.released = False
+        self._granted = asyncio.get_running_loop().create_future()
+
+    @property
+    def granted(self) -> bool:
+        return self._granted.done()
+
+    def _grant(self) -> None:
+        self.granted_at = self._controller.clock()
+        self._granted.set_result(None)
+
+    async def wait(self) -> AsyncIterator[int]:
+        """Yield the 1-based queue position periodically until admitted.
+
+        Raises ``AdmissionRejected`` once the wait exceeds the queue budget.
+        """
+        controller = self._controller
+        deadline = self.enqueued_at + controller.queue_budget_ms / 1000
+        while not self.granted:
+            remaining = deadline - controller.clock()
+            if remaining <= 0:
+                self.release()
+                controller.shed_timeout += 1
+                raise AdmissionRejected("queue_timeout")
+            yield controller.position(self)
+            try:
+                await asyncio.wait_for(
+                    asyncio.shield(self._granted),
+                    timeout=min(controller.update_ms / 1000, remaining),
+                )
+            except TimeoutError:
+                pass
+        controller._record_wait(self)
+
+    def release(self) -> None:
+        if not self.released:
+            self.released = True
+            self._controller._release(self)
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        *,
+        max_concurrent: int,
+        max_queue: int,
+        queue_budget_ms: int,
+        update_ms: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max_queue
+        self.queue_budget_ms = queue_budget_ms
+        self.update_ms = update_ms
+        self.clock = clock
+        self._active = 0
+        self._queues: OrderedDict[str, deque[Ticket]] = OrderedDict()
+        self.admitted = 0
+        self.shed_timeout = 0
+        self.shed_queue_full = 0
+        self.max_wait_ms = 0.0
+
+    @property
+    def queued(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def enqueue(self, user_id: str) -> Ticket:
+        ticket = Ticket(self, user_id)
+        if self._active < self.max_concurrent and not self._queues:
+            self._active += 1
+            self.admitted += 1
+            ticket._grant()
+            return ticket
+        if self.queued >= self.max_queue:
+            self.shed_queue_full += 1
+            raise AdmissionRejected("queue_full")
+        self._queues.setdefault(user_id, deque()).append(ticket)
+        return ticket
+
+    def position(self, ticket: Ticket) -> int:
+        """Position in round-robin service order (users in rotation order)."""
+        position = 0
+        depth = 0
+        while True:
+            advanced = False
+            for queue in self._queues.values():
+                if len(queue) > depth:
+                    advanced = True
+                    position += 1
+                    if queue[depth] is ticket:
+                        return position
+            if not advanced:
+                return position + 1
+            depth += 1
+
+    def _grant_next(self) -> None:
+        while self._active < self.max_concurrent and self._queues:
+            user_id, queue = self._queues.popitem(last=False)
+            ticket = queue.popleft()
+            if queue:
+                # Back of the rotation: other users go before this user's next request.
+                self._queues[user_id] = queue
+            self._active += 1
+            self.admitted += 1
+            ticket._grant()
+
+    def _release(self, ticket: Ticket) -> None:
+        if ticket.granted:
+            self._active -= 1
+            self._grant_next()
+            return
+        queue = self._queues.get(ticket.user_id)
+        if queue is not None and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del self._queues[ticket.user_id]
+
+    def _record_wait(self, ticket: Ticket) -> None:
+        if ticket.granted_at is not None:
+            self.max_wait_ms = max(self.max_wait_ms, (ticket.granted_at - ticket.enqueued_at) * 1000)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "active": self._active,
+            "queued": self.queued,
+            "max_concurrent": self.max_concurrent,
+            "admitted": self.admitted,
+            "shed_timeout": self.shed_timeout,
+            "shed_queue_full": self.shed_queue_full,
+            "max_wait_ms": round(self.max_wait_ms, 2),
+        }
+
+
+llm_admission = AdmissionController(
+    max_concurrent=settings.llm_max_concurrency,
+    max_queue=settings.llm_max_queue,
+    queue_budget_ms=settings.llm_queue_budget_ms,
+    update_ms=settings.llm_queue_update_ms,
+)
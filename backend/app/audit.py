@@ -1,53 +1,222 @@
-from psycopg import Connection
-
-
-def set_client_scope(conn: Connection, client_id: str) -> None:
-    with conn.cursor() as cur:
-        cur.execute("SELECT set_config('app.current_client', %s, true)", (client_id,))
-
-
-def log_api_event(
-    conn: Connection,
-    *,
-    client_id: str,
-    user_id: str,
-    endpoint: str,
-    query_text: str,
-    result_count: int,
-    evidence_found: bool,
-    top_score: float | None,
-    status_code: int,
-    response_time_ms: int,
-    error_message: str | None = None,
-) -> None:
-    set_client_scope(conn, client_id)
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            INSERT INTO audit_logs (
-                client_id,
-                user_id,
-                endpoint,
-                query_text,
-                result_count,
-                evidence_found,
-                top_score,
-                status_code,
-                response_time_ms,
-                error_message
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """,
-            (
-                client_id,
-                user_id,
-                endpoint,
-                query_text,
-                result_count,
-                evidence_found,
-                top_score,
-                status_code,
-                response_time_ms,
-                error_message,
-            ),
-        )
+import logging
+import queue
+import threading
+import time
+from dataclasses import astuple, dataclass, field
+from datetime import UTC, datetime
+from itertools import groupby
+from typing import Any
+
+from .config import settings
+from .db import get_app_conn
+
+logger = logging.getLogger(__name__)
+
+# One statement per client scope.
+# COPY is not allowed on tables with row-level security, so rows are sent
+# as parallel arrays and unnested server-side.
+INSERT_AUDIT_BATCH = """
+INSERT INTO audit_logs (
+    client_id,
+    user_id,
+    endpoint,
+    query_text,
+    result_count,
+    evidence_found,
+    top_score,
+    status_code,
+    response_time_ms,
+    error_message,
+    created_at
+)
+SELECT * FROM unnest(
+    %s::varchar[],
+    %s::varchar[],
+    %s::varchar[],
+    %s::text[],
+    %s::int[],
+    %s::boolean[],
+    %s::real[],
+    %s::int[],
+    %s::int[],
+    %s::text[],
+    %s::timestamptz[]
+)
+"""
+
+
+@dataclass
+class AuditEvent:
+    client_id: str
+    user_id: str
+    endpoint: str
+    query_text: str
+    result_count: int
+    evidence_found: bool
+    top_score: float | None
+    status_code: int
+    response_time_ms: int
+    error_message: str | None = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+
+
+_STOP = object()
+
+
+class AuditWriter:
+    """Background thread that writes audit events in batches.
+
+    Requests only enqueue. The writer flushes when ``batch_size`` events are
+    pending or ``flush_interval_ms`` has passed since the first one, whichever
+    comes first. A full queue blocks ``submit`` for at most
+    ``enqueue_timeout_ms`` (backpressure) and then drops the event;
+    ``submit_nowait``, for the event loop, drops it at once.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_queue: int,
+        batch_size: int,
+        flush_interval_ms: int,
+        enqueue_timeout_ms: int,
+        late_threshold_ms: int,
+    ) -> None:
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval_ms / 1000
+        self.enqueue_timeout = enqueue_timeout_ms / 1000
+        self.late_threshold = late_threshold_ms / 1000
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.late = 0
+        self.batches = 0
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush everything still queued, then stop the thread."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning("Audit writer did not drain within %ss; %s events pending", timeout, self._queue.qsize())
+        self._thread = None
+
+    def _enqueue(self, kwargs: dict[str, Any], timeout: float | None) -> bool:
+        event = (time.monotonic(), AuditEvent(**kwargs))
+        try:
+            if timeout is None:
+                self._queue.put_nowait(event)
+            else:
+                self._queue.put(event, timeout=timeout)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            logger.warning("Audit queue full; dropped event for %s", kwargs.get("endpoint"))
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def submit(self, **kwargs: Any) -> bool:
+        return self._enqueue(kwargs, self.enqueue_timeout)
+
+    def submit_nowait(self, **kwargs: Any) -> bool:
+        """Like ``submit`` but drops at once on a full queue; never blocks, so async handlers call it directly."""
+        return self._enqueue(kwargs, None)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._drain()
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            stopping = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+            if stopping:
+                self._drain()
+                return
+
+    def _drain(self) -> None:
+        batch: list = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                continue
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        if batch:
+            self._flush(batch)
+
+    def _flush(self, batch: list[tuple[float, AuditEvent]]) -> None:
+        events = sorted((event for _, event in batch), key=lambda e: e.client_id)
+        try:
+            with get_app_conn() as conn:
+                with conn.cursor() as cur:
+                    for client_id, group in groupby(events, key=lambda e: e.client_id):
+                        columns = list(zip(*(astuple(e) for e in group), strict=True))
+                        cur.execute("SELECT set_config('app.current_client', %s, true)", (client_id,))
+                        cur.execute(INSERT_AUDIT_BATCH, [list(c) for c in columns])
+                conn.commit()
+        except Exception:
+            logger.exception("Audit flush failed; %s events lost", len(batch))
+            with self._lock:
+                self.failed += len(batch)
+            return
+
+        now = time.monotonic()
+        late = sum(1 for queued_at, _ in batch if now - queued_at > self.late_threshold)
+        with self._lock:
+            self.written += len(batch)
+            self.late += late
+            self.batches += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "max_queue": self._queue.maxsize,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "late": self.late,
+        }
+
+
+audit_writer = AuditWriter(
+    max_queue=settings.audit_queue_size,
+    batch_size=settings.audit_batch_size,
+    flush_interval_ms=settings.audit_flush_interval_ms,
+    enqueue_timeout_ms=settings.audit_enqueue_timeout_ms,
+    late_threshold_ms=settings.audit_late_threshold_ms,
+)
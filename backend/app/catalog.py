@@ -0,0 +1,191 @@
+"""In-memory term / attribute / value catalog behind ``/api/catalog``.
+
+Facet counts are maintained by ingestion in ``term_facets`` (see
+009_term_facets.sql). The API loads the whole table once, reloads it when
+the change feed reports re-ingested clusters, and answers catalog requests
+from memory. Merged views for a set of clients are built once per load.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import UTC, datetime
+from typing import Any
+
+from psycopg.rows import dict_row
+
+from .config import settings
+from .db import get_app_conn_async
+from .retrieval import aset_client_scopes
+
+logger = logging.getLogger(__name__)
+
+SELECT_FACETS = """
+SELECT client_id, term_lc, attribute_lc, value, term, attribute, cluster_count
+FROM term_facets
+WHERE cluster_count > 0
+"""
+
+
+def _sorted_nodes(nodes: dict[str, dict]) -> list[dict]:
+    return sorted(nodes.values(), key=lambda node: (-node["clusters"], node["key"]))
+
+
+def _add_count(node: dict, client_id: str, count: int) -> None:
+    node["clusters"] += count
+    node["by_client"][client_id] = node["by_client"].get(client_id, 0) + count
+
+
+class FacetCatalog:
+    def __init__(self) -> None:
+        self._rows: list[dict] = []
+        self._views: dict[tuple[str, ...], list[dict]] = {}
+        self._task: asyncio.Task | None = None
+        self._stale = False
+        self.loaded_at: datetime | None = None
+        self.load_ms: float | None = None
+        self.refreshes = 0
+        self.errors = 0
+
+    async def refresh(self) -> None:
+        started = time.perf_counter()
+        async with get_app_conn_async() as conn:
+            await aset_client_scopes(conn, settings.allowed_client_list)
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await cur.execute(SELECT_FACETS)
+                rows = await cur.fetchall()
+            await conn.commit()
+        # Swap in one step; requests never see a half-built catalog.
+        self._rows, self._views = rows, {}
+        self.loaded_at = datetime.now(UTC)
+        self.load_ms = round((time.perf_counter() - started) * 1000, 2)
+        self.refreshes += 1
+
+    async def _refresh_while_stale(self) -> None:
+        while self._stale:
+            self._stale = False
+            try:
+                await self.refresh()
+            except Exception:
+                self.errors += 1
+                logger.exception("Catalog refresh failed")
+
+    def invalidate(self, changed: list[dict]) -> None:
+        """Change-feed subscriber: reload in the background, coalescing bursts."""
+        self._stale = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_while_stale(), name="catalog-refresh")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _build_view(self, client_ids: tuple[str, ...]) -> list[dict]:
+        allowed = set(client_ids)
+        terms: dict[str, dict] = {}
+        for row in self._rows:
+            client_id = row["client_id"]
+            if client_id not in allowed:
+                continue
+            term = terms.setdefault(
+                row["term_lc"],
+                {
+                    "term": row["term"] or row["term_lc"],
+                    "key": row["term_lc"],
+                    "clusters": 0,
+                    "by_client": {},
+                    "attributes": {},
+                    "values": {},
+                },
+            )
+            count = row["cluster_count"]
+            if row["attribute_lc"] is None:
+                _add_count(term, client_id, count)
+                continue
+            if row["attribute_lc"] == "":
+                # The term holds a value directly rather than attributes.
+                values = term["values"]
+            else:
+                attribute = term["attributes"].setdefault(
+                    row["attribute_lc"],
+                    {
+                        "attribute": row["attribute"] or row["attribute_lc"],
+                        "key": row["attribute_lc"],
+                        "clusters": 0,
+                        "by_client": {},
+                        "values": {},
+                    },
+                )
+                _add_count(attribute, client_id, count)
+                values = attribute["values"]
+            value = values.setdefault(
+                row["value"], {"value": row["value"], "key": row["value"], "clusters": 0, "by_client": {}}
+            )
+            _add_count(value, client_id, count)
+
+        view = _sorted_nodes(terms)
+        for term in view:
+            term["values"] = _sorted_nodes(term["values"])
+            term["attributes"] = _sorted_nodes(term["attributes"])
+            for attribute in term["attributes"]:
+                attribute["values"] = _sorted_nodes(attribute["values"])
+        return view
+
+    def view(self, client_ids: list[str]) -> list[dict]:
+        key = tuple(sorted(client_ids))
+        view = self._views.get(key)
+        if view is None:
+            view = self._views[key] = self._build_view(key)
+        return view
+
+    def query(
+        self,
+        client_ids: list[str],
+        *,
+        q: str | None = None,
+        term: str | None = None,
+        include_values: bool = True,
+        limit: int = 50,
+    ) -> list[dict]:
+        """Terms visible to ``client_ids``, most common first.
+
+        ``term`` selects one term by key (case-insensitive). ``q`` keeps
+        terms whose name contains it, or just the attributes that do.
+        """
+        needle = q.lower() if q else None
+        term_key = term.lower() if term else None
+        matched: list[dict] = []
+        for node in self.view(client_ids):
+            if term_key is not None and node["key"] != term_key:
+                continue
+            attributes = node["attributes"]
+            if needle is not None and needle not in node["key"]:
+                attributes = [a for a in attributes if needle in a["key"]]
+                if not attributes:
+                    continue
+            if not include_values:
+                attributes = [{k: v for k, v in a.items() if k != "values"} for a in attributes]
+            matched.append(
+                {**node, "attributes": attributes, "values": node["values"] if include_values else []}
+            )
+            if len(matched) >= limit:
+                break
+        return matched
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "facets": len(self._rows),
+            "views": len(self._views),
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "load_ms": self.load_ms,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+        }
+
+
+catalog = FacetCatalog()
@@ -0,0 +1,211 @@
+"""Polls ``clusters.ingested_at`` so in-process caches notice re-ingested rows.
+
+Ingestion runs in a separate process, so the API learns about changes by
+polling a watermark rather than by being told. Subscribers receive changed
+``{"id", "client_id", "ingested_at"}`` rows a page at a time.
+"""
+
+import asyncio
+import logging
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+
+from psycopg.rows import dict_row
+
+from .config import settings
+from .db import get_app_conn_async
+
+logger = logging.getLogger(__name__)
+
+# One page of clusters after the (ingested_at, id) cursor, up to ``until``.
+SELECT_PAGE = """
+SELECT id::text AS id, client_id, ingested_at
+FROM clusters
+WHERE (ingested_at, id) > (%(after_at)s, %(after_id)s::uuid) AND ingested_at <= %(until)s
+ORDER BY clusters.ingested_at, clusters.id
+LIMIT %(limit)s
+"""
+
+# Rows per ingested_at in the overlap window: one row per ingest transaction, not per cluster.
+SELECT_BUCKETS = """
+SELECT ingested_at, count(*) AS cluster_count
+FROM clusters
+WHERE ingested_at > %(since)s AND ingested_at <= %(until)s
+GROUP BY ingested_at
+"""
+
+# The newest cluster and the bucket counts behind it, from one snapshot.
+SELECT_START = """
+WITH latest AS (
+    SELECT ingested_at, id FROM clusters ORDER BY ingested_at DESC, id DESC LIMIT 1
+)
+SELECT c.ingested_at, count(*) AS cluster_count, latest.id::text AS last_id
+FROM latest
+JOIN clusters AS c ON c.ingested_at > latest.ingested_at - %(overlap)s AND c.ingested_at <= latest.ingested_at
+GROUP BY c.ingested_at, latest.id
+ORDER BY c.ingested_at
+"""
+
+_START_OF_TIME = datetime.min.replace(tzinfo=UTC)
+_END_OF_TIME = datetime.max.replace(tzinfo=UTC)
+_NIL_ID = "00000000-0000-0000-0000-000000000000"
+
+
+class ClusterChangeFeed:
+    """Keyset poller over ``(ingested_at, id)`` with a re-scan overlap.
+
+    Each poll pages forward from the last cluster it read, so a poll costs
+    the new rows, not the window. ``ingested_at`` is the ingest
+    transaction's start time, so a long transaction can commit rows behind
+    the cursor. The poll counts rows per ``ingested_at`` over the
+    ``overlap_seconds`` behind it and re-reads only the timestamps whose
+    count grew: the rows of a transaction share one timestamp and become
+    visible together.
+    """
+
+    def __init__(self, interval_seconds: float, overlap_seconds: float, page_size: int = 5000) -> None:
+        self.interval_seconds = interval_seconds
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self.page_size = page_size
+        self.watermark: datetime | None = None
+        self.primed = False
+        self._cursor_id = _NIL_ID
+        self._counts: dict[datetime, int] = {}
+        self._subscribers: list[Callable[[list[dict]], None]] = []
+        self._task: asyncio.Task | None = None
+        self.polls = 0
+        self.pages = 0
+        self.changes = 0
+        self.errors = 0
+
+    def subscribe(self, callback: Callable[[list[dict]], None]) -> None:
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    async def _scoped_fetch(self, query: str, params: dict | None = None) -> list[dict]:
+        async with get_app_conn_async() as conn:
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await cur.execute(
+                    "SELECT set_config('app.current_clients', %s, true)",
+                    (",".join(settings.allowed_client_list),),
+                )
+                await cur.execute(query, params)
+                rows = await cur.fetchall()
+            await conn.commit()
+        return rows
+
+    async def prime(self) -> None:
+        """Take the starting cursor; rows ingested after it are reported by later polls.
+
+        Call it before loading anything the feed keeps current, so rows that
+        land while the load runs are patched in rather than taken as seen.
+        """
+        buckets = await self._scoped_fetch(SELECT_START, {"overlap": self.overlap})
+        self._counts = {row["ingested_at"]: row["cluster_count"] for row in buckets}
+        if buckets:
+            self.watermark, self._cursor_id = buckets[-1]["ingested_at"], buckets[-1]["last_id"]
+        else:
+            self.watermark, self._cursor_id = None, _NIL_ID
+        self.primed = True
+
+    async def poll_once(self) -> int:
+        """Report clusters ingested since the last poll; returns how many."""
+        self.polls += 1
+        if not self.primed:
+            # Nothing was loaded against an earlier cursor; this poll only sets the starting point.
+            await self.prime()
+            return 0
+
+        changed = 0
+        if self.watermark is not None:
+            changed += await self._rescan_overlap()
+        async for rows in self._pages(self.watermark or _START_OF_TIME, self._cursor_id, _END_OF_TIME):
+            for row in rows:
+                self._counts[row["ingested_at"]] = self._counts.get(row["ingested_at"], 0) + 1
+            self.watermark, self._cursor_id = rows[-1]["ingested_at"], rows[-1]["id"]
+            changed += self._notify(rows)
+        if self.watermark is not None:
+            horizon = self.watermark - self.overlap
+            self._counts = {at: n for at, n in self._counts.items() if at > horizon}
+        return changed
+
+    async def _rescan_overlap(self) -> int:
+        """Report rows committed behind the cursor, within the overlap window."""
+        buckets = await self._scoped_fetch(
+            SELECT_BUCKETS, {"since": self.watermark - self.overlap, "until": self.watermark}
+        )
+        changed = 0
+        for bucket in buckets:
+            at, count = bucket["ingested_at"], bucket["cluster_count"]
+            if count > self._counts.get(at, 0):
+                # A transaction that committed late; its rows are re-read, a few may be reported twice.
+                self._counts[at] = 0
+                async for rows in self._pages(at, _NIL_ID, at):
+                    self._counts[at] += len(rows)
+                    changed += self._notify(rows)
+            else:
+                # Rows re-ingested since moved to a later timestamp; nothing new here.
+                self._counts[at] = count
+        return changed
+
+    async def _pages(self, after_at: datetime, after_id: str, until: datetime):
+        while True:
+            rows = await self._scoped_fetch(
+                SELECT_PAGE,
+                {"after_at": after_at, "after_id": after_id, "until": until, "limit": self.page_size},
+            )
+            self.pages += 1
+            if rows:
+                yield rows
+            if len(rows) < self.page_size:
+                return
+            after_at, after_id = rows[-1]["ingested_at"], rows[-1]["id"]
+
+    def _notify(self, changed: list[dict]) -> int:
+        self.changes += len(changed)
+        for callback in self._subscribers:
+            try:
+                callback(changed)
+            except Exception:
+                logger.exception("Change feed subscriber failed")
+        return len(changed)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.errors += 1
+                logger.exception("Cluster change poll failed")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._task is None and self.interval_seconds > 0:
+            self._task = asyncio.create_task(self._run(), name="cluster-change-feed")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "polls": self.polls,
+            "pages": self.pages,
+            "changes": self.changes,
+            "errors": self.errors,
+        }
+
+
+change_feed = ClusterChangeFeed(
+    interval_seconds=settings.cluster_change_poll_seconds,
+    overlap_seconds=settings.cluster_change_overlap_seconds,
+    page_size=settings.cluster_change_page_size,
+)
@@ -15,12 +15,61 @@ class Settings(BaseSettings):
     default_top_k: int = 5
     allowed_clients: str = "Bank_A,Bank_B,Bank_C"
 
+    # --- Retrieval ---
+    retrieval_mode: str = "lateral"           # "lateral" (one statement) | "fanout" | "per_client" | "memory"
+    retrieval_fanout_workers: int = 4         # keep below the app pool max_size
+    retrieval_deadline_ms: int = 2000         # per-request budget for fan-out queries
+    app_async_pool_max_size: int = 20         # connections for the async streaming endpoints
+    embedding_snapshot_path: str = ""         # memory mode: mapped snapshot from scripts/export_embedding_snapshot.py
+    hnsw_ef_search: int = 100                 # HNSW candidate list per scan; raised to top_k when smaller
+    hnsw_iterative_scan: str = "relaxed_order"  # "off" | "strict_order" | "relaxed_order" (pgvector >= 0.8)
+    hnsw_max_scan_tuples: int = 20000         # upper bound on tuples visited by an iterative scan
+    retrieval_score_floor: bool = True        # drop rows below SIMILARITY_THRESHOLD in SQL (best row is kept)
+    hybrid_leg_k: int = 20                    # candidates per leg (vector, full-text) before fusion
+    hybrid_rrf_k: int = 60                    # reciprocal rank fusion constant
+    hybrid_ts_configs: str = "english,french,german,spanish,simple"  # query is parsed with each, OR-ed
+
+    # --- Embedding caches ---
+    token_hash_cache_size: int = 65536
+    query_embedding_cache_size: int = 2048
+    query_embedding_cache_ttl_seconds: int = 3600
+
+    # --- Audit writer ---
+    audit_queue_size: int = 10000             # bounded; events beyond this are dropped
+    audit_batch_size: int = 200               # flush when this many events are pending
+    audit_flush_interval_ms: int = 500        # ...or this long after the first pending event
+    audit_enqueue_timeout_ms: int = 50        # backpressure before dropping on a full queue
+    audit_late_threshold_ms: int = 5000       # enqueue-to-commit latency counted as "late"
+
+    # --- Response cache ---
+    response_cache_size: int = 512            # finished LLM answers kept (LRU)
+    response_cache_ttl_seconds: int = 86400
+    cluster_change_poll_seconds: float = 30.0 # ingested_at watermark poll; 0 disables
+    cluster_change_overlap_seconds: float = 300.0  # re-scan window for late-committing ingests
+    cluster_change_page_size: int = 5000     # rows per keyset page when reading changed clusters
+
+    # --- SSE streaming ---
+    template_stream_chunk_words: int = 8      # words per token event for template answers
+    sse_batch_events: int = 32                # SSE frames joined into one write when unpaced
+    trusted_db_rows: bool = True              # serialize DB rows without pydantic re-validation
+
     # Ollama / LLM settings
     ollama_host: str = "http://host.docker.internal:11434"
     ollama_model: str = "llama3.2:latest"  # production: "llama3:8b-instruct"
     llm_enabled: bool = True
     llm_temperature: float = 0.1
     llm_max_tokens: int = 1024
+    llm_context_token_budget: int = 2500      # retrieved-cluster context packed into each prompt
+    llm_num_ctx: int = 4096                   # fixed Ollama context window (must fit prompt + max tokens)
+    llm_keep_alive: str = "30m"               # how long Ollama keeps the model and prompt cache loaded
+    llm_max_connections: int = 20             # shared httpx pool to Ollama
+    llm_max_keepalive_connections: int = 10
+    llm_keepalive_expiry_seconds: float = 60.0
+    llm_metrics_window: int = 500             # recent requests kept per model for TTFT / tokens/sec
+    llm_max_concurrency: int = 2              # simultaneous Ollama generations
+    llm_max_queue: int = 100                  # waiting generations before shedding outright
+    llm_queue_budget_ms: int = 20000          # max queue wait before falling back to the template answer
+    llm_queue_update_ms: int = 1000           # interval of queue-position SSE events
 
     # --- Auth (JumpCloud OIDC) ---
     auth_enabled: bool = False                # flip to True behind VPN
@@ -57,6 +106,10 @@ class Settings(BaseSettings):
     def allowed_client_list(self) -> list[str]:
         return [c.strip() for c in self.allowed_clients.split(",") if c.strip()]
 
+    @property
+    def hybrid_ts_config_list(self) -> list[str]:
+        return [c.strip() for c in self.hybrid_ts_configs.split(",") if c.strip()]
+
     @property
     def cors_origin_list(self) -> list[str]:
         return [o.strip() for o in self.cors_origins.split(",") if o.strip()]
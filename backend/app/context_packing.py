@@ -0,0 +1,173 @@
+"""Token-budgeted packing of retrieved clusters into LLM prompt context.
+
+Clusters are added in relevance order until the budget is spent. A cluster
+whose clause text is identical to one already packed (the same boilerplate
+used by several banks) is folded into that section as an "also seen in"
+line instead of being repeated. A cluster that does not fit in full is
+retried in a compact form: clause trimmed to the remaining budget, with
+only the most recent query history entries.
+"""
+
+import json
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+_WS = re.compile(r"\s+")
+
+# Compact sections keep at most this many history entries.
+_COMPACT_HISTORY = 2
+# Do not bother packing a compact section with less clause text than this.
+_MIN_CLAUSE_CHARS = 120
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for Llama-family tokenizers (~4 chars per token)."""
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def _clause_key(text: str) -> str:
+    return _WS.sub(" ", text).strip().lower()
+
+
+def _codified_lines(codified_data: dict[str, Any] | None) -> str:
+    lines: list[str] = []
+    for term_key, attrs in (codified_data or {}).items():
+        if isinstance(attrs, dict):
+            for attr_key, val in attrs.items():
+                lines.append(f"  {term_key} > {attr_key}: {val}")
+        else:
+            lines.append(f"  {term_key}: {attrs}")
+    return "\n".join(lines) if lines else "  (none)"
+
+
+def _history_lines(history: Any, limit: int | None = None) -> str:
+    if isinstance(history, str):
+        try:
+            history = json.loads(history)
+        except (json.JSONDecodeError, TypeError):
+            history = []
+    lines: list[str] = []
+    for entry in history or []:
+        if isinstance(entry, dict):
+            role = entry.get("role", "Unknown")
+            msg = entry.get("query") or entry.get("response") or ""
+            if msg:
+                lines.append(f"  {role}: {msg}")
+    if limit is not None:
+        lines = lines[-limit:]
+    return "\n".join(lines) if lines else "  (no queries)"
+
+
+def _format_section(
+    r: dict[str, Any],
+    *,
+    clause_chars: int | None = None,
+    history_limit: int | None = None,
+    also_seen: list[str] | None = None,
+) -> str:
+    cid = str(r["id"])[:8]
+    client = r.get("client_id", "unknown")
+
+    text = (r.get("text_content") or "").strip()
+    if clause_chars is not None and len(text) > clause_chars:
+        text = text[:clause_chars].rstrip() + " ..."
+    clause_str = f'"{text}"' if text else "(no clause text)"
+
+    section = (
+        f"--- Cluster {cid} ---\n"
+        f"Client environment: {client}\n"
+        f"Clause language: {clause_str}\n"
+        f"Codified fields:\n{_codified_lines(r.get('codified_data'))}\n"
+        f"Query history:\n{_history_lines(r.get('query_history'), history_limit)}\n"
+    )
+    if also_seen:
+        section += f"Identical clause also seen in: {', '.join(also_seen)}\n"
+    return section
+
+
+@dataclass
+class _Packed:
+    result: dict[str, Any]
+    clause_chars: int | None
+    history_limit: int | None
+    also_seen: list[str] = field(default_factory=list)
+
+    def render(self) -> str:
+        return _format_section(
+            self.result,
+            clause_chars=self.clause_chars,
+            history_limit=self.history_limit,
+            also_seen=self.also_seen,
+        )
+
+
+@dataclass
+class PackedContext:
+    text: str
+    tokens: int
+    budget: int
+    included: list[dict[str, Any]]
+    dropped: int = 0
+    compacted: int = 0
+    duplicates_merged: int = 0
+
+
+def pack_context(results: list[dict[str, Any]], budget_tokens: int) -> PackedContext:
+    """Fill ``budget_tokens`` with cluster sections, most relevant first."""
+    if not results:
+        text = "No clusters were retrieved."
+        return PackedContext(text=text, tokens=estimate_tokens(text), budget=budget_tokens, included=[])
+
+    ordered = sorted(results, key=lambda r: float(r.get("relevance_score") or 0), reverse=True)
+    packed: list[_Packed] = []
+    by_clause: dict[str, _Packed] = {}
+    used = 0
+    dropped = compacted = merged = 0
+
+    for r in ordered:
+        key = _clause_key(r.get("text_content") or "")
+        if key and key in by_clause:
+            owner = by_clause[key]
+            mention = f"{r.get('client_id', 'unknown')} [{str(r['id'])[:8]}]"
+            before = estimate_tokens(owner.render())
+            owner.also_seen.append(mention)
+            delta = estimate_tokens(owner.render()) - before
+            if used + delta <= budget_tokens:
+                used += delta
+                merged += 1
+                continue
+            owner.also_seen.pop()
+            dropped += 1
+            continue
+
+        candidate = _Packed(r, clause_chars=None, history_limit=None)
+        cost = estimate_tokens(candidate.render())
+        if used + cost > budget_tokens:
+            # Retry compact: recent history only, clause trimmed to what is left.
+            candidate = _Packed(r, clause_chars=0, history_limit=_COMPACT_HISTORY)
+            skeleton = estimate_tokens(candidate.render())
+            spare_chars = (budget_tokens - used - skeleton) * 4
+            if spare_chars < _MIN_CLAUSE_CHARS:
+                dropped += 1
+                continue
+            candidate.clause_chars = spare_chars
+            cost = estimate_tokens(candidate.render())
+            compacted += 1
+
+        packed.append(candidate)
+        if key:
+            by_clause[key] = candidate
+        used += cost
+
+    text = "\n".join(p.render() for p in packed) if packed else "No clusters fit the context budget."
+    return PackedContext(
+        text=text,
+        tokens=estimate_tokens(text),
+        budget=budget_tokens,
+        included=[p.result for p in packed],
+        dropped=dropped,
+        compacted=compacted,
+        duplicates_merged=merged,
+    )
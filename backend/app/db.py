@@ -1,35 +1,84 @@
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
 
-from psycopg_pool import ConnectionPool
+from pgvector.psycopg import register_vector, register_vector_async
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
 
 from .config import settings
 
+# Installed pgvector version, e.g. (0, 8, 0); recorded by the first configured connection.
+pgvector_version: tuple[int, ...] = ()
+
+_PGVECTOR_VERSION_SQL = "SELECT extversion FROM pg_extension WHERE extname = 'vector'"
+
+
+def _record_pgvector_version(row) -> None:
+    global pgvector_version
+    if row and not pgvector_version:
+        pgvector_version = tuple(int(part) for part in row[0].split(".") if part.isdigit())
+
 
 def _check_conn(conn):
     conn.execute("SELECT 1")
 
 
+def _configure_conn(conn):
+    # numpy float32 arrays are sent to pgvector as binary buffers, not text literals
+    register_vector(conn)
+    _record_pgvector_version(conn.execute(_PGVECTOR_VERSION_SQL).fetchone())
+    conn.commit()
+
+
+async def _check_conn_async(conn):
+    await conn.execute("SELECT 1")
+
+
+async def _configure_conn_async(conn):
+    await register_vector_async(conn)
+    cur = await conn.execute(_PGVECTOR_VERSION_SQL)
+    _record_pgvector_version(await cur.fetchone())
+    await conn.commit()
+
+
 app_pool = ConnectionPool(
     conninfo=settings.app_database_url,
     min_size=1,
     max_size=10,
     timeout=30,
     check=_check_conn,
+    configure=_configure_conn,
     max_idle=300,
 )
+# Async pool for the streaming endpoints; opened/closed by the app lifespan.
+app_async_pool = AsyncConnectionPool(
+    conninfo=settings.app_database_url,
+    min_size=1,
+    max_size=settings.app_async_pool_max_size,
+    timeout=30,
+    check=_check_conn_async,
+    configure=_configure_conn_async,
+    max_idle=300,
+    open=False,
+)
 ingest_pool = ConnectionPool(
     conninfo=settings.ingest_database_url,
     min_size=1,
     max_size=4,
     timeout=30,
     check=_check_conn,
+    configure=_configure_conn,
     max_idle=300,
 )
 
 
 @contextmanager
-def get_app_conn():
-    with app_pool.connection() as conn:
+def get_app_conn(timeout: float | None = None):
+    with app_pool.connection(timeout=timeout) as conn:
+        yield conn
+
+
+@asynccontextmanager
+async def get_app_conn_async(timeout: float | None = None):
+    async with app_async_pool.connection(timeout=timeout) as conn:
         yield conn
 
 
@@ -1,15 +1,32 @@
 import hashlib
-import math
 import re
+from functools import lru_cache
 
+import numpy as np
+
+from .cache import LRUCache
+from .config import settings
+
+EMBEDDING_MODEL = "phase0-hash-v1"
 EMBEDDING_DIM = 384
 TOKEN_PATTERN = re.compile(r"[A-Za-z0-9_]+")
 
+# Keyed by (EMBEDDING_MODEL, text) so a model swap never serves vectors
+# produced by the previous model.
+_query_cache = LRUCache(
+    maxsize=settings.query_embedding_cache_size,
+    ttl_seconds=settings.query_embedding_cache_ttl_seconds,
+)
+
 
 def _tokenize(text: str) -> list[str]:
     return TOKEN_PATTERN.findall(text.lower())
 
 
+# functools' C implementation: the hash is cheap enough that a Python-level
+# cache costs nearly as much as recomputing it. EMBEDDING_MODEL is a module
+# constant, so the token alone is the key.
+@lru_cache(maxsize=settings.token_hash_cache_size)
 def _hash_token(token: str) -> tuple[int, int]:
     digest = hashlib.sha256(token.encode("utf-8")).digest()
     idx = int.from_bytes(digest[:4], "big") % EMBEDDING_DIM
@@ -17,20 +34,70 @@ def _hash_token(token: str) -> tuple[int, int]:
     return idx, sign
 
 
+def _token_cache_stats() -> dict:
+    info = _hash_token.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "size": info.currsize,
+        "maxsize": info.maxsize,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_rate": round(info.hits / lookups, 4) if lookups else None,
+    }
+
+
+def embed_batch(texts: list[str], dtype: type = np.float32) -> np.ndarray:
+    """Embed many texts at once into an ``(len(texts), EMBEDDING_DIM)`` matrix.
+
+    Token counts are accumulated and normalised in float64, so every row is
+    bit-identical to the original ``phase0-hash-v1`` vectors before the final
+    cast to ``dtype`` (float32 matches pgvector storage). Empty texts yield
+    zero rows.
+    """
+    matrix = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float64)
+    rows: list[int] = []
+    cols: list[int] = []
+    signs: list[int] = []
+    for row, text in enumerate(texts):
+        for token in _tokenize(text):
+            idx, sign = _hash_token(token)
+            rows.append(row)
+            cols.append(idx)
+            signs.append(sign)
+
+    if rows:
+        np.add.at(matrix, (np.asarray(rows), np.asarray(cols)), np.asarray(signs, dtype=np.float64))
+
+    norms = np.sqrt(np.einsum("ij,ij->i", matrix, matrix))[:, np.newaxis]
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix.astype(dtype, copy=False)
+
+
 def embed_text(text: str) -> list[float]:
-    vec = [0.0] * EMBEDDING_DIM
-    tokens = _tokenize(text)
-    if not tokens:
-        return vec
-
-    for token in tokens:
-        idx, sign = _hash_token(token)
-        vec[idx] += float(sign)
-
-    norm = math.sqrt(sum(v * v for v in vec))
-    if norm == 0:
-        return vec
-    return [v / norm for v in vec]
+    return embed_batch([text], dtype=np.float64)[0].tolist()
+
+
+def embed_query(text: str) -> list[float]:
+    """``embed_text`` for API queries, memoised in the query-embedding cache."""
+    key = (EMBEDDING_MODEL, text)
+    cached = _query_cache.get(key)
+    if cached is None:
+        cached = tuple(embed_text(text))
+        _query_cache.put(key, cached)
+    return list(cached)
+
+
+def embedding_cache_stats() -> dict:
+    return {
+        "embedding_model": EMBEDDING_MODEL,
+        "token_hash": _token_cache_stats(),
+        "query_embedding": _query_cache.stats(),
+    }
+
+
+def to_pgvector(values: list[float] | np.ndarray) -> np.ndarray:
+    """float32 buffer for pgvector's binary adapter (registered in app.db)."""
+    return np.asarray(values, dtype=np.float32)
 
 
 def to_pgvector_literal(values: list[float]) -> str:
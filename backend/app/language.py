@@ -42,11 +42,25 @@ def detect_clause_language(text: str) -> str:
     return "en"
 
 
+# Postgres text search configuration per clause language (hybrid retrieval).
+TS_CONFIGS: dict[str, str] = {"en": "english", "fr": "french", "de": "german", "es": "spanish"}
+
+
+def ts_config_for(text: str) -> str:
+    return TS_CONFIGS.get(detect_clause_language(text), "simple")
+
+
+def detect_non_english(results: list[dict]) -> frozenset[str]:
+    """Languages (with instructions) of the non-English clauses in ``results``."""
+    langs = {detect_clause_language(r.get("text_content", "")) for r in results}
+    return frozenset(lang for lang in langs if lang in LANGUAGE_INSTRUCTIONS)
+
+
+def language_instruction_for(languages: frozenset[str]) -> str | None:
+    parts = [LANGUAGE_INSTRUCTIONS[lang] for lang in sorted(languages)]
+    return " ".join(parts) or None
+
+
 def get_language_instruction(results: list[dict]) -> str | None:
     """If any retrieved clauses are non-English, return instruction for the LLM."""
-    langs = {detect_clause_language(r.get("text_content", "")) for r in results}
-    non_english = langs - {"en"}
-    if not non_english:
-        return None
-    parts = [LANGUAGE_INSTRUCTIONS.get(lang, "") for lang in sorted(non_english)]
-    return " ".join(p for p in parts if p) or None
+    return language_instruction_for(detect_non_english(results))
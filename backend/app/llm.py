@@ -2,83 +2,152 @@
 
 import json
 import logging
+import statistics
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
 from typing import Any, AsyncIterator
 
 import httpx
 
 from .config import settings
-from .language import get_language_instruction
-from .prompts import get_prompt_for_term
+from .context_packing import estimate_tokens, pack_context
+from .language import detect_non_english
+from .prompts import get_prompt_for_term, get_system_prompt
 
 logger = logging.getLogger(__name__)
 
 _TIMEOUT = httpx.Timeout(connect=60.0, read=300.0, write=10.0, pool=10.0)
+_HEALTH_TIMEOUT = httpx.Timeout(5.0)
 
+# Application-lifetime client; opened/closed by the FastAPI lifespan.
+_client: httpx.AsyncClient | None = None
 
-def _format_context(results: list[dict[str, Any]]) -> str:
-    """Format retrieved clusters into plain-English context for the LLM."""
-    if not results:
-        return "No clusters were retrieved."
-
-    parts: list[str] = []
-    for r in results:
-        cid = str(r["id"])[:8]
-        client = r.get("client_id", "unknown")
-
-        # Codified fields as readable key-value pairs
-        codified_data = r.get("codified_data") or {}
-        codified_lines: list[str] = []
-        for term_key, attrs in codified_data.items():
-            if isinstance(attrs, dict):
-                for attr_key, val in attrs.items():
-                    codified_lines.append(f"  {term_key} > {attr_key}: {val}")
-            else:
-                codified_lines.append(f"  {term_key}: {attrs}")
-        codified_str = "\n".join(codified_lines) if codified_lines else "  (none)"
-
-        # Clause language
-        text = (r.get("text_content") or "").strip()
-        clause_str = f'"{text[:600]}"' if text else "(no clause text)"
-
-        # Query history
-        history = r.get("query_history") or []
-        if isinstance(history, str):
-            try:
-                history = json.loads(history)
-            except (json.JSONDecodeError, TypeError):
-                history = []
-        history_lines: list[str] = []
-        for entry in history:
-            if isinstance(entry, dict):
-                role = entry.get("role", "Unknown")
-                msg = entry.get("query") or entry.get("response") or ""
-                if msg:
-                    history_lines.append(f"  {role}: {msg}")
-        history_str = "\n".join(history_lines) if history_lines else "  (no queries)"
-
-        parts.append(
-            f"--- Cluster {cid} ---\n"
-            f"Client environment: {client}\n"
-            f"Clause language: {clause_str}\n"
-            f"Codified fields:\n{codified_str}\n"
-            f"Query history:\n{history_str}\n"
-        )
-    return "\n".join(parts)
-
-
-def build_chat_messages(
+
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=settings.ollama_host,
+        timeout=_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_keepalive_connections,
+            keepalive_expiry=settings.llm_keepalive_expiry_seconds,
+        ),
+    )
+
+
+async def open_llm_client() -> None:
+    global _client
+    if _client is None:
+        _client = _new_client()
+
+
+async def close_llm_client() -> None:
+    """Close pooled connections; in-flight streams finish before the lifespan exits."""
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+
+
+def _get_client() -> httpx.AsyncClient:
+    # Fallback for callers outside the app lifespan (scripts, tests).
+    global _client
+    if _client is None:
+        _client = _new_client()
+    return _client
+
+
+class _ModelLatency:
+    """Rolling time-to-first-token and throughput samples for one model."""
+
+    def __init__(self, window: int) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.tokens = 0
+        self.ttft_ms: deque[float] = deque(maxlen=window)
+        self.tokens_per_sec: deque[float] = deque(maxlen=window)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "tokens": self.tokens,
+            "ttft_ms": _summarize(self.ttft_ms),
+            "tokens_per_sec": _summarize(self.tokens_per_sec),
+        }
+
+
+def _summarize(samples: deque[float]) -> dict[str, float] | None:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return {
+        "p50": round(statistics.median(ordered), 2),
+        "p95": round(ordered[max(0, int(len(ordered) * 0.95) - 1)], 2),
+        "mean": round(statistics.fmean(ordered), 2),
+    }
+
+
+_latency: dict[str, _ModelLatency] = {}
+_latency_lock = threading.Lock()
+
+
+def _model_latency(model: str) -> _ModelLatency:
+    with _latency_lock:
+        entry = _latency.get(model)
+        if entry is None:
+            entry = _latency[model] = _ModelLatency(settings.llm_metrics_window)
+        return entry
+
+
+def llm_stats() -> dict[str, Any]:
+    """Per-model LLM latency metrics for /api/stats."""
+    with _latency_lock:
+        return {model: entry.snapshot() for model, entry in _latency.items()}
+
+
+@dataclass(frozen=True)
+class ChatPrompt:
+    messages: list[dict[str, str]]
+    system_tokens: int
+    context_tokens: int
+    total_tokens: int
+    context_budget: int
+    clusters_packed: int
+    clusters_dropped: int
+    clusters_compacted: int
+    duplicates_merged: int
+
+    def meta(self) -> dict[str, int]:
+        """Prompt size figures for the SSE ``meta`` event."""
+        return {
+            "system_tokens": self.system_tokens,
+            "context_tokens": self.context_tokens,
+            "total_tokens": self.total_tokens,
+            "context_budget": self.context_budget,
+            "clusters_packed": self.clusters_packed,
+            "clusters_dropped": self.clusters_dropped,
+            "clusters_compacted": self.clusters_compacted,
+            "duplicates_merged": self.duplicates_merged,
+        }
+
+
+def build_chat_prompt(
     results: list[dict[str, Any]],
     term: str | None = None,
     attribute: str | None = None,
     language: str | None = None,
-) -> list[dict[str, str]]:
+) -> ChatPrompt:
     """Assemble system + user messages for the LLM.
 
-    Uses the prompt registry for term-specific prompts and appends
-    language instructions when non-English clauses are detected.
+    Uses the prompt registry for term-specific prompts, packs retrieved
+    clusters into ``LLM_CONTEXT_TOKEN_BUDGET`` and appends language
+    instructions when non-English clauses are included.
     """
     template = get_prompt_for_term(term)
-    context = _format_context(results)
+    packed = pack_context(results, settings.llm_context_token_budget)
 
     criteria_parts: list[str] = []
     if term:
@@ -89,17 +158,26 @@ def build_chat_messages(
         criteria_parts.append(f"Language: {language}")
     criteria = ", ".join(criteria_parts) if criteria_parts else "General search"
 
-    system_prompt = template.system_prompt
-    lang_instruction = get_language_instruction(results)
-    if lang_instruction:
-        system_prompt += f"\n\nLanguage note: {lang_instruction}"
+    # Precompiled per term and language set, so identical requests share a prompt prefix.
+    system_prompt = get_system_prompt(template, detect_non_english(packed.included))
 
-    user_msg = template.user_template.format(criteria=criteria, context=context)
+    user_msg = template.user_template.format(criteria=criteria, context=packed.text)
+    system_tokens = estimate_tokens(system_prompt)
 
-    return [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_msg},
-    ]
+    return ChatPrompt(
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_msg},
+        ],
+        system_tokens=system_tokens,
+        context_tokens=packed.tokens,
+        total_tokens=system_tokens + estimate_tokens(user_msg),
+        context_budget=packed.budget,
+        clusters_packed=len(packed.included),
+        clusters_dropped=packed.dropped,
+        clusters_compacted=packed.compacted,
+        duplicates_merged=packed.duplicates_merged,
+    )
 
 
 async def chat_completion_stream(
@@ -110,18 +188,25 @@ async def chat_completion_stream(
         "model": settings.ollama_model,
         "messages": messages,
         "stream": True,
+        # Keep the model (and its prompt cache) resident between requests.
+        "keep_alive": settings.llm_keep_alive,
         "options": {
             "temperature": settings.llm_temperature,
             "num_predict": settings.llm_max_tokens,
+            # A fixed context size; changing num_ctx forces Ollama to reload the model.
+            "num_ctx": settings.llm_num_ctx,
         },
     }
 
-    async with httpx.AsyncClient(timeout=_TIMEOUT) as client:
-        async with client.stream(
-            "POST",
-            f"{settings.ollama_host}/api/chat",
-            json=payload,
-        ) as response:
+    metrics = _model_latency(settings.ollama_model)
+    metrics.requests += 1
+    started = time.perf_counter()
+    first_token_at: float | None = None
+    token_count = 0
+    final: dict[str, Any] = {}
+
+    try:
+        async with _get_client().stream("POST", "/api/chat", json=payload) as response:
             response.raise_for_status()
             async for line in response.aiter_lines():
                 if not line.strip():
@@ -132,26 +217,42 @@ async def chat_completion_stream(
                     continue
                 token = chunk.get("message", {}).get("content", "")
                 if token:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        metrics.ttft_ms.append((first_token_at - started) * 1000)
+                    token_count += 1
                     yield token
                 if chunk.get("done"):
+                    final = chunk
                     break
+    except Exception:
+        metrics.errors += 1
+        raise
+
+    metrics.tokens += token_count
+    # Prefer Ollama's own decode timing; fall back to wall time since the first token.
+    eval_count = final.get("eval_count")
+    eval_ns = final.get("eval_duration")
+    if eval_count and eval_ns:
+        metrics.tokens_per_sec.append(eval_count / (eval_ns / 1e9))
+    elif first_token_at is not None and token_count > 1:
+        metrics.tokens_per_sec.append((token_count - 1) / (time.perf_counter() - first_token_at))
 
 
 async def check_ollama_health() -> dict[str, Any]:
     """Check if Ollama is reachable and report loaded model."""
     try:
-        async with httpx.AsyncClient(timeout=httpx.Timeout(5.0)) as client:
-            resp = await client.get(f"{settings.ollama_host}/api/tags")
-            resp.raise_for_status()
-            data = resp.json()
-            model_names = [m.get("name", "") for m in data.get("models", [])]
-            model_loaded = settings.ollama_model in model_names
-            return {
-                "ollama_reachable": True,
-                "ollama_model": settings.ollama_model,
-                "model_loaded": model_loaded,
-                "available_models": model_names,
-            }
+        resp = await _get_client().get("/api/tags", timeout=_HEALTH_TIMEOUT)
+        resp.raise_for_status()
+        data = resp.json()
+        model_names = [m.get("name", "") for m in data.get("models", [])]
+        model_loaded = settings.ollama_model in model_names
+        return {
+            "ollama_reachable": True,
+            "ollama_model": settings.ollama_model,
+            "model_loaded": model_loaded,
+            "available_models": model_names,
+        }
     except Exception as exc:
         logger.warning("Ollama health check failed: %s", exc)
         return {
@@ -1,35 +1,98 @@
 import asyncio
-import json
 import logging
 import time
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Any
 
-from fastapi import Depends, FastAPI
+from fastapi import Depends, FastAPI, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
 
-from .audit import log_api_event
+from .admission import AdmissionRejected, llm_admission
+from .audit import audit_writer
 from .auth import CurrentUser, get_current_user
+from .catalog import catalog
+from .change_feed import change_feed
 from .config import settings
-from .db import get_app_conn
-from .embeddings import embed_text
-from .llm import build_chat_messages, chat_completion_stream, check_ollama_health
-from .retrieval import search_clusters_across_clients, search_clusters_structured_across_clients
+from .db import app_async_pool, get_app_conn, get_app_conn_async
+from .embeddings import embed_query, embedding_cache_stats
+from .llm import (
+    build_chat_prompt,
+    chat_completion_stream,
+    check_ollama_health,
+    close_llm_client,
+    llm_stats,
+    open_llm_client,
+)
+from .prompts import get_prompt_for_term
+from .response_cache import response_cache, response_cache_key
+from .retrieval import (
+    ahydrate_clusters,
+    asearch_clusters_across_clients,
+    asearch_clusters_structured_across_clients,
+    hydrate_clusters,
+    search_clusters_across_clients,
+    search_clusters_hybrid,
+    search_clusters_structured_across_clients,
+)
 from .schemas import (
+    CatalogResponse,
     ChatRequest,
     ChatResponse,
+    ClusterResult,
+    RetrievalMeta,
     SearchRequest,
     SearchResponse,
     StructuredChatRequest,
     StructuredSearchRequest,
 )
 from .security import get_cors_config
+from .serialization import FastJSONResponse, dumps
+from .single_flight import llm_flights
+from .vector_index import vector_index
 
-app = FastAPI(title="Secure Internal Contract AI - Phase 0")
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    await app_async_pool.open()
+    await open_llm_client()
+    audit_writer.start()
+    try:
+        # Before the catalog and replica load, so clusters ingested meanwhile reach them through the feed.
+        await change_feed.prime()
+    except Exception:
+        logger.exception("Change feed prime failed; its first poll takes the watermark instead")
+    try:
+        await catalog.refresh()
+    except Exception:
+        logger.exception("Initial catalog load failed; it will load on the next cluster change")
+    if settings.retrieval_mode == "memory":
+        try:
+            await vector_index.load()
+        except Exception:
+            logger.exception("Vector index load failed; searches use Postgres until it loads")
+        change_feed.subscribe(vector_index.apply_changes)
+    change_feed.subscribe(response_cache.invalidate_clusters)
+    change_feed.subscribe(catalog.invalidate)
+    change_feed.start()
+    try:
+        yield
+    finally:
+        await change_feed.stop()
+        await catalog.stop()
+        await vector_index.stop()
+        # Drain pending audit events before the pools go away.
+        await asyncio.to_thread(audit_writer.stop)
+        await close_llm_client()
+        await app_async_pool.close()
+
+
+app = FastAPI(title="Secure Internal Contract AI - Phase 0", lifespan=lifespan)
 GLOBAL_SCOPE = "ALL_BANKS"
 
 app.add_middleware(CORSMiddleware, **get_cors_config())
@@ -46,27 +109,68 @@ async def health() -> dict:
     return result
 
 
+@app.get("/api/stats")
+def api_stats(user: CurrentUser = Depends(get_current_user)) -> dict:
+    return {
+        "embedding_cache": embedding_cache_stats(),
+        "audit": audit_writer.stats(),
+        "llm": llm_stats(),
+        "response_cache": response_cache.stats(),
+        "llm_single_flight": llm_flights.stats(),
+        "llm_admission": llm_admission.stats(),
+        "change_feed": change_feed.stats(),
+        "catalog": catalog.stats(),
+        "vector_index": vector_index.stats(),
+    }
+
+
+@app.get("/api/catalog", response_model=CatalogResponse)
+async def api_catalog(
+    q: str | None = Query(default=None, min_length=1, description="Substring of a term or attribute name"),
+    term: str | None = Query(default=None, description="Exact term, e.g. 'Governing Law'"),
+    client_id: str | None = Query(default=None, description="Restrict counts to one bank"),
+    values: bool = Query(default=True, description="Include value-level counts"),
+    limit: int = Query(default=50, ge=1, le=500),
+    user: CurrentUser = Depends(get_current_user),
+) -> Response:
+    """Terms, attributes and values present in codified_data, with cluster counts per bank."""
+    clients = user.allowed_clients or settings.allowed_client_list
+    if client_id is not None:
+        clients = [c for c in clients if c == client_id]
+    terms = catalog.query(clients, q=q, term=term, include_values=values, limit=limit)
+    return FastJSONResponse({"clients": clients, "terms": terms, "loaded_at": catalog.loaded_at})
+
+
 def _filter_results(raw_results: list[dict[str, Any]]) -> list[dict[str, Any]]:
-    return [r for r in raw_results if float(r["relevance_score"]) >= settings.similarity_threshold]
+    # A hybrid full-text match is evidence whatever its cosine similarity.
+    return [
+        r for r in raw_results
+        if r.get("lexical_match") or float(r["relevance_score"]) >= settings.similarity_threshold
+    ]
 
 
 def _top_score(raw_results: list[dict[str, Any]]) -> float | None:
     if not raw_results:
         return None
-    return float(raw_results[0]["relevance_score"])
+    return max(float(r["relevance_score"]) for r in raw_results)
 
 
-def _safe_log_event(**kwargs: Any) -> None:
-    conn = kwargs.pop("conn")
-    try:
-        log_api_event(conn, **kwargs)
-    except Exception:
-        conn.rollback()
+def _log_event(**kwargs: Any) -> None:
+    audit_writer.submit(**kwargs)
+
+
+def _log_event_nowait(**kwargs: Any) -> None:
+    # For async handlers: drops the event on a full queue rather than block the event loop.
+    audit_writer.submit_nowait(**kwargs)
+
+
+# The template answer cites (and therefore hydrates) at most this many clusters.
+_ANSWER_CITATIONS = 3
 
 
 def _build_answer(filtered: list[dict[str, Any]]) -> tuple[str, list[str]]:
     top = filtered[0]
-    citations = [str(r["id"]) for r in filtered[:3]]
+    citations = [str(r["id"]) for r in filtered[:_ANSWER_CITATIONS]]
     citation_marks = " ".join(f"[{i + 1}]" for i in range(len(citations)))
     answer = (
         "Based on historical cluster decisions, this language has prior captures. "
@@ -77,42 +181,154 @@ def _build_answer(filtered: list[dict[str, Any]]) -> tuple[str, list[str]]:
     return answer, citations
 
 
+def _hydrate_citations(conn, filtered: list[dict[str, Any]], client_ids: list[str]) -> list[dict[str, Any]]:
+    """Hydrate the first ``_ANSWER_CITATIONS`` survivors.
+
+    A ranked row can be gone (or out of scope) by the time it is hydrated;
+    the next survivors take its place.
+    """
+    cited: list[dict[str, Any]] = []
+    start = 0
+    while len(cited) < _ANSWER_CITATIONS and start < len(filtered):
+        batch = filtered[start:start + _ANSWER_CITATIONS - len(cited)]
+        start += len(batch)
+        cited.extend(hydrate_clusters(conn, batch, client_ids))
+    return cited
+
+
+async def _ahydrate_citations(conn, filtered: list[dict[str, Any]], client_ids: list[str]) -> list[dict[str, Any]]:
+    cited: list[dict[str, Any]] = []
+    start = 0
+    while len(cited) < _ANSWER_CITATIONS and start < len(filtered):
+        batch = filtered[start:start + _ANSWER_CITATIONS - len(cited)]
+        start += len(batch)
+        cited.extend(await ahydrate_clusters(conn, batch, client_ids))
+    return cited
+
+
 def _sse(event: str, payload: dict[str, Any]) -> str:
-    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    return f"event: {event}\ndata: {dumps(payload)}\n\n"
+
+
+def _field_defaults(model: type[BaseModel]) -> dict[str, Any]:
+    return {
+        name: field.get_default(call_default_factory=True)
+        for name, field in model.model_fields.items()
+        if not field.is_required()
+    }
+
+
+_CLUSTER_FIELDS = tuple(ClusterResult.model_fields)
+_SEARCH_FIELDS = tuple(SearchResponse.model_fields)
+_SEARCH_DEFAULTS = _field_defaults(SearchResponse)
+_RETRIEVAL_FIELDS = tuple(RetrievalMeta.model_fields)
+_RETRIEVAL_DEFAULTS = _field_defaults(RetrievalMeta)
+
+
+def _search_response(**fields: Any) -> Response | SearchResponse:
+    """Build a SearchResponse body.
+
+    Rows come straight from our own typed columns, so with TRUSTED_DB_ROWS
+    (default) they are projected to the ClusterResult fields and serialized
+    directly, skipping pydantic re-validation of every UUID, datetime and
+    JSONB dict. Keys are emitted in model field order, so the bytes are the
+    same as the validated path.
+    """
+    if not settings.trusted_db_rows:
+        return SearchResponse(**fields)
+    fields = {**_SEARCH_DEFAULTS, **fields}
+    fields["results"] = [{name: row.get(name) for name in _CLUSTER_FIELDS} for row in fields["results"]]
+    if fields["retrieval"] is not None:
+        retrieval = {**_RETRIEVAL_DEFAULTS, **fields["retrieval"]}
+        fields["retrieval"] = {name: retrieval[name] for name in _RETRIEVAL_FIELDS}
+    return FastJSONResponse({name: fields[name] for name in _SEARCH_FIELDS})
+
+
+def _batched_frames(frames: list[str]) -> list[str]:
+    """Join ready SSE frames so each write carries up to ``SSE_BATCH_EVENTS`` events."""
+    size = max(1, settings.sse_batch_events)
+    return ["".join(frames[i:i + size]) for i in range(0, len(frames), size)]
+
+
+async def _answer_events(
+    answer: str,
+    citations: list[str],
+    evidence_found: bool,
+    pace_ms: int | None = None,
+):
+    """Stream a precomputed answer as ``token`` events followed by ``done``.
+
+    Words are grouped into chunks of ``TEMPLATE_STREAM_CHUNK_WORDS``. Without
+    a pacing hint the frames are written in batches of ``SSE_BATCH_EVENTS``
+    per write; with ``pace_ms`` each chunk is sent on its own after that delay.
+    """
+    words = answer.split(" ")
+    size = max(1, settings.template_stream_chunk_words)
+    frames = [
+        _sse("token", {"token": " ".join(words[i:i + size]) + " "})
+        for i in range(0, len(words), size)
+    ]
+    frames.append(
+        _sse("done", {"citations": citations, "evidence_found": evidence_found, "token_count": len(words)})
+    )
+
+    if pace_ms:
+        for i, frame in enumerate(frames):
+            if i:
+                await asyncio.sleep(pace_ms / 1000)
+            yield frame
+        return
+
+    for batch in _batched_frames(frames):
+        yield batch
+
+
+def _template_answer_events(filtered: list[dict[str, Any]], pace_ms: int | None = None):
+    answer, citations = _build_answer(filtered)
+    return _answer_events(answer, citations, True, pace_ms)
 
 
 @app.post("/api/search", response_model=SearchResponse)
 def api_search(
     payload: SearchRequest,
     user: CurrentUser = Depends(get_current_user),
-) -> SearchResponse:
+) -> Response | SearchResponse:
     started = time.perf_counter()
-    query_embedding = embed_text(payload.query)
+    query_embedding = embed_query(payload.query)
     target_clients = user.allowed_clients or settings.allowed_client_list
 
+    retrieval_stats: dict[str, Any] = {}
+
     with get_app_conn() as conn:
-        raw_results = search_clusters_across_clients(conn, target_clients, query_embedding, payload.top_k)
-        filtered = _filter_results(raw_results)
-        elapsed_ms = int((time.perf_counter() - started) * 1000)
+        if payload.mode == "hybrid":
+            raw_results = search_clusters_hybrid(
+                conn, target_clients, query_embedding, payload.query, payload.top_k, stats=retrieval_stats, light=True
+            )
+        else:
+            raw_results = search_clusters_across_clients(
+                conn, target_clients, query_embedding, payload.top_k, stats=retrieval_stats, light=True
+            )
+        filtered = hydrate_clusters(conn, _filter_results(raw_results), target_clients)
+        conn.commit()
 
-        _safe_log_event(
-            conn=conn,
-            client_id=GLOBAL_SCOPE,
-            user_id=user.id,
-            endpoint="/api/search",
-            query_text=payload.query,
-            result_count=len(filtered),
-            evidence_found=bool(filtered),
-            top_score=_top_score(raw_results),
-            status_code=200,
-            response_time_ms=elapsed_ms,
-            error_message=None,
-        )
+    retrieval_stats.update(candidates=len(raw_results), hydrated=len(filtered))
+    elapsed_ms = int((time.perf_counter() - started) * 1000)
 
-        conn.commit()
+    _log_event(
+        client_id=GLOBAL_SCOPE,
+        user_id=user.id,
+        endpoint="/api/search",
+        query_text=payload.query,
+        result_count=len(filtered),
+        evidence_found=bool(filtered),
+        top_score=_top_score(raw_results),
+        status_code=200,
+        response_time_ms=elapsed_ms,
+        error_message=None,
+    )
 
     if not filtered:
-        return SearchResponse(
+        return _search_response(
             query=payload.query,
             scope=GLOBAL_SCOPE,
             threshold=settings.similarity_threshold,
@@ -120,9 +336,10 @@ def api_search(
             note="Insufficient evidence for a trustworthy precedent answer.",
             results=[],
             searched_clients=target_clients,
+            retrieval=retrieval_stats,
         )
 
-    return SearchResponse(
+    return _search_response(
         query=payload.query,
         scope=GLOBAL_SCOPE,
         threshold=settings.similarity_threshold,
@@ -130,6 +347,7 @@ def api_search(
         note=f"Evidence-backed precedents found across {len(target_clients)} bank streams.",
         results=filtered,
         searched_clients=target_clients,
+        retrieval=retrieval_stats,
     )
 
 
@@ -139,50 +357,51 @@ def api_chat(
     user: CurrentUser = Depends(get_current_user),
 ) -> ChatResponse:
     started = time.perf_counter()
-    query_embedding = embed_text(payload.query)
+    query_embedding = embed_query(payload.query)
     target_clients = user.allowed_clients or settings.allowed_client_list
 
     with get_app_conn() as conn:
-        raw_results = search_clusters_across_clients(conn, target_clients, query_embedding, settings.default_top_k)
+        raw_results = search_clusters_across_clients(
+            conn, target_clients, query_embedding, settings.default_top_k, light=True
+        )
         filtered = _filter_results(raw_results)
-        elapsed_ms = int((time.perf_counter() - started) * 1000)
-
-        if not filtered:
-            _safe_log_event(
-                conn=conn,
-                client_id=GLOBAL_SCOPE,
-                user_id=user.id,
-                endpoint="/api/chat",
-                query_text=payload.query,
-                result_count=0,
-                evidence_found=False,
-                top_score=_top_score(raw_results),
-                status_code=200,
-                response_time_ms=elapsed_ms,
-                error_message="insufficient_evidence",
-            )
-            conn.commit()
-            return ChatResponse(
-                answer="I cannot answer from precedent because no sufficiently similar, in-scope clusters were found.",
-                citations=[],
-                evidence_found=False,
-            )
+        cited = _hydrate_citations(conn, filtered, target_clients)
+        conn.commit()
+
+    elapsed_ms = int((time.perf_counter() - started) * 1000)
 
-        answer, citations = _build_answer(filtered)
-        _safe_log_event(
-            conn=conn,
+    if not cited:
+        _log_event(
             client_id=GLOBAL_SCOPE,
             user_id=user.id,
             endpoint="/api/chat",
             query_text=payload.query,
-            result_count=len(filtered),
-            evidence_found=True,
+            result_count=0,
+            evidence_found=False,
             top_score=_top_score(raw_results),
             status_code=200,
             response_time_ms=elapsed_ms,
-            error_message=None,
+            error_message="insufficient_evidence",
+        )
+        return ChatResponse(
+            answer="I cannot answer from precedent because no sufficiently similar, in-scope clusters were found.",
+            citations=[],
+            evidence_found=False,
         )
-        conn.commit()
+
+    answer, citations = _build_answer(cited)
+    _log_event(
+        client_id=GLOBAL_SCOPE,
+        user_id=user.id,
+        endpoint="/api/chat",
+        query_text=payload.query,
+        result_count=len(filtered),
+        evidence_found=True,
+        top_score=_top_score(raw_results),
+        status_code=200,
+        response_time_ms=elapsed_ms,
+        error_message=None,
+    )
 
     return ChatResponse(answer=answer, citations=citations, evidence_found=True)
 
@@ -193,38 +412,44 @@ async def api_chat_stream(
     user: CurrentUser = Depends(get_current_user),
 ) -> StreamingResponse:
     started = time.perf_counter()
-    query_embedding = embed_text(payload.query)
+    # Hashing is CPU-bound; keep it off the event loop.
+    query_embedding = await asyncio.to_thread(embed_query, payload.query)
     target_clients = user.allowed_clients or settings.allowed_client_list
+    retrieval_stats: dict[str, Any] = {}
 
-    with get_app_conn() as conn:
-        raw_results = search_clusters_across_clients(conn, target_clients, query_embedding, settings.default_top_k)
+    async with get_app_conn_async() as conn:
+        raw_results = await asearch_clusters_across_clients(
+            conn, target_clients, query_embedding, settings.default_top_k, stats=retrieval_stats, light=True
+        )
         filtered = _filter_results(raw_results)
-        elapsed_ms = int((time.perf_counter() - started) * 1000)
+        cited = await _ahydrate_citations(conn, filtered, target_clients)
+        await conn.commit()
 
-        if not filtered:
-            answer = "I cannot answer from precedent because no sufficiently similar, in-scope clusters were found."
-            citations: list[str] = []
-            evidence_found = False
-            error_message = "insufficient_evidence"
-        else:
-            answer, citations = _build_answer(filtered)
-            evidence_found = True
-            error_message = None
+    retrieval_stats.update(candidates=len(raw_results), hydrated=len(cited))
+    elapsed_ms = int((time.perf_counter() - started) * 1000)
 
-        _safe_log_event(
-            conn=conn,
-            client_id=GLOBAL_SCOPE,
-            user_id=user.id,
-            endpoint="/api/chat/stream",
-            query_text=payload.query,
-            result_count=len(filtered),
-            evidence_found=evidence_found,
-            top_score=_top_score(raw_results),
-            status_code=200,
-            response_time_ms=elapsed_ms,
-            error_message=error_message,
-        )
-        conn.commit()
+    if not cited:
+        answer = "I cannot answer from precedent because no sufficiently similar, in-scope clusters were found."
+        citations: list[str] = []
+        evidence_found = False
+        error_message = "insufficient_evidence"
+    else:
+        answer, citations = _build_answer(cited)
+        evidence_found = True
+        error_message = None
+
+    _log_event_nowait(
+        client_id=GLOBAL_SCOPE,
+        user_id=user.id,
+        endpoint="/api/chat/stream",
+        query_text=payload.query,
+        result_count=len(filtered),
+        evidence_found=evidence_found,
+        top_score=_top_score(raw_results),
+        status_code=200,
+        response_time_ms=elapsed_ms,
+        error_message=error_message,
+    )
 
     async def event_generator():
         yield _sse(
@@ -233,19 +458,11 @@ async def api_chat_stream(
                 "evidence_found": evidence_found,
                 "scope": GLOBAL_SCOPE,
                 "searched_clients": target_clients,
+                "retrieval": retrieval_stats,
             },
         )
-        for token in answer.split(" "):
-            yield _sse("token", {"token": token + " "})
-            await asyncio.sleep(0.02)
-        yield _sse(
-            "done",
-            {
-                "citations": citations,
-                "evidence_found": evidence_found,
-                "token_count": len(answer.split(" ")),
-            },
-        )
+        async for frames in _answer_events(answer, citations, evidence_found, payload.pace_ms):
+            yield frames
 
     return StreamingResponse(event_generator(), media_type="text/event-stream")
 
@@ -253,13 +470,25 @@ async def api_chat_stream(
 # ---------- Structured endpoints ----------
 
 
+def _structured_survivors(
+    payload: StructuredSearchRequest | StructuredChatRequest, raw: list[dict]
+) -> list[dict]:
+    # Only similarity-ranked structured searches are held to the threshold.
+    return _filter_results(raw) if payload.language else raw
+
+
 def _do_structured_search(
     payload: StructuredSearchRequest | StructuredChatRequest,
     top_k: int,
-) -> list[dict]:
-    """Run structured retrieval across all allowed clients."""
-    embedding = embed_text(payload.language) if payload.language else None
+) -> tuple[list[dict], list[dict], dict[str, Any]]:
+    """Run structured retrieval across all allowed clients.
+
+    Returns the candidate rows (ids and scores), the hydrated rows that
+    pass the threshold, and the retrieval metadata for the response.
+    """
+    embedding = embed_query(payload.language) if payload.language else None
     target_clients = settings.allowed_client_list
+    retrieval_stats: dict[str, Any] = {}
 
     with get_app_conn() as conn:
         raw = search_clusters_structured_across_clients(
@@ -269,44 +498,70 @@ def _do_structured_search(
             term=payload.term,
             attribute=payload.attribute,
             embedding=embedding,
+            stats=retrieval_stats,
+            light=True,
         )
+        filtered = hydrate_clusters(conn, _structured_survivors(payload, raw), target_clients)
         conn.commit()
-    return raw
+    retrieval_stats.update(candidates=len(raw), hydrated=len(filtered))
+    return raw, filtered, retrieval_stats
+
+
+async def _ado_structured_search(
+    payload: StructuredSearchRequest | StructuredChatRequest,
+    top_k: int,
+) -> tuple[list[dict], list[dict], dict[str, Any]]:
+    """Async counterpart of ``_do_structured_search`` for the streaming endpoint."""
+    embedding = await asyncio.to_thread(embed_query, payload.language) if payload.language else None
+    target_clients = settings.allowed_client_list
+    retrieval_stats: dict[str, Any] = {}
+
+    async with get_app_conn_async() as conn:
+        raw = await asearch_clusters_structured_across_clients(
+            conn,
+            target_clients,
+            top_k,
+            term=payload.term,
+            attribute=payload.attribute,
+            embedding=embedding,
+            stats=retrieval_stats,
+            light=True,
+        )
+        filtered = await ahydrate_clusters(conn, _structured_survivors(payload, raw), target_clients)
+        await conn.commit()
+    retrieval_stats.update(candidates=len(raw), hydrated=len(filtered))
+    return raw, filtered, retrieval_stats
 
 
 @app.post("/api/search/structured", response_model=SearchResponse)
 def api_search_structured(
     payload: StructuredSearchRequest,
     user: CurrentUser = Depends(get_current_user),
-) -> SearchResponse:
+) -> Response | SearchResponse:
     started = time.perf_counter()
     target_clients = user.allowed_clients or settings.allowed_client_list
-    raw_results = _do_structured_search(payload, payload.top_k)
-    filtered = _filter_results(raw_results) if payload.language else raw_results
+    raw_results, filtered, retrieval_stats = _do_structured_search(payload, payload.top_k)
     elapsed_ms = int((time.perf_counter() - started) * 1000)
 
     query_text = " | ".join(
         f for f in [payload.term, payload.attribute, payload.language] if f
     )
 
-    with get_app_conn() as conn:
-        _safe_log_event(
-            conn=conn,
-            client_id=GLOBAL_SCOPE,
-            user_id=user.id,
-            endpoint="/api/search/structured",
-            query_text=query_text,
-            result_count=len(filtered),
-            evidence_found=bool(filtered),
-            top_score=_top_score(raw_results),
-            status_code=200,
-            response_time_ms=elapsed_ms,
-            error_message=None,
-        )
-        conn.commit()
+    _log_event(
+        client_id=GLOBAL_SCOPE,
+        user_id=user.id,
+        endpoint="/api/search/structured",
+        query_text=query_text,
+        result_count=len(filtered),
+        evidence_found=bool(filtered),
+        top_score=_top_score(raw_results),
+        status_code=200,
+        response_time_ms=elapsed_ms,
+        error_message=None,
+    )
 
     if not filtered:
-        return SearchResponse(
+        return _search_response(
             query=query_text,
             scope=GLOBAL_SCOPE,
             threshold=settings.similarity_threshold,
@@ -314,9 +569,10 @@ def api_search_structured(
             note="No matching precedents found for the given criteria.",
             results=[],
             searched_clients=target_clients,
+            retrieval=retrieval_stats,
         )
 
-    return SearchResponse(
+    return _search_response(
         query=query_text,
         scope=GLOBAL_SCOPE,
         threshold=settings.similarity_threshold,
@@ -324,6 +580,7 @@ def api_search_structured(
         note=f"Structured search found {len(filtered)} precedent(s) across {len(target_clients)} bank streams.",
         results=filtered,
         searched_clients=target_clients,
+        retrieval=retrieval_stats,
     )
 
 
@@ -334,8 +591,7 @@ async def api_chat_structured_stream(
 ) -> StreamingResponse:
     started = time.perf_counter()
     target_clients = user.allowed_clients or settings.allowed_client_list
-    raw_results = _do_structured_search(payload, settings.default_top_k)
-    filtered = _filter_results(raw_results) if payload.language else raw_results
+    raw_results, filtered, retrieval_stats = await _ado_structured_search(payload, settings.default_top_k)
     elapsed_ms = int((time.perf_counter() - started) * 1000)
 
     query_text = " | ".join(
@@ -344,21 +600,39 @@ async def api_chat_structured_stream(
 
     evidence_found = bool(filtered)
 
-    with get_app_conn() as conn:
-        _safe_log_event(
-            conn=conn,
-            client_id=GLOBAL_SCOPE,
-            user_id=user.id,
-            endpoint="/api/chat/structured/stream",
-            query_text=query_text,
-            result_count=len(filtered),
-            evidence_found=evidence_found,
-            top_score=_top_score(raw_results),
-            status_code=200,
-            response_time_ms=elapsed_ms,
-            error_message=None if evidence_found else "insufficient_evidence",
+    _log_event_nowait(
+        client_id=GLOBAL_SCOPE,
+        user_id=user.id,
+        endpoint="/api/chat/structured/stream",
+        query_text=query_text,
+        result_count=len(filtered),
+        evidence_found=evidence_found,
+        top_score=_top_score(raw_results),
+        status_code=200,
+        response_time_ms=elapsed_ms,
+        error_message=None if evidence_found else "insufficient_evidence",
+    )
+
+    cache_key = None
+    cached_tokens = None
+    prompt = None
+    if settings.llm_enabled and evidence_found:
+        cache_key = response_cache_key(
+            filtered,
+            prompt_version=get_prompt_for_term(payload.term).version,
+            term=payload.term,
+            attribute=payload.attribute,
+            language=payload.language,
         )
-        conn.commit()
+        cached_tokens = response_cache.get(cache_key)
+        # A cached answer is replayed as-is; only a miss sends a prompt.
+        if cached_tokens is None:
+            prompt = build_chat_prompt(
+                filtered,
+                term=payload.term,
+                attribute=payload.attribute,
+                language=payload.language,
+            )
 
     async def event_generator():
         meta_payload = {
@@ -366,6 +640,9 @@ async def api_chat_structured_stream(
             "scope": GLOBAL_SCOPE,
             "searched_clients": target_clients,
             "llm_model": settings.ollama_model if settings.llm_enabled else None,
+            "retrieval": retrieval_stats,
+            "cached": cached_tokens is not None,
+            "prompt": prompt.meta() if prompt is not None else None,
         }
         yield _sse("meta", meta_payload)
 
@@ -374,45 +651,58 @@ async def api_chat_structured_stream(
             yield _sse("done", {"citations": [], "evidence_found": False, "token_count": 0})
             return
 
-        citations = [str(r["id"]) for r in filtered[:3]]
+        citations = [str(r["id"]) for r in filtered[:_ANSWER_CITATIONS]]
 
-        if settings.llm_enabled:
+        if cached_tokens is not None:
+            frames = [_sse("token", {"token": token}) for token in cached_tokens]
+            frames.append(
+                _sse("done", {"citations": citations, "evidence_found": True, "token_count": len(cached_tokens)})
+            )
+            for batch in _batched_frames(frames):
+                yield batch
+        elif settings.llm_enabled:
             try:
-                messages = build_chat_messages(
-                    filtered,
-                    term=payload.term,
-                    attribute=payload.attribute,
-                    language=payload.language,
-                )
+                # Identical concurrent requests share one generation; only the
+                # request that starts it waits for an admission slot.
+                subscription = llm_flights.join(cache_key)
+                if subscription is None:
+                    ticket = llm_admission.enqueue(user.id)
+                    handed_off = False
+                    try:
+                        async for position in ticket.wait():
+                            yield _sse("queue", {"position": position, "queued": llm_admission.queued})
+                        subscription = llm_flights.subscribe(
+                            cache_key,
+                            lambda: chat_completion_stream(prompt.messages),
+                            on_complete=lambda tokens: response_cache.put(cache_key, tokens),
+                            on_finish=ticket.release,
+                        )
+                        handed_off = subscription.leader
+                    finally:
+                        if not handed_off:
+                            ticket.release()
                 token_count = 0
-                async for token in chat_completion_stream(messages):
+                async for token in subscription:
                     yield _sse("token", {"token": token})
                     token_count += 1
                 yield _sse(
                     "done",
                     {"citations": citations, "evidence_found": True, "token_count": token_count},
                 )
+            except AdmissionRejected as exc:
+                logger.warning("LLM request shed (%s); serving template answer", exc.reason)
+                yield _sse("queue", {"shed": True, "reason": exc.reason})
+                async for event in _template_answer_events(filtered, payload.pace_ms):
+                    yield event
             except Exception as exc:
                 logger.exception("LLM streaming failed")
                 yield _sse("error", {"message": f"LLM error: {repr(exc)}"})
                 # Fall back to template answer
-                answer, citations = _build_answer(filtered)
-                for token in answer.split(" "):
-                    yield _sse("token", {"token": token + " "})
-                    await asyncio.sleep(0.02)
-                yield _sse(
-                    "done",
-                    {"citations": citations, "evidence_found": True, "token_count": len(answer.split(" "))},
-                )
+                async for event in _template_answer_events(filtered, payload.pace_ms):
+                    yield event
         else:
-            answer, citations = _build_answer(filtered)
-            for token in answer.split(" "):
-                yield _sse("token", {"token": token + " "})
-                await asyncio.sleep(0.02)
-            yield _sse(
-                "done",
-                {"citations": citations, "evidence_found": True, "token_count": len(answer.split(" "))},
-            )
+            async for event in _template_answer_events(filtered, payload.pace_ms):
+                yield event
 
     return StreamingResponse(event_generator(), media_type="text/event-stream")
 
@@ -6,8 +6,10 @@ unknown terms.
 """
 
 from dataclasses import dataclass, field
+from itertools import combinations
 
 from .config import settings
+from .language import LANGUAGE_INSTRUCTIONS, language_instruction_for
 
 _SHARED_RULES = (
     "Rules:\n"
@@ -45,7 +47,7 @@ _DEFAULT_USER_TEMPLATE = (
 )
 
 
-@dataclass
+@dataclass(frozen=True)
 class PromptTemplate:
     term: str                    # term key or "__default__"
     version: str
@@ -130,11 +132,40 @@ PROMPT_REGISTRY: dict[str, PromptTemplate] = {
 }
 
 
+_TERM_KEYS = {k.lower(): k for k in PROMPT_REGISTRY}
+
+
 def get_prompt_for_term(term: str | None) -> PromptTemplate:
     """Look up a term-specific prompt, falling back to default."""
     if term:
-        key_map = {k.lower(): k for k in PROMPT_REGISTRY}
-        matched = key_map.get(term.lower())
+        matched = _TERM_KEYS.get(term.lower())
         if matched:
             return PROMPT_REGISTRY[matched]
     return PROMPT_REGISTRY["__default__"]
+
+
+def _compile_system_prompts() -> dict[tuple[str, frozenset[str]], str]:
+    """Every (term, clause-language set) system prompt, built once at import.
+
+    Ollama reuses its KV cache for the longest unchanged prompt prefix, so a
+    given term must always produce byte-identical system text. Language
+    notes are appended in a fixed (sorted) order so each variant is stable.
+    """
+    languages = sorted(LANGUAGE_INSTRUCTIONS)
+    variants = [frozenset(c) for n in range(len(languages) + 1) for c in combinations(languages, n)]
+    compiled: dict[tuple[str, frozenset[str]], str] = {}
+    for key, template in PROMPT_REGISTRY.items():
+        for variant in variants:
+            note = language_instruction_for(variant)
+            compiled[(key, variant)] = (
+                f"{template.system_prompt}\n\nLanguage note: {note}" if note else template.system_prompt
+            )
+    return compiled
+
+
+_SYSTEM_PROMPTS = _compile_system_prompts()
+
+
+def get_system_prompt(template: PromptTemplate, languages: frozenset[str]) -> str:
+    """Precompiled system prompt for ``template`` and the clause languages present."""
+    return _SYSTEM_PROMPTS[(template.term, languages)]
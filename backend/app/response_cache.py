@@ -0,0 +1,67 @@
+"""Cache of finished LLM answers, replayed over SSE on an exact-input hit.
+
+An answer is reused only when everything that shaped it is identical: the
+prompt template version, the model and its sampling options, the ordered
+retrieved cluster ids with their ``last_updated`` stamps, and the search
+criteria. Entries referencing a cluster are dropped when the change feed
+reports that cluster as re-ingested.
+"""
+
+from typing import Any
+
+from .cache import LRUCache
+from .config import settings
+
+CacheKey = tuple
+
+
+def response_cache_key(
+    results: list[dict[str, Any]],
+    *,
+    prompt_version: str,
+    term: str | None,
+    attribute: str | None,
+    language: str | None,
+) -> CacheKey:
+    clusters = tuple(
+        (str(r["id"]), r["last_updated"].isoformat() if r.get("last_updated") else None)
+        for r in results
+    )
+    model = (settings.ollama_model, settings.llm_temperature, settings.llm_max_tokens)
+    # As typed: the prompt quotes the criteria verbatim, so a case variant is a different prompt.
+    criteria = (term or "", attribute or "", language or "")
+    return (prompt_version, model, clusters, criteria)
+
+
+def _cluster_ids(key: CacheKey) -> set[str]:
+    return {cluster_id for cluster_id, _ in key[2]}
+
+
+class ResponseCache:
+    """LRU of token lists keyed by ``response_cache_key``."""
+
+    def __init__(self, maxsize: int, ttl_seconds: float) -> None:
+        self._entries = LRUCache(maxsize, ttl_seconds)
+        self.invalidations = 0
+
+    def get(self, key: CacheKey) -> list[str] | None:
+        return self._entries.get(key)
+
+    def put(self, key: CacheKey, tokens: list[str]) -> None:
+        self._entries.put(key, tuple(tokens))
+
+    def invalidate_clusters(self, changed: list[dict]) -> int:
+        """Change-feed subscriber: drop answers citing any changed cluster."""
+        changed_ids = {row["id"] for row in changed}
+        dropped = self._entries.evict_where(lambda key, _: not changed_ids.isdisjoint(_cluster_ids(key)))
+        self.invalidations += dropped
+        return dropped
+
+    def stats(self) -> dict[str, Any]:
+        return {**self._entries.stats(), "invalidations": self.invalidations}
+
+
+response_cache = ResponseCache(
+    maxsize=settings.response_cache_size,
+    ttl_seconds=settings.response_cache_ttl_seconds,
+)
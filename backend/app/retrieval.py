@@ -1,128 +1,623 @@
+import asyncio
+import heapq
+import logging
+import re
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor, wait
+from itertools import islice
+
+import psycopg
+import psycopg_pool
 from psycopg.rows import dict_row
 
-from .embeddings import to_pgvector_literal
+from . import db
+from .config import settings
+from .db import get_app_conn, get_app_conn_async
+from .embeddings import to_pgvector
+from .vector_index import vector_index
 
+logger = logging.getLogger(__name__)
 
-def set_client_scope(conn, client_id: str) -> None:
-    with conn.cursor() as cur:
-        cur.execute("SELECT set_config('app.current_client', %s, true)", (client_id,))
-
-
-def search_clusters(conn, client_id: str, embedding: list[float], top_k: int) -> list[dict]:
-    set_client_scope(conn, client_id)
-    vector_literal = to_pgvector_literal(embedding)
-
-    query = """
-        SELECT
-            id,
-            client_id,
-            text_content,
-            codified_data,
-            query_history,
-            doc_count,
-            last_updated,
-            1 - (embedding <=> %(vector)s::vector) AS relevance_score
-        FROM clusters
-        WHERE client_id = %(client_id)s
-        ORDER BY embedding <=> %(vector)s::vector
-        LIMIT %(top_k)s
+_fanout_executor: ThreadPoolExecutor | None = None
+
+_SET_TIMEOUT_SQL = "SELECT set_config('statement_timeout', %s, true)"
+_SWAP_TIMEOUT_SQL = "SELECT current_setting('statement_timeout'), set_config('statement_timeout', %s, true)"
+
+
+# Candidate rows (``light=True``) carry only ids and scores; the heavy columns
+# are fetched afterwards by ``hydrate_clusters`` for the rows that survive the
+# similarity threshold.
+_CANDIDATE_COLUMNS = "id, client_id"
+_HYDRATE_COLUMNS = "id, client_id, text_content, codified_data, query_history, doc_count, last_updated"
+
+_HYDRATE_SQL = f"""
+    SELECT {_HYDRATE_COLUMNS}
+    FROM clusters
+    WHERE id = ANY(%(ids)s::uuid[])
+"""
+
+
+def _columns(light: bool) -> str:
+    return _CANDIDATE_COLUMNS if light else _HYDRATE_COLUMNS
+
+
+# HNSW caps ef_search at 1000.
+_MAX_EF_SEARCH = 1000
+
+
+def _ann_settings(top_k: int) -> list[tuple[str, str]]:
+    """Transaction-local HNSW knobs for a top-``top_k`` scan.
+
+    ``ef_search`` must be at least ``top_k`` or the scan cannot return k rows.
+    Iterative scans (pgvector >= 0.8) keep walking the graph when filters
+    (client, JSONB) reject candidates, up to ``hnsw_max_scan_tuples``.
     """
+    ann = [("hnsw.ef_search", str(min(max(settings.hnsw_ef_search, top_k), _MAX_EF_SEARCH)))]
+    if settings.hnsw_iterative_scan != "off" and db.pgvector_version >= (0, 8):
+        ann.append(("hnsw.iterative_scan", settings.hnsw_iterative_scan))
+        ann.append(("hnsw.max_scan_tuples", str(settings.hnsw_max_scan_tuples)))
+    return ann
 
-    with conn.cursor(row_factory=dict_row) as cur:
-        cur.execute(
-            query,
-            {
-                "vector": vector_literal,
-                "client_id": client_id,
-                "top_k": top_k,
-            },
-        )
-        return list(cur.fetchall())
 
+def _scope_statement(name: str, value: str, top_k: int | None) -> tuple[str, list[str]]:
+    """One ``set_config`` round trip for the RLS scope and, for ANN queries, the HNSW knobs."""
+    pairs = [(name, value), *(_ann_settings(top_k) if top_k is not None else [])]
+    sql = "SELECT " + ", ".join("set_config(%s, %s, true)" for _ in pairs)
+    return sql, [part for pair in pairs for part in pair]
 
-def search_clusters_across_clients(
-    conn,
-    client_ids: list[str],
-    embedding: list[float],
-    top_k: int,
-) -> list[dict]:
-    combined: list[dict] = []
-    for client_id in client_ids:
-        combined.extend(search_clusters(conn, client_id, embedding, top_k))
 
-    combined.sort(key=lambda row: float(row["relevance_score"]), reverse=True)
-    return combined[:top_k]
+def _min_score() -> float:
+    # Cosine similarity is never below -1, so this disables the floor.
+    return settings.similarity_threshold if settings.retrieval_score_floor else -1.0
 
 
-def search_clusters_structured(
-    conn,
+# The score floor is applied outside the index scan (a materialized CTE), as
+# pgvector recommends for iterative scans: a distance predicate inside the scan
+# cannot stop it early. The best row always survives so callers can still
+# report the top score of a search that found no evidence.
+def _floor_condition(source: str = "nearest") -> str:
+    return f"relevance_score >= %(min_score)s OR relevance_score = (SELECT max(relevance_score) FROM {source})"
+
+
+# ---------- Query builders (shared by the sync and async paths) ----------
+
+
+def _vector_query(client_id: str, embedding: list[float], top_k: int, light: bool = False) -> tuple[str, dict]:
+    query = f"""
+        WITH nearest AS MATERIALIZED (
+            SELECT
+                {_columns(light)},
+                1 - (embedding <=> %(vector)b) AS relevance_score
+            FROM clusters
+            WHERE client_id = %(client_id)s
+            ORDER BY embedding <=> %(vector)b
+            LIMIT %(top_k)s
+        )
+        SELECT * FROM nearest
+        WHERE {_floor_condition()}
+        ORDER BY relevance_score DESC
+    """
+    params = {"vector": to_pgvector(embedding), "client_id": client_id, "top_k": top_k, "min_score": _min_score()}
+    return query, params
+
+
+def _multi_vector_query(
+    client_ids: list[str], embedding: list[float], top_k: int, light: bool = False
+) -> tuple[str, dict]:
+    query = f"""
+        WITH nearest AS MATERIALIZED (
+            SELECT r.*, c.ord
+            FROM unnest(%(client_ids)s::text[]) WITH ORDINALITY AS c(client_id, ord)
+            CROSS JOIN LATERAL (
+                SELECT
+                    {_columns(light)},
+                    1 - (embedding <=> %(vector)b) AS relevance_score
+                FROM clusters
+                WHERE clusters.client_id = c.client_id
+                ORDER BY embedding <=> %(vector)b
+                LIMIT %(top_k)s
+            ) AS r
+        )
+        SELECT {_columns(light)}, relevance_score
+        FROM nearest
+        WHERE {_floor_condition()}
+        ORDER BY relevance_score DESC, ord
+        LIMIT %(top_k)s
+    """
+    params = {
+        "vector": to_pgvector(embedding),
+        "client_ids": list(client_ids),
+        "top_k": top_k,
+        "min_score": _min_score(),
+    }
+    return query, params
+
+
+def _structured_query(
     client_id: str,
     top_k: int,
-    term: str | None = None,
-    attribute: str | None = None,
-    embedding: list[float] | None = None,
-) -> list[dict]:
-    """Structured search combining JSONB filters with optional embedding similarity."""
-    set_client_scope(conn, client_id)
-
+    term: str | None,
+    attribute: str | None,
+    embedding: list[float] | None,
+    light: bool = False,
+) -> tuple[str, dict]:
     conditions = ["client_id = %(client_id)s"]
     params: dict = {"client_id": client_id, "top_k": top_k}
 
-    if term and attribute:
-        conditions.append(
-            "EXISTS (SELECT 1 FROM jsonb_object_keys(codified_data) AS k WHERE lower(k) = lower(%(term)s))"
-        )
-        conditions.append(
-            "EXISTS (SELECT 1 FROM jsonb_each(codified_data) AS kv"
-            " WHERE lower(kv.key) = lower(%(term)s)"
-            " AND EXISTS (SELECT 1 FROM jsonb_object_keys(kv.value) AS k2 WHERE lower(k2) = lower(%(attribute)s)))"
-        )
+    # Term / attribute keys are matched against cluster_terms (008_cluster_terms.sql),
+    # which holds them lowercased and indexed, instead of unpacking codified_data.
+    key_conditions = []
+    if term:
+        key_conditions.append("t.term_lc = lower(%(term)s)")
         params["term"] = term
+    if attribute:
+        key_conditions.append("t.attribute_lc = lower(%(attribute)s)")
         params["attribute"] = attribute
-    elif term:
+    if key_conditions:
         conditions.append(
-            "EXISTS (SELECT 1 FROM jsonb_object_keys(codified_data) AS k WHERE lower(k) = lower(%(term)s))"
+            "EXISTS (SELECT 1 FROM cluster_terms AS t"
+            " WHERE t.cluster_id = clusters.id AND t.client_id = %(client_id)s"
+            f" AND {' AND '.join(key_conditions)})"
         )
-        params["term"] = term
-    elif attribute:
-        conditions.append(
-            "EXISTS (SELECT 1 FROM jsonb_each(codified_data) AS kv"
-            " WHERE EXISTS (SELECT 1 FROM jsonb_object_keys(kv.value) AS k2 WHERE lower(k2) = lower(%(attribute)s)))"
-        )
-        params["attribute"] = attribute
 
     where_clause = " AND ".join(conditions)
 
     if embedding:
-        vector_literal = to_pgvector_literal(embedding)
-        params["vector"] = vector_literal
+        params["vector"] = to_pgvector(embedding)
+        params["min_score"] = _min_score()
         query = f"""
-            SELECT
-                id, client_id, text_content, codified_data,
-                query_history, doc_count, last_updated,
-                1 - (embedding <=> %(vector)s::vector) AS relevance_score
-            FROM clusters
-            WHERE {where_clause}
-            ORDER BY embedding <=> %(vector)s::vector
-            LIMIT %(top_k)s
+            WITH nearest AS MATERIALIZED (
+                SELECT
+                    {_columns(light)},
+                    1 - (embedding <=> %(vector)b) AS relevance_score
+                FROM clusters
+                WHERE {where_clause}
+                ORDER BY embedding <=> %(vector)b
+                LIMIT %(top_k)s
+            )
+            SELECT * FROM nearest
+            WHERE {_floor_condition()}
+            ORDER BY relevance_score DESC
         """
     else:
         query = f"""
             SELECT
-                id, client_id, text_content, codified_data,
-                query_history, doc_count, last_updated,
-                1.0 AS relevance_score
+                {_columns(light)},
+                1.0::float8 AS relevance_score
             FROM clusters
             WHERE {where_clause}
             ORDER BY last_updated DESC NULLS LAST
             LIMIT %(top_k)s
         """
+    return query, params
+
+
+_WEB_QUERY_TOKEN = re.compile(r'(-?)"([^"]*)"?|(-?)(\S+)')
+
+
+def _web_query_parts(query_text: str) -> dict[str, object]:
+    """Split search text into plain words, quoted phrases and ``-`` exclusions.
+
+    Same surface syntax as ``websearch_to_tsquery``, except that the kept
+    words are OR-ed rather than AND-ed, so ``or`` is dropped as a keyword.
+    """
+    words: list[str] = []
+    phrases: list[str] = []
+    excluded_words: list[str] = []
+    excluded_phrases: list[str] = []
+    for match in _WEB_QUERY_TOKEN.finditer(query_text):
+        phrase_negated, phrase, word_negated, word = match.groups()
+        if phrase is not None:
+            (excluded_phrases if phrase_negated else phrases).append(phrase)
+        elif word_negated:
+            excluded_words.append(word)
+        elif word.lower() != "or":
+            words.append(word)
+    return {
+        "lexical_words": " ".join(words),
+        "lexical_phrases": phrases,
+        "excluded_words": " ".join(excluded_words),
+        "excluded_phrases": excluded_phrases,
+    }
+
+
+# A tsvector lexeme quoted as a tsquery operand, so it is matched as-is
+# instead of being parsed and normalized again.
+_LEXEME_TSQUERY = "('''' || replace(replace(lexeme, '\\', '\\\\'), '''', '''''') || '''')::tsquery"
+
+
+def _hybrid_query(
+    client_ids: list[str], embedding: list[float], query_text: str, top_k: int, light: bool = False
+) -> tuple[str, dict]:
+    """Vector and full-text legs fused with reciprocal rank fusion, in one statement.
+
+    The full-text query OR-s the lexemes of the user's words under every
+    configuration in ``HYBRID_TS_CONFIGS``, so a French clause matches on
+    French stems and an English one on English stems. Quoted phrases stay
+    phrase queries and ``-`` terms exclude the rows that contain them.
+    ``relevance_score`` stays the cosine similarity (the evidence threshold
+    applies to it); rows are ordered by ``fusion_score``. Rows the full-text
+    leg found carry ``lexical_match`` and are kept below the similarity floor,
+    which only drops rows the vector leg found alone.
+    """
+    query = f"""
+        WITH lexical_terms AS (
+            SELECT DISTINCT term.positive, term.tsq
+            FROM unnest(%(ts_configs)s::regconfig[]) AS cfg,
+                LATERAL (
+                    SELECT words.positive, {_LEXEME_TSQUERY}
+                    FROM (VALUES (true, %(lexical_words)s), (false, %(excluded_words)s)) AS words (positive, body),
+                        unnest(tsvector_to_array(to_tsvector(cfg, words.body))) AS lexeme
+                    UNION ALL
+                    SELECT phrases.positive, phraseto_tsquery(cfg, phrases.body)
+                    FROM (
+                        SELECT true, unnest(%(lexical_phrases)s::text[])
+                        UNION ALL
+                        SELECT false, unnest(%(excluded_phrases)s::text[])
+                    ) AS phrases (positive, body)
+                ) AS term (positive, tsq)
+            WHERE numnode(term.tsq) > 0
+        ),
+        lexical_query AS (
+            -- Exclusions are AND-NOT-ed onto the OR of the wanted terms; a
+            -- query with nothing but exclusions has no lexical leg.
+            SELECT CASE WHEN excluded IS NULL THEN wanted ELSE wanted && !! excluded END AS tsq
+            FROM (
+                SELECT string_agg('(' || tsq::text || ')', ' | ') FILTER (WHERE positive)::tsquery AS wanted,
+                    string_agg('(' || tsq::text || ')', ' | ') FILTER (WHERE NOT positive)::tsquery AS excluded
+                FROM lexical_terms
+            ) AS parts
+        ),
+        vector_leg AS MATERIALIZED (
+            SELECT id, row_number() OVER (ORDER BY distance) AS leg_rank
+            FROM (
+                SELECT id, embedding <=> %(vector)b AS distance
+                FROM clusters
+                WHERE client_id = ANY(%(client_ids)s::text[])
+                ORDER BY embedding <=> %(vector)b
+                LIMIT %(leg_k)s
+            ) AS v
+        ),
+        lexical_leg AS MATERIALIZED (
+            SELECT id, row_number() OVER (ORDER BY lexical_score DESC, id) AS leg_rank
+            FROM (
+                SELECT id, ts_rank_cd(search_tsv, lq.tsq) AS lexical_score
+                FROM clusters, lexical_query AS lq
+                WHERE client_id = ANY(%(client_ids)s::text[]) AND search_tsv @@ lq.tsq
+                ORDER BY lexical_score DESC
+                LIMIT %(leg_k)s
+            ) AS l
+        ),
+        fused AS (
+            SELECT id, sum(1.0 / (%(rrf_k)s + leg_rank))::float8 AS fusion_score, bool_or(lexical) AS lexical
+            FROM (
+                SELECT *, false AS lexical FROM vector_leg
+                UNION ALL
+                SELECT *, true FROM lexical_leg
+            ) AS legs
+            GROUP BY id
+        ),
+        scored AS MATERIALIZED (
+            SELECT {", ".join(f"c.{col}" for col in _columns(light).split(", "))},
+                1 - (c.embedding <=> %(vector)b) AS relevance_score,
+                f.fusion_score,
+                f.lexical AS lexical_match
+            FROM fused AS f
+            JOIN clusters AS c ON c.id = f.id
+        )
+        SELECT {_columns(light)}, relevance_score, fusion_score, lexical_match
+        FROM scored
+        WHERE lexical_match OR {_floor_condition("scored")}
+        ORDER BY fusion_score DESC, relevance_score DESC
+        LIMIT %(top_k)s
+    """
+    params = {
+        "vector": to_pgvector(embedding),
+        **_web_query_parts(query_text),
+        "ts_configs": settings.hybrid_ts_config_list,
+        "client_ids": list(client_ids),
+        "leg_k": max(settings.hybrid_leg_k, top_k),
+        "rrf_k": settings.hybrid_rrf_k,
+        "top_k": top_k,
+        "min_score": _min_score(),
+    }
+    return query, params
 
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def _merge_partials(partials: list[list[dict]], top_k: int) -> list[dict]:
+    """k-way merge of per-client lists that are already sorted by score."""
+    merged = heapq.merge(*partials, key=lambda row: -float(row["relevance_score"]))
+    return list(islice(merged, top_k))
+
+
+def _merge_hydrated(candidates: list[dict], rows: list[dict]) -> list[dict]:
+    """Attach hydrated columns to candidates, keeping candidate order and scores.
+
+    Hydrated columns win over the candidate's (a replica may hold a stale
+    ``client_id``); only the scores come from the candidate.
+    """
+    by_id = {row["id"]: row for row in rows}
+    return [{**c, **by_id[c["id"]]} for c in candidates if c["id"] in by_id]
+
+
+def _vector_retrieval_mode() -> str:
+    # Until the in-memory replica has loaded, memory mode is served by Postgres.
+    if settings.retrieval_mode == "memory" and not vector_index.loaded:
+        return "lateral"
+    return settings.retrieval_mode
+
+
+def _search_memory(client_ids: list[str], embedding: list[float], top_k: int, stats: dict | None) -> list[dict]:
+    started = time.perf_counter()
+    rows = vector_index.search(client_ids, embedding, top_k, _min_score())
+    if stats is not None:
+        stats.update(mode="memory", fanout_width=1, elapsed_ms=_elapsed_ms(started))
+    return rows
+
+
+def _merge_unsorted(combined: list[dict], top_k: int) -> list[dict]:
+    combined.sort(key=lambda row: float(row["relevance_score"]), reverse=True)
+    return combined[:top_k]
+
+
+# ---------- Sync path ----------
+
+
+def set_client_scope(conn, client_id: str, top_k: int | None = None) -> None:
+    """Scope the transaction to one client; pass ``top_k`` before an ANN query."""
+    with conn.cursor() as cur:
+        cur.execute(*_scope_statement("app.current_client", client_id, top_k))
+
+
+def set_client_scopes(conn, client_ids: list[str], top_k: int | None = None) -> None:
+    """Scope the transaction to several clients at once (see 004_multi_client_scope.sql)."""
+    with conn.cursor() as cur:
+        cur.execute(*_scope_statement("app.current_clients", ",".join(client_ids), top_k))
+
+
+def _fetch_dicts(conn, query: str, params: dict) -> list[dict]:
     with conn.cursor(row_factory=dict_row) as cur:
         cur.execute(query, params)
         return list(cur.fetchall())
 
 
+def search_clusters(
+    conn, client_id: str, embedding: list[float], top_k: int, light: bool = False
+) -> list[dict]:
+    set_client_scope(conn, client_id, top_k)
+    return _fetch_dicts(conn, *_vector_query(client_id, embedding, top_k, light))
+
+
+def search_clusters_multi(
+    conn, client_ids: list[str], embedding: list[float], top_k: int, light: bool = False
+) -> list[dict]:
+    """Top-k per client for all clients in one statement, merged in SQL.
+
+    Each client gets its own LATERAL index scan, so results match the
+    per-client loop while costing a single round trip.
+    """
+    if not client_ids:
+        return []
+    set_client_scopes(conn, client_ids, top_k)
+    return _fetch_dicts(conn, *_multi_vector_query(client_ids, embedding, top_k, light))
+
+
+def search_clusters_structured(
+    conn,
+    client_id: str,
+    top_k: int,
+    term: str | None = None,
+    attribute: str | None = None,
+    embedding: list[float] | None = None,
+    light: bool = False,
+) -> list[dict]:
+    """Structured search combining JSONB filters with optional embedding similarity."""
+    set_client_scope(conn, client_id, top_k if embedding else None)
+    return _fetch_dicts(conn, *_structured_query(client_id, top_k, term, attribute, embedding, light))
+
+
+def _get_fanout_executor() -> ThreadPoolExecutor:
+    global _fanout_executor
+    if _fanout_executor is None:
+        _fanout_executor = ThreadPoolExecutor(
+            max_workers=settings.retrieval_fanout_workers,
+            thread_name_prefix="retrieval-fanout",
+        )
+    return _fanout_executor
+
+
+def _remaining_ms(started: float, deadline_ms: int) -> int:
+    return max(0, deadline_ms - int(_elapsed_ms(started)))
+
+
+def _report_fanout(
+    stats: dict | None,
+    client_ids: list[str],
+    started: float,
+    timings: dict[str, float],
+    timed_out: list[str],
+    failed: list[str],
+) -> None:
+    deadline_ms = settings.retrieval_deadline_ms
+    if timed_out:
+        logger.warning("Retrieval deadline of %sms exceeded for clients: %s", deadline_ms, timed_out)
+    if stats is not None:
+        # The first client runs on the caller's connection, beside up to
+        # RETRIEVAL_FANOUT_WORKERS pooled ones.
+        pooled = min(len(client_ids) - 1, settings.retrieval_fanout_workers)
+        stats.update(
+            mode="fanout",
+            fanout_width=1 + pooled if client_ids else 0,
+            elapsed_ms=_elapsed_ms(started),
+            client_timings_ms=timings,
+            timed_out_clients=timed_out,
+            failed_clients=failed,
+        )
+
+
+def _search_on_caller_conn(conn, client_id: str, search_one: Callable[..., list[dict]], timeout_ms: int) -> list[dict]:
+    # A savepoint keeps a cancelled statement from aborting the caller's transaction,
+    # which still hydrates the merged rows afterwards.
+    with conn.transaction():
+        with conn.cursor() as cur:
+            cur.execute(_SWAP_TIMEOUT_SQL, (f"{timeout_ms}ms",))
+            previous = cur.fetchone()[0]
+        rows = search_one(conn, client_id)
+        with conn.cursor() as cur:
+            cur.execute(_SET_TIMEOUT_SQL, (previous,))
+    return rows
+
+
+def fan_out_clients(
+    conn,
+    client_ids: list[str],
+    search_one: Callable[..., list[dict]],
+    top_k: int,
+    stats: dict | None = None,
+) -> list[dict]:
+    """Run ``search_one(conn, client_id)`` per client, in parallel.
+
+    The first client runs on the caller's connection; the others each check
+    out a pooled connection, waiting no longer than what is left of the
+    per-request deadline. Clients that miss the deadline are dropped from the
+    merge and reported in ``stats``; their running statements are cancelled.
+    Clients whose search fails (including a pool timeout) are dropped and
+    reported the same way. Partial lists are already sorted by score, so they
+    are combined with a k-way heap merge.
+    """
+    deadline_ms = settings.retrieval_deadline_ms
+    started = time.perf_counter()
+    active: dict[str, object] = {}
+    active_lock = threading.Lock()
+
+    def run(client_id: str) -> tuple[list[dict], float]:
+        client_started = time.perf_counter()
+        remaining_ms = _remaining_ms(started, deadline_ms)
+        if remaining_ms <= 0:
+            raise TimeoutError(f"no time left for {client_id}")
+        with get_app_conn(timeout=remaining_ms / 1000) as worker_conn:
+            with active_lock:
+                active[client_id] = worker_conn
+            try:
+                with worker_conn.cursor() as cur:
+                    cur.execute(_SET_TIMEOUT_SQL, (f"{_remaining_ms(started, deadline_ms)}ms",))
+                rows = search_one(worker_conn, client_id)
+                worker_conn.commit()
+            finally:
+                with active_lock:
+                    active.pop(client_id, None)
+        return rows, _elapsed_ms(client_started)
+
+    own, others = client_ids[0] if client_ids else None, client_ids[1:]
+    executor = _get_fanout_executor()
+    futures = {client_id: executor.submit(run, client_id) for client_id in others}
+
+    partials: list[list[dict]] = []
+    timings: dict[str, float] = {}
+    timed_out: list[str] = []
+    failed: list[str] = []
+    if own is not None:
+        own_started = time.perf_counter()
+        try:
+            partials.append(_search_on_caller_conn(conn, own, search_one, deadline_ms))
+            timings[own] = _elapsed_ms(own_started)
+        except psycopg.errors.QueryCanceled:
+            timed_out.append(own)
+        except Exception:
+            logger.exception("Retrieval failed for client %s", own)
+            failed.append(own)
+
+    _, pending = wait(futures.values(), timeout=_remaining_ms(started, deadline_ms) / 1000)
+    for client_id, future in futures.items():
+        if future in pending:
+            if not future.cancel():
+                # Already running: stop its statement so the worker and connection come back.
+                with active_lock:
+                    running = active.get(client_id)
+                    if running is not None:
+                        running.cancel()
+            timed_out.append(client_id)
+            continue
+        try:
+            rows, elapsed = future.result()
+        except (TimeoutError, psycopg_pool.PoolTimeout, psycopg.errors.QueryCanceled):
+            timed_out.append(client_id)
+            continue
+        except Exception:
+            logger.exception("Retrieval failed for client %s", client_id)
+            failed.append(client_id)
+            continue
+        partials.append(rows)
+        timings[client_id] = elapsed
+
+    _report_fanout(stats, client_ids, started, timings, timed_out, failed)
+    return _merge_partials(partials, top_k)
+
+
+def _search_serially(
+    conn,
+    client_ids: list[str],
+    search_one: Callable[..., list[dict]],
+    top_k: int,
+    stats: dict | None = None,
+) -> list[dict]:
+    started = time.perf_counter()
+    combined: list[dict] = []
+    timings: dict[str, float] = {}
+    for client_id in client_ids:
+        client_started = time.perf_counter()
+        combined.extend(search_one(conn, client_id))
+        timings[client_id] = _elapsed_ms(client_started)
+
+    if stats is not None:
+        stats.update(
+            mode="per_client",
+            fanout_width=1,
+            elapsed_ms=_elapsed_ms(started),
+            client_timings_ms=timings,
+        )
+
+    return _merge_unsorted(combined, top_k)
+
+
+def search_clusters_across_clients(
+    conn,
+    client_ids: list[str],
+    embedding: list[float],
+    top_k: int,
+    stats: dict | None = None,
+    light: bool = False,
+) -> list[dict]:
+    """Top-k across clients using ``settings.retrieval_mode``.
+
+    When ``stats`` is given it is filled with retrieval metadata
+    (mode, fan-out width and timings) for the response. With ``light``
+    only ids and scores are returned; see ``hydrate_clusters``.
+    """
+    def search_one(client_conn, client_id: str) -> list[dict]:
+        return search_clusters(client_conn, client_id, embedding, top_k, light)
+
+    mode = _vector_retrieval_mode()
+    if mode == "memory":
+        rows = _search_memory(client_ids, embedding, top_k, stats)
+        return rows if light else hydrate_clusters(conn, rows, client_ids)
+    if mode == "fanout":
+        return fan_out_clients(conn, client_ids, search_one, top_k, stats)
+    if mode == "lateral":
+        started = time.perf_counter()
+        rows = search_clusters_multi(conn, client_ids, embedding, top_k, light)
+        if stats is not None:
+            stats.update(mode="lateral", fanout_width=1, elapsed_ms=_elapsed_ms(started))
+        return rows
+    return _search_serially(conn, client_ids, search_one, top_k, stats)
+
+
 def search_clusters_structured_across_clients(
     conn,
     client_ids: list[str],
@@ -130,12 +625,249 @@ def search_clusters_structured_across_clients(
     term: str | None = None,
     attribute: str | None = None,
     embedding: list[float] | None = None,
+    stats: dict | None = None,
+    light: bool = False,
 ) -> list[dict]:
+    def search_one(client_conn, client_id: str) -> list[dict]:
+        return search_clusters_structured(client_conn, client_id, top_k, term, attribute, embedding, light)
+
+    if settings.retrieval_mode == "fanout":
+        return fan_out_clients(conn, client_ids, search_one, top_k, stats)
+    return _search_serially(conn, client_ids, search_one, top_k, stats)
+
+
+def search_clusters_hybrid(
+    conn,
+    client_ids: list[str],
+    embedding: list[float],
+    query_text: str,
+    top_k: int,
+    stats: dict | None = None,
+    light: bool = False,
+) -> list[dict]:
+    """Hybrid lexical + vector top-k across clients (see ``_hybrid_query``)."""
+    started = time.perf_counter()
+    rows: list[dict] = []
+    if client_ids:
+        set_client_scopes(conn, client_ids, max(settings.hybrid_leg_k, top_k))
+        rows = _fetch_dicts(conn, *_hybrid_query(client_ids, embedding, query_text, top_k, light))
+    if stats is not None:
+        stats.update(mode="hybrid", fanout_width=1, elapsed_ms=_elapsed_ms(started))
+    return rows
+
+
+def hydrate_clusters(conn, candidates: list[dict], client_ids: list[str]) -> list[dict]:
+    """Fetch the heavy columns for ``candidates`` (light rows) in one query."""
+    if not candidates:
+        return []
+    set_client_scopes(conn, client_ids)
+    rows = _fetch_dicts(conn, _HYDRATE_SQL, {"ids": [c["id"] for c in candidates]})
+    return _merge_hydrated(candidates, rows)
+
+
+# ---------- Async path (psycopg AsyncConnection) ----------
+
+
+async def aset_client_scope(conn, client_id: str, top_k: int | None = None) -> None:
+    async with conn.cursor() as cur:
+        await cur.execute(*_scope_statement("app.current_client", client_id, top_k))
+
+
+async def aset_client_scopes(conn, client_ids: list[str], top_k: int | None = None) -> None:
+    async with conn.cursor() as cur:
+        await cur.execute(*_scope_statement("app.current_clients", ",".join(client_ids), top_k))
+
+
+async def _afetch_dicts(conn, query: str, params: dict) -> list[dict]:
+    async with conn.cursor(row_factory=dict_row) as cur:
+        await cur.execute(query, params)
+        return list(await cur.fetchall())
+
+
+async def asearch_clusters(
+    conn, client_id: str, embedding: list[float], top_k: int, light: bool = False
+) -> list[dict]:
+    await aset_client_scope(conn, client_id, top_k)
+    return await _afetch_dicts(conn, *_vector_query(client_id, embedding, top_k, light))
+
+
+async def asearch_clusters_multi(
+    conn, client_ids: list[str], embedding: list[float], top_k: int, light: bool = False
+) -> list[dict]:
+    if not client_ids:
+        return []
+    await aset_client_scopes(conn, client_ids, top_k)
+    return await _afetch_dicts(conn, *_multi_vector_query(client_ids, embedding, top_k, light))
+
+
+async def asearch_clusters_structured(
+    conn,
+    client_id: str,
+    top_k: int,
+    term: str | None = None,
+    attribute: str | None = None,
+    embedding: list[float] | None = None,
+    light: bool = False,
+) -> list[dict]:
+    await aset_client_scope(conn, client_id, top_k if embedding else None)
+    return await _afetch_dicts(conn, *_structured_query(client_id, top_k, term, attribute, embedding, light))
+
+
+async def _asearch_on_caller_conn(
+    conn, client_id: str, search_one: Callable[..., Awaitable[list[dict]]], timeout_ms: int
+) -> list[dict]:
+    async with conn.transaction():
+        async with conn.cursor() as cur:
+            await cur.execute(_SWAP_TIMEOUT_SQL, (f"{timeout_ms}ms",))
+            previous = (await cur.fetchone())[0]
+        rows = await search_one(conn, client_id)
+        async with conn.cursor() as cur:
+            await cur.execute(_SET_TIMEOUT_SQL, (previous,))
+    return rows
+
+
+async def afan_out_clients(
+    conn,
+    client_ids: list[str],
+    search_one: Callable[..., Awaitable[list[dict]]],
+    top_k: int,
+    stats: dict | None = None,
+) -> list[dict]:
+    """Async counterpart of ``fan_out_clients`` using the async pool."""
+    deadline_ms = settings.retrieval_deadline_ms
+    started = time.perf_counter()
+    limiter = asyncio.Semaphore(settings.retrieval_fanout_workers)
+
+    async def run(client_id: str) -> tuple[list[dict], float]:
+        async with limiter:
+            client_started = time.perf_counter()
+            remaining_ms = _remaining_ms(started, deadline_ms)
+            if remaining_ms <= 0:
+                raise TimeoutError(f"no time left for {client_id}")
+            async with get_app_conn_async(timeout=remaining_ms / 1000) as worker_conn:
+                async with worker_conn.cursor() as cur:
+                    await cur.execute(_SET_TIMEOUT_SQL, (f"{_remaining_ms(started, deadline_ms)}ms",))
+                rows = await search_one(worker_conn, client_id)
+                await worker_conn.commit()
+            return rows, _elapsed_ms(client_started)
+
+    async def run_own(client_id: str) -> tuple[list[dict], float]:
+        client_started = time.perf_counter()
+        rows = await _asearch_on_caller_conn(conn, client_id, search_one, deadline_ms)
+        return rows, _elapsed_ms(client_started)
+
+    own, others = client_ids[0] if client_ids else None, client_ids[1:]
+    tasks = {client_id: asyncio.create_task(run(client_id)) for client_id in others}
+    if own is not None:
+        tasks[own] = asyncio.create_task(run_own(own))
+    _, pending = await asyncio.wait(tasks.values(), timeout=deadline_ms / 1000)
+    if own is not None and tasks[own] in pending:
+        # Never cancel mid-statement on the caller's connection; statement_timeout ends it.
+        await asyncio.wait([tasks[own]])
+        pending.discard(tasks[own])
+
+    partials: list[list[dict]] = []
+    timings: dict[str, float] = {}
+    timed_out: list[str] = []
+    failed: list[str] = []
+    for client_id in client_ids:
+        task = tasks[client_id]
+        if task in pending:
+            task.cancel()
+            timed_out.append(client_id)
+            continue
+        try:
+            rows, elapsed = task.result()
+        except (TimeoutError, psycopg_pool.PoolTimeout, psycopg.errors.QueryCanceled):
+            timed_out.append(client_id)
+            continue
+        except Exception:
+            logger.exception("Retrieval failed for client %s", client_id)
+            failed.append(client_id)
+            continue
+        partials.append(rows)
+        timings[client_id] = elapsed
+
+    _report_fanout(stats, client_ids, started, timings, timed_out, failed)
+    return _merge_partials(partials, top_k)
+
+
+async def _asearch_serially(
+    conn,
+    client_ids: list[str],
+    search_one: Callable[..., Awaitable[list[dict]]],
+    top_k: int,
+    stats: dict | None = None,
+) -> list[dict]:
+    started = time.perf_counter()
     combined: list[dict] = []
+    timings: dict[str, float] = {}
     for client_id in client_ids:
-        combined.extend(
-            search_clusters_structured(conn, client_id, top_k, term, attribute, embedding)
+        client_started = time.perf_counter()
+        combined.extend(await search_one(conn, client_id))
+        timings[client_id] = _elapsed_ms(client_started)
+
+    if stats is not None:
+        stats.update(
+            mode="per_client",
+            fanout_width=1,
+            elapsed_ms=_elapsed_ms(started),
+            client_timings_ms=timings,
         )
 
-    combined.sort(key=lambda row: float(row["relevance_score"]), reverse=True)
-    return combined[:top_k]
+    return _merge_unsorted(combined, top_k)
+
+
+async def asearch_clusters_across_clients(
+    conn,
+    client_ids: list[str],
+    embedding: list[float],
+    top_k: int,
+    stats: dict | None = None,
+    light: bool = False,
+) -> list[dict]:
+    async def search_one(client_conn, client_id: str) -> list[dict]:
+        return await asearch_clusters(client_conn, client_id, embedding, top_k, light)
+
+    mode = _vector_retrieval_mode()
+    if mode == "memory":
+        # The scan is CPU-bound and grows with bank size; keep it off the event loop.
+        rows = await asyncio.to_thread(_search_memory, client_ids, embedding, top_k, stats)
+        return rows if light else await ahydrate_clusters(conn, rows, client_ids)
+    if mode == "fanout":
+        return await afan_out_clients(conn, client_ids, search_one, top_k, stats)
+    if mode == "lateral":
+        started = time.perf_counter()
+        rows = await asearch_clusters_multi(conn, client_ids, embedding, top_k, light)
+        if stats is not None:
+            stats.update(mode="lateral", fanout_width=1, elapsed_ms=_elapsed_ms(started))
+        return rows
+    return await _asearch_serially(conn, client_ids, search_one, top_k, stats)
+
+
+async def asearch_clusters_structured_across_clients(
+    conn,
+    client_ids: list[str],
+    top_k: int,
+    term: str | None = None,
+    attribute: str | None = None,
+    embedding: list[float] | None = None,
+    stats: dict | None = None,
+    light: bool = False,
+) -> list[dict]:
+    async def search_one(client_conn, client_id: str) -> list[dict]:
+        return await asearch_clusters_structured(
+            client_conn, client_id, top_k, term, attribute, embedding, light
+        )
+
+    if settings.retrieval_mode == "fanout":
+        return await afan_out_clients(conn, client_ids, search_one, top_k, stats)
+    return await _asearch_serially(conn, client_ids, search_one, top_k, stats)
+
+
+async def ahydrate_clusters(conn, candidates: list[dict], client_ids: list[str]) -> list[dict]:
+    if not candidates:
+        return []
+    await aset_client_scopes(conn, client_ids)
+    rows = await _afetch_dicts(conn, _HYDRATE_SQL, {"ids": [c["id"] for c in candidates]})
+    return _merge_hydrated(candidates, rows)
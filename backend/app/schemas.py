@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Any
+from typing import Any, Literal
 from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict, Field, model_validator
@@ -10,6 +10,9 @@ class SearchRequest(BaseModel):
 
     query: str = Field(min_length=2)
     top_k: int = Field(default=5, ge=1, le=20)
+    mode: Literal["vector", "hybrid"] = Field(
+        default="vector", description="'hybrid' fuses full-text and vector rankings (reciprocal rank fusion)"
+    )
 
 
 class ClusterResult(BaseModel):
@@ -21,6 +24,19 @@ class ClusterResult(BaseModel):
     doc_count: int | None
     last_updated: datetime | None
     relevance_score: float
+    fusion_score: float | None = None
+    lexical_match: bool | None = None
+
+
+class RetrievalMeta(BaseModel):
+    mode: str
+    fanout_width: int = 1
+    elapsed_ms: float | None = None
+    client_timings_ms: dict[str, float] = Field(default_factory=dict)
+    timed_out_clients: list[str] = Field(default_factory=list)
+    failed_clients: list[str] = Field(default_factory=list)
+    candidates: int | None = None
+    hydrated: int | None = None
 
 
 class SearchResponse(BaseModel):
@@ -31,12 +47,14 @@ class SearchResponse(BaseModel):
     note: str
     results: list[ClusterResult]
     searched_clients: list[str] = Field(default_factory=list)
+    retrieval: RetrievalMeta | None = None
 
 
 class ChatRequest(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
     query: str = Field(min_length=2)
+    pace_ms: int | None = Field(default=None, ge=0, le=1000, description="Delay between template answer chunks")
 
 
 class ChatResponse(BaseModel):
@@ -66,9 +84,40 @@ class StructuredChatRequest(BaseModel):
     term: str | None = Field(default=None, description="Top-level codified_data key")
     attribute: str | None = Field(default=None, description="Nested key within term")
     language: str | None = Field(default=None, min_length=2, description="Free-text for embedding search")
+    pace_ms: int | None = Field(default=None, ge=0, le=1000, description="Delay between template answer chunks")
 
     @model_validator(mode="after")
     def at_least_one_field(self):
         if not self.term and not self.attribute and not self.language:
             raise ValueError("At least one of term, attribute, or language is required")
         return self
+
+
+class CatalogValue(BaseModel):
+    value: str
+    key: str
+    clusters: int
+    by_client: dict[str, int]
+
+
+class CatalogAttribute(BaseModel):
+    attribute: str
+    key: str
+    clusters: int
+    by_client: dict[str, int]
+    values: list[CatalogValue] = Field(default_factory=list)
+
+
+class CatalogTerm(BaseModel):
+    term: str
+    key: str
+    clusters: int
+    by_client: dict[str, int]
+    attributes: list[CatalogAttribute]
+    values: list[CatalogValue] = Field(default_factory=list, description="Values of terms without attributes")
+
+
+class CatalogResponse(BaseModel):
+    clients: list[str]
+    terms: list[CatalogTerm]
+    loaded_at: datetime | None = None
@@ -0,0 +1,55 @@
+"""JSON encoding for API responses and SSE frames.
+
+Uses orjson when it is installed and falls back to the stdlib otherwise.
+Both paths emit the same JSON shape as pydantic for the types we return
+(UUIDs as strings, UTC datetimes with a ``Z`` suffix).
+"""
+
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+HAS_ORJSON = orjson is not None
+
+_ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS).decode("utf-8")
+    return json.dumps(obj, default=_default)
+
+
+class FastJSONResponse(Response):
+    """JSON response for payloads that are already JSON-shaped (no validation)."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
@@ -0,0 +1,165 @@
+"""Single-flight coalescing for identical in-flight LLM generations.
+
+The first request for a key starts the generation as a background task;
+concurrent requests for the same key subscribe to it instead of starting
+their own. Every subscriber replays the tokens emitted so far, then follows
+the live stream, so late joiners see the whole answer.
+"""
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Callable, Hashable
+from typing import Any
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.tokens: list[str] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self.subscribers = 0
+        self.task: asyncio.Task | None = None
+        self._changed = asyncio.Condition()
+
+    async def publish(self, token: str) -> None:
+        async with self._changed:
+            self.tokens.append(token)
+            self._changed.notify_all()
+
+    async def finish(self, error: BaseException | None = None) -> None:
+        async with self._changed:
+            self.done = True
+            self.error = error
+            self._changed.notify_all()
+
+    async def follow(self) -> AsyncIterator[str]:
+        sent = 0
+        while True:
+            async with self._changed:
+                while len(self.tokens) == sent and not self.done:
+                    await self._changed.wait()
+                pending = self.tokens[sent:]
+                done, error = self.done, self.error
+            for token in pending:
+                yield token
+            sent += len(pending)
+            if done and sent == len(self.tokens):
+                if error is not None:
+                    raise error
+                return
+
+
+class Subscription:
+    """Async iterator over a shared generation; ``leader`` is False for joiners."""
+
+    def __init__(self, group: "SingleFlight", key: Hashable, flight: _Flight, leader: bool) -> None:
+        self._group = group
+        self._key = key
+        self._flight = flight
+        self.leader = leader
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        try:
+            async for token in self._flight.follow():
+                yield token
+        finally:
+            self._group._release(self._key, self._flight)
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._flights: dict[Hashable, _Flight] = {}
+        self.leaders = 0
+        self.joined = 0
+        self.late_joined = 0
+        self.abandoned = 0
+
+    def join(self, key: Hashable) -> Subscription | None:
+        """Subscribe to the in-flight generation for ``key``, if there is one."""
+        flight = self._flights.get(key)
+        if flight is None:
+            return None
+        flight.subscribers += 1
+        self.joined += 1
+        if flight.tokens:
+            self.late_joined += 1
+        return Subscription(self, key, flight, leader=False)
+
+    def subscribe(
+        self,
+        key: Hashable,
+        start: Callable[[], AsyncIterator[str]],
+        on_complete: Callable[[list[str]], None] | None = None,
+        on_finish: Callable[[], None] | None = None,
+    ) -> Subscription:
+        """Join the in-flight generation for ``key`` or start it with ``start()``.
+
+        ``on_complete`` runs once with the full token list if the generation
+        finishes without error. ``on_finish`` runs when a generation started
+        by this call ends for any reason, including cancellation.
+        """
+        subscription = self.join(key)
+        if subscription is not None:
+            return subscription
+
+        flight = _Flight()
+        flight.subscribers = 1
+        self._flights[key] = flight
+        self.leaders += 1
+        flight.task = asyncio.create_task(self._drive(key, flight, start, on_complete))
+        if on_finish is not None:
+            flight.task.add_done_callback(lambda _: on_finish())
+        return Subscription(self, key, flight, leader=True)
+
+    async def _drive(
+        self,
+        key: Hashable,
+        flight: _Flight,
+        start: Callable[[], AsyncIterator[str]],
+        on_complete: Callable[[list[str]], None] | None,
+    ) -> None:
+        try:
+            async for token in start():
+                await flight.publish(token)
+        except asyncio.CancelledError:
+            await flight.finish(ConnectionAbortedError("generation abandoned"))
+            raise
+        except httpx.HTTPError as exc:
+            # Ollama unreachable, erroring or cut off: every subscriber gets the error.
+            await flight.finish(exc)
+        except Exception as exc:
+            logger.exception("Shared LLM generation failed")
+            await flight.finish(exc)
+            raise
+        else:
+            await flight.finish()
+            if on_complete is not None:
+                on_complete(flight.tokens)
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def _release(self, key: Hashable, flight: _Flight) -> None:
+        flight.subscribers -= 1
+        # Nobody is listening any more: stop burning inference time on it.
+        if flight.subscribers <= 0 and not flight.done and flight.task is not None:
+            self.abandoned += 1
+            flight.task.cancel()
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "joined": self.joined,
+            "late_joined": self.late_joined,
+            "abandoned": self.abandoned,
+        }
+
+
+llm_flights = SingleFlight()
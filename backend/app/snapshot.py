@@ -0,0 +1,162 @@
+"""Memory-mapped embedding snapshot shared by API workers.
+
+``scripts/export_embedding_snapshot.py`` writes every bank's cluster ids and
+unit-length embeddings to one file; workers ``np.memmap`` it, so they share a
+single page-cache copy and start without scanning ``clusters``.
+
+Layout (little-endian)::
+
+    magic (8 bytes) | format version (uint32) | header length (uint32) | JSON header
+    ... per client, each section aligned to 64 bytes:
+    ids: rows x 16 uint8 (UUID bytes) | vectors: rows x dim float32
+
+The JSON header records ``embedding_model``, ``dim``, ``rows``, the
+``ingested_at`` ``watermark`` of the export, the exported ``client_ids`` and,
+per client with rows, its row count and section offsets relative to the
+first aligned byte after the header.
+"""
+
+import json
+import struct
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+
+import numpy as np
+
+MAGIC = b"CAIEMBED"
+FORMAT_VERSION = 1
+
+_PREFIX = struct.Struct("<8sII")
+_ALIGN = 64
+
+
+class SnapshotError(ValueError):
+    """The file is not a snapshot this build can use."""
+
+
+@dataclass
+class Snapshot:
+    path: Path
+    embedding_model: str
+    dim: int
+    rows: int
+    watermark: datetime | None
+    exported_at: datetime
+    client_ids: list[str] = field(default_factory=list)
+    ids: dict[str, np.ndarray] = field(default_factory=dict)
+    vectors: dict[str, np.ndarray] = field(default_factory=dict)
+
+    def flush(self) -> None:
+        for array in (*self.ids.values(), *self.vectors.values()):
+            array.flush()
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def _map(snapshot: Snapshot, clients: list[dict], data_start: int, mode: str) -> Snapshot:
+    for entry in clients:
+        rows = entry["rows"]
+        snapshot.ids[entry["client_id"]] = np.memmap(
+            snapshot.path, dtype=np.uint8, mode=mode, offset=data_start + entry["ids_offset"], shape=(rows, 16)
+        )
+        snapshot.vectors[entry["client_id"]] = np.memmap(
+            snapshot.path,
+            dtype="<f4",
+            mode=mode,
+            offset=data_start + entry["vectors_offset"],
+            shape=(rows, snapshot.dim),
+        )
+    return snapshot
+
+
+def create_snapshot(
+    path: Path,
+    *,
+    embedding_model: str,
+    dim: int,
+    watermark: datetime | None,
+    client_rows: dict[str, int],
+) -> Snapshot:
+    """Size a new snapshot file and map it writable; fill ``ids`` / ``vectors``, then ``flush``."""
+    clients: list[dict] = []
+    offset = 0
+    for client_id, rows in client_rows.items():
+        if rows <= 0:
+            continue
+        ids_offset = offset
+        vectors_offset = _aligned(ids_offset + rows * 16)
+        offset = _aligned(vectors_offset + rows * dim * 4)
+        clients.append(
+            {"client_id": client_id, "rows": rows, "ids_offset": ids_offset, "vectors_offset": vectors_offset}
+        )
+
+    exported_at = datetime.now(UTC)
+    header = json.dumps(
+        {
+            "embedding_model": embedding_model,
+            "dim": dim,
+            "rows": sum(entry["rows"] for entry in clients),
+            "watermark": watermark.isoformat() if watermark else None,
+            "exported_at": exported_at.isoformat(),
+            # Every exported client, including those without rows (which get no sections).
+            "client_ids": list(client_rows),
+            "clients": clients,
+        }
+    ).encode("utf-8")
+    data_start = _aligned(_PREFIX.size + len(header))
+
+    with open(path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        f.truncate(data_start + offset)
+
+    snapshot = Snapshot(
+        path=Path(path),
+        embedding_model=embedding_model,
+        dim=dim,
+        rows=sum(entry["rows"] for entry in clients),
+        watermark=watermark,
+        exported_at=exported_at,
+        client_ids=list(client_rows),
+    )
+    return _map(snapshot, clients, data_start, "r+")
+
+
+def open_snapshot(path: Path, *, embedding_model: str | None = None, dim: int | None = None) -> Snapshot:
+    """Map ``path`` read-only, checking it against the running embedding model and dim."""
+    with open(path, "rb") as f:
+        prefix = f.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size:
+            raise SnapshotError(f"{path}: truncated header")
+        magic, version, header_len = _PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path}: not an embedding snapshot")
+        if version != FORMAT_VERSION:
+            raise SnapshotError(f"{path}: format version {version}, expected {FORMAT_VERSION}")
+        header = json.loads(f.read(header_len))
+
+    if embedding_model is not None and header["embedding_model"] != embedding_model:
+        raise SnapshotError(f"{path}: embeddings from {header['embedding_model']}, running {embedding_model}")
+    if dim is not None and header["dim"] != dim:
+        raise SnapshotError(f"{path}: dim {header['dim']}, expected {dim}")
+
+    data_start = _aligned(_PREFIX.size + header_len)
+    expected = data_start + max(
+        (entry["vectors_offset"] + entry["rows"] * header["dim"] * 4 for entry in header["clients"]), default=0
+    )
+    if Path(path).stat().st_size < expected:
+        raise SnapshotError(f"{path}: truncated data")
+
+    snapshot = Snapshot(
+        path=Path(path),
+        embedding_model=header["embedding_model"],
+        dim=header["dim"],
+        rows=header["rows"],
+        watermark=datetime.fromisoformat(header["watermark"]) if header["watermark"] else None,
+        exported_at=datetime.fromisoformat(header["exported_at"]),
+        client_ids=header["client_ids"],
+    )
+    return _map(snapshot, header["clients"], data_start, "r")
@@ -0,0 +1,312 @@
+"""In-process replica of cluster embeddings for ``retrieval_mode = "memory"``.
+
+Each client's embeddings live in one contiguous float32 matrix with unit
+rows, so a query is a single matrix-vector product plus a partial sort per
+client. The replica is loaded at startup under the same RLS scope as the
+change feed and kept current from it: re-ingested clusters are re-read and
+patched in copy-on-write, so searches running in worker threads only ever
+see a complete matrix. With ``EMBEDDING_SNAPSHOT_PATH`` set, the matrices are
+mapped from the exported snapshot instead (see ``app/snapshot.py``) and only
+rows ingested since its watermark are read from Postgres. Results are light
+candidates (ids and scores); the heavy columns still come from Postgres via
+``hydrate_clusters``.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+import numpy as np
+
+from .config import settings
+from .db import get_app_conn_async
+from .embeddings import EMBEDDING_DIM, EMBEDDING_MODEL
+from .snapshot import Snapshot, open_snapshot
+
+logger = logging.getLogger(__name__)
+
+SELECT_EMBEDDINGS = """
+SELECT id, client_id, embedding
+FROM clusters
+WHERE embedding IS NOT NULL
+ORDER BY client_id
+"""
+
+SELECT_EMBEDDINGS_SINCE = """
+SELECT id, client_id, embedding
+FROM clusters
+WHERE ingested_at > %(since)s AND embedding IS NOT NULL
+"""
+
+SELECT_CHANGED_EMBEDDINGS = """
+SELECT id, client_id, embedding
+FROM clusters
+WHERE id = ANY(%(ids)s::uuid[]) AND embedding IS NOT NULL
+"""
+
+
+def unit_rows(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+@dataclass
+class ClientMatrix:
+    """One client's rows: ``ids`` is (n, 16) uint8 UUID bytes, ``vectors`` (n, dim) float32."""
+
+    ids: np.ndarray
+    vectors: np.ndarray
+    _positions: dict[bytes, int] | None = field(default=None, repr=False)
+
+    def __len__(self) -> int:
+        return self.ids.shape[0]
+
+    def positions(self) -> dict[bytes, int]:
+        # Only needed to patch rows, so built on the first change rather than at load.
+        if self._positions is None:
+            self._positions = {self.ids[i].tobytes(): i for i in range(len(self))}
+        return self._positions
+
+    def holds_any(self, ids: set[bytes]) -> bool:
+        positions = self.positions()
+        return any(id_bytes in positions for id_bytes in ids)
+
+    def patched(self, rows: list[tuple[bytes, np.ndarray]], removed: set[bytes] = frozenset()) -> "ClientMatrix":
+        """A new matrix without ``removed`` and with ``rows`` replaced or appended.
+
+        ``self`` is left untouched.
+        """
+        ids = self.ids
+        positions = self.positions()
+        drop = [positions[id_bytes] for id_bytes in removed if id_bytes in positions]
+        if drop:
+            keep = np.ones(len(self), dtype=bool)
+            keep[drop] = False
+            ids = ids[keep]
+            vectors = np.array(self.vectors[keep])
+            positions = {ids[i].tobytes(): i for i in range(len(ids))}
+        else:
+            # A plain in-memory copy, also when this matrix is a read-only snapshot mapping.
+            vectors = np.array(self.vectors)
+            positions = dict(positions)
+        base = len(ids)
+        new_ids: list[bytes] = []
+        new_vectors: list[np.ndarray] = []
+        for id_bytes, vector in rows:
+            at = positions.get(id_bytes)
+            if at is not None:
+                vectors[at] = vector
+            else:
+                positions[id_bytes] = base + len(new_ids)
+                new_ids.append(id_bytes)
+                new_vectors.append(vector)
+        if new_ids:
+            ids = np.concatenate([ids, np.frombuffer(b"".join(new_ids), dtype=np.uint8).reshape(-1, 16)])
+            vectors = np.concatenate([vectors, np.stack(new_vectors)])
+        return ClientMatrix(ids=ids, vectors=vectors, _positions=positions)
+
+    def top(self, query: np.ndarray, top_k: int) -> tuple[np.ndarray, np.ndarray]:
+        """Row indexes and cosine scores of the ``top_k`` nearest rows, best first."""
+        scores = self.vectors @ query
+        if top_k < len(scores):
+            candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            candidates = np.arange(len(scores))
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return order, scores[order]
+
+
+def _build_matrices(rows: list[tuple[UUID, str, np.ndarray]]) -> dict[str, ClientMatrix]:
+    grouped: dict[str, tuple[list[bytes], list[np.ndarray]]] = {}
+    for cluster_id, client_id, embedding in rows:
+        ids, vectors = grouped.setdefault(client_id, ([], []))
+        ids.append(cluster_id.bytes)
+        vectors.append(embedding)
+    return {
+        client_id: ClientMatrix(
+            ids=np.frombuffer(b"".join(ids), dtype=np.uint8).reshape(-1, 16),
+            vectors=unit_rows(np.stack(vectors)),
+        )
+        for client_id, (ids, vectors) in grouped.items()
+    }
+
+
+class VectorIndex:
+    def __init__(self) -> None:
+        self._clients: dict[str, ClientMatrix] = {}
+        self._pending: set[str] = set()
+        self._task: asyncio.Task | None = None
+        self.loaded = False
+        self.source: str | None = None
+        self.snapshot_watermark: datetime | None = None
+        self.loaded_at: datetime | None = None
+        self.load_ms: float | None = None
+        self.updated_rows = 0
+        self.searches = 0
+        self.errors = 0
+
+    async def _scoped_fetch(self, query: str, params: dict | None = None) -> list[tuple]:
+        async with get_app_conn_async() as conn:
+            # Binary results skip parsing pgvector's text form, row by row.
+            async with conn.cursor(binary=True) as cur:
+                await cur.execute(
+                    "SELECT set_config('app.current_clients', %s, true)",
+                    (",".join(settings.allowed_client_list),),
+                )
+                await cur.execute(query, params)
+                rows = await cur.fetchall()
+            await conn.commit()
+        return rows
+
+    def _open_snapshot(self) -> Snapshot | None:
+        path = settings.embedding_snapshot_path
+        if not path or not Path(path).exists():
+            return None
+        try:
+            snapshot = open_snapshot(Path(path), embedding_model=EMBEDDING_MODEL, dim=EMBEDDING_DIM)
+        except (OSError, ValueError, KeyError):
+            logger.exception("Ignoring embedding snapshot %s", path)
+            return None
+        missing = set(settings.allowed_client_list) - set(snapshot.client_ids)
+        if missing:
+            logger.warning("Embedding snapshot %s lacks clients %s; loading from Postgres", path, sorted(missing))
+            return None
+        return snapshot
+
+    async def load(self) -> None:
+        """Map the embedding snapshot when one is configured, else read every row."""
+        started = time.perf_counter()
+        snapshot = self._open_snapshot()
+        if snapshot is None:
+            rows = await self._scoped_fetch(SELECT_EMBEDDINGS)
+            self._clients = _build_matrices(rows)
+            self.source, self.snapshot_watermark = "postgres", None
+        else:
+            self._clients = {
+                client_id: ClientMatrix(ids=snapshot.ids[client_id], vectors=snapshot.vectors[client_id])
+                for client_id in settings.allowed_client_list
+                if client_id in snapshot.ids
+            }
+            # Catch up on clusters ingested since the export, with the change feed's overlap
+            # for ingests that committed after the watermark was read.
+            since = datetime.min.replace(tzinfo=UTC)
+            if snapshot.watermark is not None:
+                since = snapshot.watermark - timedelta(seconds=settings.cluster_change_overlap_seconds)
+            await self._patch(await self._scoped_fetch(SELECT_EMBEDDINGS_SINCE, {"since": since}))
+            self.source, self.snapshot_watermark = "snapshot", snapshot.watermark
+        self.loaded = True
+        self.loaded_at = datetime.now(UTC)
+        self.load_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    async def _patch(self, rows: list[tuple], changed_ids: set[bytes] = frozenset()) -> None:
+        """Apply re-read ``rows``; ``changed_ids`` lists every id that was asked for.
+
+        A cluster can move to another client or out of scope, so each changed
+        id is dropped from every matrix except the one its row now belongs to.
+        """
+        by_client: dict[str, list[tuple[bytes, np.ndarray]]] = {}
+        for cluster_id, client_id, embedding in rows:
+            vector = unit_rows(embedding[np.newaxis])[0]
+            by_client.setdefault(client_id, []).append((cluster_id.bytes, vector))
+        changed = set(changed_ids) | {cluster_id.bytes for cluster_id, _, _ in rows}
+
+        for client_id in set(self._clients) | set(by_client):
+            patch = by_client.get(client_id, [])
+            current = self._clients.get(client_id)
+            if current is None:
+                current = ClientMatrix(
+                    ids=np.empty((0, 16), dtype=np.uint8),
+                    vectors=np.empty((0, patch[0][1].shape[0]), dtype=np.float32),
+                )
+            removed = changed - {id_bytes for id_bytes, _ in patch}
+            if not patch and not current.holds_any(removed):
+                continue
+            # Patching copies the matrix off the event loop; the swap itself is one assignment.
+            self._clients[client_id] = await asyncio.to_thread(current.patched, patch, removed)
+        self.updated_rows += len(rows)
+
+    async def _apply_pending(self) -> None:
+        while self._pending:
+            ids, self._pending = list(self._pending), set()
+            try:
+                if not self.loaded:
+                    # The startup load failed; a full load covers these rows too.
+                    await self.load()
+                    continue
+                rows = await self._scoped_fetch(SELECT_CHANGED_EMBEDDINGS, {"ids": ids})
+                await self._patch(rows, {UUID(cluster_id).bytes for cluster_id in ids})
+            except Exception:
+                self.errors += 1
+                logger.exception("Vector index update failed")
+                # Retried with the next change notification.
+                self._pending.update(ids)
+                return
+
+    def apply_changes(self, changed: list[dict]) -> None:
+        """Change-feed subscriber: re-read changed rows in the background, coalescing bursts."""
+        self._pending.update(row["id"] for row in changed)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._apply_pending(), name="vector-index-update")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def search(self, client_ids: list[str], embedding: list[float], top_k: int, min_score: float) -> list[dict]:
+        """Light top-k over ``client_ids`` with the same floor and tie order as the lateral query.
+
+        Only the matrices of ``client_ids`` are scanned, so scoping matches RLS
+        for callers that pass the user's clients.
+        """
+        self.searches += 1
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        hits: list[tuple[float, int, str, ClientMatrix, int]] = []
+        for ord_, client_id in enumerate(client_ids):
+            matrix = self._clients.get(client_id)
+            if matrix is None or not len(matrix) or top_k <= 0:
+                continue
+            rows, scores = matrix.top(query, top_k)
+            hits.extend((float(s), ord_, client_id, matrix, int(r)) for r, s in zip(rows, scores, strict=True))
+
+        hits.sort(key=lambda hit: (-hit[0], hit[1]))
+        if hits:
+            best = hits[0][0]
+            hits = [hit for hit in hits if hit[0] >= min_score or hit[0] == best]
+        return [
+            {"id": UUID(bytes=matrix.ids[row].tobytes()), "client_id": client_id, "relevance_score": score}
+            for score, _, client_id, matrix, row in hits[:top_k]
+        ]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "source": self.source,
+            "snapshot_watermark": self.snapshot_watermark.isoformat() if self.snapshot_watermark else None,
+            "clients": len(self._clients),
+            "rows": sum(len(m) for m in self._clients.values()),
+            "bytes": sum(m.vectors.nbytes + m.ids.nbytes for m in self._clients.values()),
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "load_ms": self.load_ms,
+            "updated_rows": self.updated_rows,
+            "searches": self.searches,
+            "errors": self.errors,
+        }
+
+
+vector_index = VectorIndex()
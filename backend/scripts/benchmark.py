@@ -0,0 +1,347 @@
+"""Micro-benchmarks for backend hot paths.
+
+Usage:
+    python scripts/benchmark.py vector-transport [--iterations N] [--live]
+    python scripts/benchmark.py json [--iterations N] [--top-k K] [--terms T]
+    python scripts/benchmark.py replicate-csv --csv data/mock_clusters.csv --rows 1000000 --out /tmp/clusters_1m.csv
+    python scripts/benchmark.py explain [--client Bank_A] [--top-k K]
+    python scripts/benchmark.py recall [--queries N] [--top-k K] [--vector-top-k K]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.config import settings
+from app.embeddings import embed_text, to_pgvector, to_pgvector_literal
+
+SAMPLE_QUERY = "This Agreement will be governed by and construed in accordance with English law."
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark backend hot paths")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    transport = sub.add_parser("vector-transport", help="Text pgvector literals vs binary float32 buffers")
+    transport.add_argument("--iterations", type=int, default=2000)
+    transport.add_argument("--live", action="store_true", help="Also time round trips against APP_DATABASE_URL")
+
+    json_cmd = sub.add_parser("json", help="SearchResponse / SSE encoding: pydantic + json vs trusted rows + orjson")
+    json_cmd.add_argument("--iterations", type=int, default=500)
+    json_cmd.add_argument("--top-k", type=int, default=20)
+    json_cmd.add_argument("--terms", type=int, default=40, help="codified_data terms per row (5 attributes each)")
+
+    replicate = sub.add_parser("replicate-csv", help="Scale a cluster CSV up to N rows (fresh ids) for ingest benchmarks")
+    replicate.add_argument("--csv", required=True, help="Source cluster CSV")
+    replicate.add_argument("--rows", type=int, required=True)
+    replicate.add_argument("--out", required=True)
+
+    explain = sub.add_parser("explain", help="EXPLAIN ANALYZE structured filters: inline JSONB vs cluster_terms")
+    explain.add_argument("--client", default=None, help="Client to scope to (default: first allowed client)")
+    explain.add_argument("--top-k", type=int, default=5)
+    explain.add_argument("--term", default="Governing Law")
+    explain.add_argument("--attribute", default="Jurisdiction")
+
+    recall = sub.add_parser("recall", help="Phrase-query recall: vector top-k vs hybrid (RRF) top-k")
+    recall.add_argument("--queries", type=int, default=200)
+    recall.add_argument("--top-k", type=int, default=5)
+    recall.add_argument("--vector-top-k", type=int, default=20, help="Larger pure-vector top-k to compare against")
+    recall.add_argument("--phrase-words", type=int, default=3)
+    return parser.parse_args()
+
+
+def time_per_call(fn: Callable[[], object], iterations: int) -> list[float]:
+    """Wall time of each call in microseconds."""
+    samples: list[float] = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    return samples
+
+
+def report(label: str, samples_us: list[float], unit: str = "us") -> None:
+    scale = 1000 if unit == "ms" else 1
+    mean = statistics.fmean(samples_us) / scale
+    p50 = statistics.median(samples_us) / scale
+    p95 = sorted(samples_us)[int(len(samples_us) * 0.95) - 1] / scale
+    print(f"  {label:<28} mean {mean:9.2f}{unit}  p50 {p50:9.2f}{unit}  p95 {p95:9.2f}{unit}")
+
+
+def bench_vector_transport(iterations: int, live: bool) -> None:
+    from pgvector import Vector
+
+    embedding = embed_text(SAMPLE_QUERY)
+    literal = to_pgvector_literal(embedding)
+    binary = Vector(to_pgvector(embedding)).to_binary()
+
+    print("Client-side encode (per query vector):")
+    print(f"  text literal: {len(literal)} bytes, binary: {len(binary)} bytes")
+    report("to_pgvector_literal", time_per_call(lambda: to_pgvector_literal(embedding), iterations))
+    report("binary float32 buffer", time_per_call(lambda: Vector(to_pgvector(embedding)).to_binary(), iterations))
+
+    if not live:
+        return
+
+    import psycopg
+    from pgvector.psycopg import register_vector
+
+    text_query = """
+        SELECT id, 1 - (embedding <=> %(vector)s::vector) AS relevance_score
+        FROM clusters
+        ORDER BY embedding <=> %(vector)s::vector
+        LIMIT 5
+    """
+    binary_query = """
+        SELECT id, 1 - (embedding <=> %(vector)b) AS relevance_score
+        FROM clusters
+        ORDER BY embedding <=> %(vector)b
+        LIMIT 5
+    """
+    clients = ",".join(settings.allowed_client_list)
+    round_trips = max(1, iterations // 10)
+
+    with psycopg.connect(settings.app_database_url) as conn:
+        register_vector(conn)
+        conn.execute("SELECT set_config('app.current_clients', %s, false)", (clients,))
+
+        def run_text() -> list:
+            return conn.execute(text_query, {"vector": to_pgvector_literal(embedding)}).fetchall()
+
+        def run_binary() -> list:
+            return conn.execute(binary_query, {"vector": to_pgvector(embedding)}).fetchall()
+
+        print(f"Round trip incl. encode + server parse ({round_trips} queries):")
+        report("text literal", time_per_call(run_text, round_trips), unit="ms")
+        report("binary buffer", time_per_call(run_binary, round_trips), unit="ms")
+
+
+def _synthetic_rows(top_k: int, terms: int) -> list[dict]:
+    """DB-shaped rows as psycopg returns them (UUID, datetime, decoded JSONB)."""
+    import uuid
+    from datetime import UTC, datetime
+
+    rows = []
+    for i in range(top_k):
+        rows.append(
+            {
+                "id": uuid.uuid4(),
+                "client_id": f"Bank_{'ABC'[i % 3]}",
+                "text_content": SAMPLE_QUERY * 6,
+                "codified_data": {
+                    f"Term {t}": {f"Attribute {a}": f"Value {t}.{a}" for a in range(5)} for t in range(terms)
+                },
+                "query_history": [
+                    {"date": "2024-03-01", "role": "Analyst", "query": "Please confirm capture approach."},
+                    {"date": "2024-03-02", "role": "Client", "response": "Capture as agreed in operating memo."},
+                ],
+                "doc_count": 12,
+                "last_updated": datetime(2024, 3, 2, 9, 30, tzinfo=UTC),
+                "relevance_score": 0.9 - i * 0.01,
+            }
+        )
+    return rows
+
+
+def bench_json(iterations: int, top_k: int, terms: int) -> None:
+    import json
+
+    from app.main import _search_response
+    from app.schemas import SearchResponse
+    from app.serialization import HAS_ORJSON, dumps
+
+    rows = _synthetic_rows(top_k, terms)
+    fields = {
+        "query": SAMPLE_QUERY,
+        "scope": "ALL_BANKS",
+        "threshold": settings.similarity_threshold,
+        "evidence_found": True,
+        "note": "benchmark",
+        "searched_clients": settings.allowed_client_list,
+        "retrieval": {"mode": "lateral", "fanout_width": 1, "elapsed_ms": 1.0},
+    }
+
+    def validated() -> bytes:
+        # What FastAPI does with response_model: validate, dump, serialize.
+        response = SearchResponse(**fields, results=rows)
+        return SearchResponse.model_validate(response.model_dump()).model_dump_json().encode()
+
+    def trusted() -> bytes:
+        return _search_response(**fields, results=rows).body
+
+    print(f"SearchResponse body, top_k={top_k}, {terms} terms x 5 attributes per row (orjson: {HAS_ORJSON}):")
+    print(f"  validated: {len(validated())} bytes, trusted: {len(trusted())} bytes")
+    report("pydantic response_model", time_per_call(validated, iterations))
+    report("trusted rows", time_per_call(trusted, iterations))
+
+    frame = {"token": "precedent ", "citations": [str(r["id"]) for r in rows[:3]]}
+    print("SSE frame encode:")
+    report("json.dumps", time_per_call(lambda: json.dumps(frame), iterations * 20))
+    report("serialization.dumps", time_per_call(lambda: dumps(frame), iterations * 20))
+
+
+def replicate_csv(source: str, rows: int, out: str) -> None:
+    import csv
+    import uuid
+
+    with open(source, encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames
+        seed = list(reader)
+
+    with open(out, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for i in range(rows):
+            row = dict(seed[i % len(seed)])
+            copy_no = i // len(seed)
+            if copy_no:
+                row["id"] = str(uuid.uuid5(uuid.UUID(row["id"]), str(copy_no)))
+                row["text_content"] = f"{row['text_content']} [copy {copy_no}]"
+            writer.writerow(row)
+    print(f"Wrote {rows} rows to {out}")
+
+
+# Structured filters as written before cluster_terms: unpack codified_data per row.
+_LEGACY_KEY_CONDITIONS = {
+    "term": "EXISTS (SELECT 1 FROM jsonb_object_keys(codified_data) AS k WHERE lower(k) = lower(%(term)s))",
+    "attribute": (
+        "EXISTS (SELECT 1 FROM jsonb_each(codified_data) AS kv"
+        " WHERE EXISTS (SELECT 1 FROM jsonb_object_keys(kv.value) AS k2 WHERE lower(k2) = lower(%(attribute)s)))"
+    ),
+    "term+attribute": (
+        "EXISTS (SELECT 1 FROM jsonb_each(codified_data) AS kv"
+        " WHERE lower(kv.key) = lower(%(term)s)"
+        " AND EXISTS (SELECT 1 FROM jsonb_object_keys(kv.value) AS k2 WHERE lower(k2) = lower(%(attribute)s)))"
+    ),
+}
+
+
+def _plan_summary(plan: dict) -> str:
+    nodes: list[str] = []
+
+    def walk(node: dict) -> None:
+        label = node["Node Type"]
+        if "Index Name" in node:
+            label += f" on {node['Index Name']}"
+        elif "Relation Name" in node:
+            label += f" on {node['Relation Name']}"
+        if label not in nodes:
+            nodes.append(label)
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan)
+    return ", ".join(nodes)
+
+
+def bench_explain(client: str | None, top_k: int, term: str, attribute: str) -> None:
+    import psycopg
+
+    from app.retrieval import _structured_query
+
+    client_id = client or settings.allowed_client_list[0]
+    cases = {"term": (term, None), "attribute": (None, attribute), "term+attribute": (term, attribute)}
+
+    with psycopg.connect(settings.app_database_url) as conn:
+        conn.execute("SELECT set_config('app.current_client', %s, false)", (client_id,))
+        total = conn.execute("SELECT count(*) FROM clusters").fetchone()[0]
+        print(f"Structured filters for {client_id} ({total:,} visible clusters), top_k={top_k}:")
+
+        for name, (case_term, case_attribute) in cases.items():
+            new_sql, params = _structured_query(client_id, top_k, case_term, case_attribute, None, light=True)
+            legacy_sql = f"""
+                SELECT id, client_id, 1.0::float8 AS relevance_score
+                FROM clusters
+                WHERE client_id = %(client_id)s AND {_LEGACY_KEY_CONDITIONS[name]}
+                ORDER BY last_updated DESC NULLS LAST
+                LIMIT %(top_k)s
+            """
+            for label, sql in (("inline JSONB", legacy_sql), ("cluster_terms", new_sql)):
+                plan = conn.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params).fetchone()[0][0]
+                top = plan["Plan"]
+                buffers = top.get("Shared Hit Blocks", 0) + top.get("Shared Read Blocks", 0)
+                print(
+                    f"  {name:<15} {label:<13} {plan['Execution Time']:9.2f}ms"
+                    f"  rows {top['Actual Rows']:>4}  buffers {buffers:>8}  [{_plan_summary(top)}]"
+                )
+
+            # Same matches either way (all of them, not just the first top_k).
+            match_params = {**params, "top_k": total}
+            legacy_ids = {row[0] for row in conn.execute(legacy_sql, match_params)}
+            new_ids = {row[0] for row in conn.execute(new_sql, match_params)}
+            print(f"  {'':<15} matches: {len(new_ids)} ({'same' if new_ids == legacy_ids else 'DIFFERENT'})")
+
+
+def bench_recall(queries: int, top_k: int, vector_top_k: int, phrase_words: int) -> None:
+    """Query with a short phrase cut from a clause; count how often that clause is returned.
+
+    Clauses with identical text (shared boilerplate) count as the same clause.
+    Searches run with the configured similarity floor, as the API's do.
+    """
+    import random
+
+    from app.db import get_app_conn
+    from app.embeddings import embed_query
+    from app.retrieval import (
+        search_clusters_across_clients,
+        search_clusters_hybrid,
+        set_client_scopes,
+    )
+
+    clients = settings.allowed_client_list
+    with get_app_conn() as conn:
+        set_client_scopes(conn, clients)
+        clauses = conn.execute("SELECT id, text_content FROM clusters").fetchall()
+        conn.commit()
+        text_of = dict(clauses)
+
+        rng = random.Random(7)
+        samples = []
+        for cluster_id, text in rng.sample(clauses, min(queries, len(clauses))):
+            words = text.split()
+            start = rng.randrange(max(1, len(words) - phrase_words + 1))
+            samples.append((cluster_id, " ".join(words[start:start + phrase_words])))
+
+        runs = {
+            f"vector top_k={top_k}": lambda e, q: search_clusters_across_clients(conn, clients, e, top_k, light=True),
+            f"vector top_k={vector_top_k}": lambda e, q: search_clusters_across_clients(
+                conn, clients, e, vector_top_k, light=True
+            ),
+            f"hybrid top_k={top_k}": lambda e, q: search_clusters_hybrid(conn, clients, e, q, top_k, light=True),
+        }
+        print(f"Recall of the source clause for {len(samples)} {phrase_words}-word phrase queries:")
+        for label, run in runs.items():
+            hits = 0
+            started = time.perf_counter()
+            for cluster_id, phrase in samples:
+                rows = run(embed_query(phrase), phrase)
+                hits += any(text_of[row["id"]] == text_of[cluster_id] for row in rows)
+                conn.commit()
+            elapsed_ms = (time.perf_counter() - started) * 1000 / len(samples)
+            print(f"  {label:<22} recall {hits / len(samples):6.1%}  {elapsed_ms:6.2f}ms/query")
+
+
+def main() -> None:
+    args = parse_args()
+    if args.command == "vector-transport":
+        bench_vector_transport(args.iterations, args.live)
+    elif args.command == "json":
+        bench_json(args.iterations, args.top_k, args.terms)
+    elif args.command == "replicate-csv":
+        replicate_csv(args.csv, args.rows, args.out)
+    elif args.command == "explain":
+        bench_explain(args.client, args.top_k, args.term, args.attribute)
+    elif args.command == "recall":
+        bench_recall(args.queries, args.top_k, args.vector_top_k, args.phrase_words)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Export cluster embeddings to a memory-mapped snapshot for API workers.
+
+Usage:
+    python scripts/export_embedding_snapshot.py --out /var/lib/contract-ai/embeddings.snap [--clients Bank_A,Bank_B]
+
+The file is written next to ``--out`` and renamed into place, so running
+workers keep their mapping of the previous snapshot. Point
+``EMBEDDING_SNAPSHOT_PATH`` at it; see ``app/snapshot.py`` for the format.
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.config import settings
+from app.db import get_ingest_conn
+from app.embeddings import EMBEDDING_DIM, EMBEDDING_MODEL
+from app.snapshot import create_snapshot
+from app.vector_index import unit_rows
+
+COUNT_ROWS = """
+SELECT client_id, embedding_model, count(*) AS n
+FROM clusters
+WHERE embedding IS NOT NULL AND client_id = ANY(%(clients)s)
+GROUP BY client_id, embedding_model
+"""
+
+SELECT_WATERMARK = "SELECT max(ingested_at) FROM clusters WHERE client_id = ANY(%(clients)s)"
+
+SELECT_CLIENT_ROWS = """
+SELECT id, embedding
+FROM clusters
+WHERE client_id = %(client_id)s AND embedding IS NOT NULL
+ORDER BY id
+"""
+
+FETCH_ROWS = 5000
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export cluster embeddings to a memory-mapped snapshot")
+    parser.add_argument("--out", required=True, help="Snapshot file to write")
+    parser.add_argument("--clients", default=None, help="Comma-separated clients (default: ALLOWED_CLIENTS)")
+    return parser.parse_args()
+
+
+def export_snapshot(out: Path, clients: list[str]) -> tuple[int, object]:
+    tmp = out.with_name(out.name + ".tmp")
+    with get_ingest_conn() as conn:
+        # One snapshot of the table: the counts, rows and watermark must agree.
+        # The pool's connection check leaves a transaction open; end it first.
+        conn.commit()
+        conn.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+        counts: dict[str, int] = {}
+        for client_id, model, n in conn.execute(COUNT_ROWS, {"clients": clients}).fetchall():
+            if model != EMBEDDING_MODEL:
+                raise SystemExit(
+                    f"{client_id} has {n} clusters embedded with {model}; re-embed before exporting {EMBEDDING_MODEL}"
+                )
+            counts[client_id] = n
+        watermark = conn.execute(SELECT_WATERMARK, {"clients": clients}).fetchone()[0]
+
+        snapshot = create_snapshot(
+            tmp,
+            embedding_model=EMBEDDING_MODEL,
+            dim=EMBEDDING_DIM,
+            watermark=watermark,
+            client_rows={client_id: counts.get(client_id, 0) for client_id in clients},
+        )
+        for client_id, ids in snapshot.ids.items():
+            vectors = snapshot.vectors[client_id]
+            at = 0
+            with conn.cursor(name=f"snapshot_{client_id}", binary=True) as cur:
+                cur.execute(SELECT_CLIENT_ROWS, {"client_id": client_id})
+                while rows := cur.fetchmany(FETCH_ROWS):
+                    end = at + len(rows)
+                    ids[at:end] = np.frombuffer(b"".join(r[0].bytes for r in rows), dtype=np.uint8).reshape(-1, 16)
+                    vectors[at:end] = unit_rows(np.stack([r[1] for r in rows]))
+                    at = end
+            if at != len(ids):
+                raise SystemExit(f"{client_id}: expected {len(ids)} rows, read {at}")
+        conn.commit()
+
+    snapshot.flush()
+    os.replace(tmp, out)
+    return snapshot.rows, watermark
+
+
+def main() -> None:
+    args = parse_args()
+    clients = [c.strip() for c in args.clients.split(",") if c.strip()] if args.clients else settings.allowed_client_list
+    started = time.perf_counter()
+    rows, watermark = export_snapshot(Path(args.out), clients)
+    elapsed = time.perf_counter() - started
+    print(f"Exported {rows} embeddings for {len(clients)} clients to {args.out} in {elapsed:.1f}s")
+    print(f"  model={EMBEDDING_MODEL} dim={EMBEDDING_DIM} watermark={watermark.isoformat() if watermark else None}")
+
+
+if __name__ == "__main__":
+    main()
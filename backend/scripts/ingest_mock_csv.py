@@ -1,16 +1,27 @@
 import argparse
 import csv
+import hashlib
 import json
+import multiprocessing
+import queue
 import sys
+import time
+import uuid
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, fields
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
 
+import psycopg
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from app.db import get_ingest_conn
-from app.embeddings import embed_text, to_pgvector_literal
+from app.embeddings import EMBEDDING_DIM, EMBEDDING_MODEL, embed_batch
+from app.language import ts_config_for
 
 UPSERT_CLUSTER = """
 INSERT INTO clusters (
@@ -24,7 +35,9 @@ INSERT INTO clusters (
     embedding_model,
     embedding_dim,
     prompt_version,
-    last_updated
+    last_updated,
+    content_fingerprint,
+    ts_config
 )
 VALUES (
     %(id)s,
@@ -33,11 +46,13 @@ VALUES (
     %(codified_data)s::jsonb,
     %(query_history)s::jsonb,
     %(doc_count)s,
-    %(embedding)s::vector,
+    %(embedding)b,
     %(embedding_model)s,
     %(embedding_dim)s,
     %(prompt_version)s,
-    %(last_updated)s
+    %(last_updated)s,
+    %(content_fingerprint)s,
+    %(ts_config)s::regconfig
 )
 ON CONFLICT (id)
 DO UPDATE SET
@@ -50,7 +65,11 @@ DO UPDATE SET
     embedding_model = EXCLUDED.embedding_model,
     embedding_dim = EXCLUDED.embedding_dim,
     prompt_version = EXCLUDED.prompt_version,
-    last_updated = EXCLUDED.last_updated
+    last_updated = EXCLUDED.last_updated,
+    content_fingerprint = EXCLUDED.content_fingerprint,
+    ts_config = EXCLUDED.ts_config,
+    ingested_at = NOW()
+RETURNING (xmax = 0) AS inserted
 """
 
 DELETE_EVENTS = "DELETE FROM cluster_events WHERE cluster_id = %(cluster_id)s"
@@ -73,14 +92,336 @@ VALUES (
 )
 """
 
+# --- Structured-search keys (008_cluster_terms.sql), rebuilt from the merged codified_data ---
+# Every rewrite of cluster_terms records its +/- cluster counts in the facet_deltas temp table.
+# The batch then nets them and applies them to term_facets (009_term_facets.sql) in one
+# upsert, ordered by key. Keys whose counts do not change (the usual re-ingest) are never
+# locked, and every shard takes facet row locks in the same order, so shards do not deadlock.
+
+_TERMS_SELECT = """
+SELECT
+    c.id,
+    c.client_id,
+    lower(kv.key),
+    lower(attr.key),
+    CASE WHEN attr.key IS NULL THEN kv.value #>> '{}' ELSE attr.value END,
+    kv.key,
+    attr.key
+FROM clusters AS c
+CROSS JOIN LATERAL jsonb_each(c.codified_data) AS kv
+LEFT JOIN LATERAL jsonb_each_text(CASE WHEN jsonb_typeof(kv.value) = 'object' THEN kv.value END) AS attr ON true
+"""
+
+_TERMS_COLUMNS = "cluster_id, client_id, term_lc, attribute_lc, value, term, attribute"
+
+
+def _record_facet_delta(terms_dml: str, sign: str) -> str:
+    """Wrap a cluster_terms INSERT/DELETE so it records ``sign``-ed cluster counts in facet_deltas.
+
+    Each statement touches a cluster at most once, so counting distinct
+    clusters per statement and summing over statements gives the net change.
+    """
+    return f"""
+WITH changed AS (
+{terms_dml}
+RETURNING {_TERMS_COLUMNS}
+)
+INSERT INTO facet_deltas (client_id, term_lc, attribute_lc, value, term, attribute, delta)
+SELECT client_id, term_lc, COALESCE(attribute_lc, ''), COALESCE(value, ''),
+       min(term), min(attribute), {sign}count(DISTINCT cluster_id)
+FROM changed
+GROUP BY 1, 2, 3, 4
+UNION ALL
+SELECT client_id, term_lc, NULL, NULL, min(term), NULL, {sign}count(DISTINCT cluster_id)
+FROM changed
+GROUP BY 1, 2
+"""
+
+
+DELETE_TERMS = _record_facet_delta("DELETE FROM cluster_terms WHERE cluster_id = %(cluster_id)s", "-")
+INSERT_TERMS = _record_facet_delta(
+    f"""INSERT INTO cluster_terms ({_TERMS_COLUMNS})
+{_TERMS_SELECT}
+WHERE c.id = %(cluster_id)s AND jsonb_typeof(c.codified_data) = 'object'""",
+    "",
+)
+
+APPLY_FACET_DELTAS = """
+WITH net AS (
+    SELECT client_id, term_lc, attribute_lc, value, min(term) AS term, min(attribute) AS attribute,
+           sum(delta) AS delta
+    FROM facet_deltas
+    GROUP BY 1, 2, 3, 4
+    HAVING sum(delta) <> 0
+)
+INSERT INTO term_facets (client_id, term_lc, attribute_lc, value, term, attribute, cluster_count)
+SELECT client_id, term_lc, attribute_lc, value, term, attribute, delta
+FROM net
+ORDER BY client_id, term_lc, attribute_lc NULLS FIRST, value NULLS FIRST
+ON CONFLICT (client_id, term_lc, attribute_lc, value)
+DO UPDATE SET
+    cluster_count = term_facets.cluster_count + EXCLUDED.cluster_count,
+    term = COALESCE(term_facets.term, EXCLUDED.term),
+    attribute = COALESCE(term_facets.attribute, EXCLUDED.attribute),
+    updated_at = NOW()
+"""
+
+# Only keys this batch decremented can reach zero; their rows are already locked by the upsert.
+PRUNE_FACETS = """
+DELETE FROM term_facets AS f
+USING (
+    SELECT client_id, term_lc, attribute_lc, value
+    FROM facet_deltas
+    GROUP BY 1, 2, 3, 4
+    HAVING sum(delta) < 0
+) AS d
+WHERE f.cluster_count <= 0
+  AND f.client_id = d.client_id
+  AND f.term_lc = d.term_lc
+  AND f.attribute_lc IS NOT DISTINCT FROM d.attribute_lc
+  AND f.value IS NOT DISTINCT FROM d.value
+"""
+
+# Row mode commits once at the end, so deltas are cleared per batch rather than on commit.
+CLEAR_FACET_DELTAS = "TRUNCATE facet_deltas"
+
+# --- COPY pipeline: binary COPY into per-session staging tables, then set-based merge ---
+
+CREATE_STAGING = """
+CREATE TEMP TABLE IF NOT EXISTS stage_clusters (
+    ord INTEGER NOT NULL,
+    id UUID NOT NULL,
+    client_id TEXT NOT NULL,
+    text_content TEXT NOT NULL,
+    codified_data TEXT,
+    query_history TEXT,
+    doc_count INTEGER,
+    embedding VECTOR(384),
+    last_updated TIMESTAMPTZ,
+    content_fingerprint TEXT NOT NULL,
+    ts_config TEXT NOT NULL,
+    rewrite_events BOOLEAN NOT NULL
+) ON COMMIT DELETE ROWS;
+
+CREATE TEMP TABLE IF NOT EXISTS facet_deltas (
+    client_id TEXT NOT NULL,
+    term_lc TEXT NOT NULL,
+    attribute_lc TEXT,
+    value TEXT,
+    term TEXT,
+    attribute TEXT,
+    delta INTEGER NOT NULL
+) ON COMMIT DELETE ROWS;
+
+CREATE TEMP TABLE IF NOT EXISTS stage_events (
+    ord INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    cluster_id UUID NOT NULL,
+    client_id TEXT NOT NULL,
+    actor_role TEXT NOT NULL,
+    event_type TEXT NOT NULL,
+    message TEXT NOT NULL,
+    event_at TIMESTAMPTZ NOT NULL
+) ON COMMIT DELETE ROWS;
+"""
+
+COPY_STAGE_CLUSTERS = """
+COPY stage_clusters (
+    ord, id, client_id, text_content, codified_data, query_history, doc_count, embedding, last_updated,
+    content_fingerprint, ts_config, rewrite_events
+) FROM STDIN (FORMAT BINARY)
+"""
+STAGE_CLUSTER_TYPES = [
+    "int4", "uuid", "text", "text", "text", "text", "int4", "vector", "timestamptz", "text", "text", "bool",
+]
+
+COPY_STAGE_EVENTS = """
+COPY stage_events (
+    ord, seq, cluster_id, client_id, actor_role, event_type, message, event_at
+) FROM STDIN (FORMAT BINARY)
+"""
+STAGE_EVENT_TYPES = ["int4", "int4", "uuid", "text", "text", "text", "text", "timestamptz"]
+
+# A cluster id may repeat inside a batch; the last occurrence wins, as with row-by-row upserts.
+# A NULL staged embedding means the text is unchanged and the stored vector is kept.
+MERGE_CLUSTERS = """
+WITH merged AS (
+INSERT INTO clusters (
+    id,
+    client_id,
+    text_content,
+    codified_data,
+    query_history,
+    doc_count,
+    embedding,
+    embedding_model,
+    embedding_dim,
+    prompt_version,
+    last_updated,
+    content_fingerprint,
+    ts_config
+)
+SELECT DISTINCT ON (id)
+    id,
+    client_id,
+    text_content,
+    codified_data::jsonb,
+    query_history::jsonb,
+    doc_count,
+    embedding,
+    %(embedding_model)s,
+    %(embedding_dim)s,
+    %(prompt_version)s,
+    last_updated,
+    content_fingerprint,
+    ts_config::regconfig
+FROM stage_clusters
+ORDER BY id, ord DESC
+ON CONFLICT (id)
+DO UPDATE SET
+    client_id = EXCLUDED.client_id,
+    text_content = EXCLUDED.text_content,
+    codified_data = EXCLUDED.codified_data,
+    query_history = EXCLUDED.query_history,
+    doc_count = EXCLUDED.doc_count,
+    embedding = COALESCE(EXCLUDED.embedding, clusters.embedding),
+    embedding_model = EXCLUDED.embedding_model,
+    embedding_dim = EXCLUDED.embedding_dim,
+    prompt_version = EXCLUDED.prompt_version,
+    last_updated = EXCLUDED.last_updated,
+    content_fingerprint = EXCLUDED.content_fingerprint,
+    ts_config = EXCLUDED.ts_config,
+    ingested_at = NOW()
+RETURNING (xmax = 0) AS inserted
+)
+SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM merged
+"""
+
+MERGE_DELETE_EVENTS = """
+DELETE FROM cluster_events AS e
+USING (SELECT DISTINCT id FROM stage_clusters WHERE rewrite_events) AS s
+WHERE e.cluster_id = s.id
+"""
+
+MERGE_INSERT_EVENTS = """
+INSERT INTO cluster_events (
+    cluster_id,
+    client_id,
+    actor_role,
+    event_type,
+    message,
+    event_at
+)
+SELECT ev.cluster_id, ev.client_id, ev.actor_role, ev.event_type, ev.message, ev.event_at
+FROM stage_events AS ev
+JOIN (SELECT id, max(ord) AS ord FROM stage_clusters GROUP BY id) AS latest
+    ON latest.id = ev.cluster_id AND latest.ord = ev.ord
+ORDER BY ev.ord, ev.seq
+"""
+
+MERGE_DELETE_TERMS = _record_facet_delta(
+    """DELETE FROM cluster_terms AS t
+USING (SELECT DISTINCT id FROM stage_clusters) AS s
+WHERE t.cluster_id = s.id""",
+    "-",
+)
+
+MERGE_INSERT_TERMS = _record_facet_delta(
+    f"""INSERT INTO cluster_terms ({_TERMS_COLUMNS})
+{_TERMS_SELECT}
+JOIN (SELECT DISTINCT id FROM stage_clusters) AS s ON s.id = c.id
+WHERE jsonb_typeof(c.codified_data) = 'object'""",
+    "",
+)
+
+# --- Delta mode: compare fingerprints before staging anything ---
+
+SELECT_FINGERPRINTS = "SELECT id::text, content_fingerprint FROM clusters WHERE id = ANY(%(ids)s)"
+
+COMPARE_CHANGED = """
+SELECT
+    c.id::text,
+    c.text_content = s.text_content AND c.embedding_model = %(embedding_model)s AS same_embedding_input,
+    c.query_history IS NOT DISTINCT FROM s.query_history::jsonb AS same_history
+FROM unnest(%(ids)s::uuid[], %(texts)s::text[], %(histories)s::text[]) AS s(id, text_content, query_history)
+JOIN clusters AS c ON c.id = s.id
+"""
+
+PROMPT_VERSION = "phase0-prompt-v1"
+
+
+@dataclass
+class IngestStats:
+    rows_read: int = 0
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    re_embedded: int = 0
+    events_rewritten: int = 0
+
+    def add(self, other: "IngestStats") -> None:
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+    def summary(self) -> str:
+        return ", ".join(f"{f.name}={getattr(self, f.name)}" for f in fields(self))
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Ingest mock cluster CSV into Postgres")
     parser.add_argument("--csv", required=True, help="Path to mock CSV")
     parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--mode",
+        choices=["copy", "delta", "rows"],
+        default="copy",
+        help=(
+            "copy: binary COPY + set-based merge, committed per batch; "
+            "delta: like copy but skips unchanged clusters by content fingerprint; "
+            "rows: one statement per row"
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Shard rows by cluster id across N processes, each with its own ingest connection",
+    )
+    parser.add_argument("--max-retries", type=int, default=3, help="Retries per shard batch on transient DB errors")
+    parser.add_argument(
+        "--client-indexes",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Create a partial HNSW index for every ingested client that does not have one yet",
+    )
     return parser.parse_args()
 
 
+def iter_batches(rows: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    """Yield lists of at most ``size`` rows without materialising the input."""
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _canonical_json(raw: str) -> str:
+    return json.dumps(json.loads(raw), sort_keys=True, separators=(",", ":"), ensure_ascii=False) if raw else ""
+
+
+def content_fingerprint(row: dict) -> str:
+    """Hash of everything that ends up in a ``clusters`` row for this CSV row."""
+    parts = [
+        EMBEDDING_MODEL,
+        row["client_id"],
+        row["text_content"],
+        _canonical_json(row["codified_data"]),
+        _canonical_json(row["query_history"]),
+        str(int(row["doc_count"])),
+        row["last_updated"],
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
 def to_event_rows(cluster_id: str, client_id: str, history: list[dict]) -> list[dict]:
     event_rows: list[dict] = []
     for entry in history:
@@ -104,44 +445,341 @@ def to_event_rows(cluster_id: str, client_id: str, history: list[dict]) -> list[
     return event_rows
 
 
-def main() -> None:
-    args = parse_args()
+def ingest_batch_rows(cur, batch: list[dict]) -> IngestStats:
+    stats = IngestStats(rows_read=len(batch), re_embedded=len(batch), events_rewritten=len(batch))
+    embeddings = embed_batch([row["text_content"] for row in batch])
+    for row, embedding in zip(batch, embeddings, strict=True):
+        cur.execute(
+            UPSERT_CLUSTER,
+            {
+                "id": row["id"],
+                "client_id": row["client_id"],
+                "text_content": row["text_content"],
+                "codified_data": row["codified_data"],
+                "query_history": row["query_history"],
+                "doc_count": int(row["doc_count"]),
+                "embedding": embedding,
+                "embedding_model": EMBEDDING_MODEL,
+                "embedding_dim": EMBEDDING_DIM,
+                "prompt_version": PROMPT_VERSION,
+                "last_updated": row["last_updated"],
+                "content_fingerprint": content_fingerprint(row),
+                "ts_config": ts_config_for(row["text_content"]),
+            },
+        )
+        if cur.fetchone()[0]:
+            stats.inserted += 1
+        else:
+            stats.updated += 1
 
-    with open(args.csv, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
+        cur.execute(DELETE_TERMS, {"cluster_id": row["id"]})
+        cur.execute(INSERT_TERMS, {"cluster_id": row["id"]})
 
-    with get_ingest_conn() as conn:
-        with conn.cursor() as cur:
-            for i in range(0, len(rows), args.batch_size):
-                batch = rows[i : i + args.batch_size]
-                for row in batch:
-                    embedding = embed_text(row["text_content"])
-                    cur.execute(
-                        UPSERT_CLUSTER,
-                        {
-                            "id": row["id"],
-                            "client_id": row["client_id"],
-                            "text_content": row["text_content"],
-                            "codified_data": row["codified_data"],
-                            "query_history": row["query_history"],
-                            "doc_count": int(row["doc_count"]),
-                            "embedding": to_pgvector_literal(embedding),
-                            "embedding_model": "phase0-hash-v1",
-                            "embedding_dim": 384,
-                            "prompt_version": "phase0-prompt-v1",
-                            "last_updated": row["last_updated"],
-                        },
+        history = json.loads(row["query_history"])
+        cur.execute(DELETE_EVENTS, {"cluster_id": row["id"]})
+        for event in to_event_rows(row["id"], row["client_id"], history):
+            cur.execute(INSERT_EVENT, event)
+    cur.execute(APPLY_FACET_DELTAS)
+    cur.execute(PRUNE_FACETS)
+    cur.execute(CLEAR_FACET_DELTAS)
+    return stats
+
+
+def stage_and_merge(
+    cur,
+    rows: list[dict],
+    embeddings: list,
+    rewrite_events: list[bool],
+) -> tuple[int, int]:
+    """COPY ``rows`` into the staging tables and merge them. Returns (inserted, updated).
+
+    ``embeddings[i]`` may be None to keep the stored vector; events are only
+    staged and rewritten where ``rewrite_events[i]`` is true.
+    """
+    with cur.copy(COPY_STAGE_CLUSTERS) as copy:
+        copy.set_types(STAGE_CLUSTER_TYPES)
+        for ord_, (row, embedding, rewrite) in enumerate(zip(rows, embeddings, rewrite_events, strict=True)):
+            copy.write_row(
+                (
+                    ord_,
+                    uuid.UUID(row["id"]),
+                    row["client_id"],
+                    row["text_content"],
+                    row["codified_data"],
+                    row["query_history"],
+                    int(row["doc_count"]),
+                    embedding,
+                    datetime.fromisoformat(row["last_updated"]) if row["last_updated"] else None,
+                    content_fingerprint(row),
+                    ts_config_for(row["text_content"]),
+                    rewrite,
+                )
+            )
+
+    with cur.copy(COPY_STAGE_EVENTS) as copy:
+        copy.set_types(STAGE_EVENT_TYPES)
+        for ord_, (row, rewrite) in enumerate(zip(rows, rewrite_events, strict=True)):
+            if not rewrite:
+                continue
+            history = json.loads(row["query_history"])
+            for seq, event in enumerate(to_event_rows(row["id"], row["client_id"], history)):
+                copy.write_row(
+                    (
+                        ord_,
+                        seq,
+                        uuid.UUID(event["cluster_id"]),
+                        event["client_id"],
+                        event["actor_role"],
+                        event["event_type"],
+                        event["message"],
+                        event["event_at"],
                     )
+                )
+
+    cur.execute(
+        MERGE_CLUSTERS,
+        {
+            "embedding_model": EMBEDDING_MODEL,
+            "embedding_dim": EMBEDDING_DIM,
+            "prompt_version": PROMPT_VERSION,
+        },
+    )
+    inserted, updated = cur.fetchone()
+    cur.execute(MERGE_DELETE_TERMS)
+    cur.execute(MERGE_INSERT_TERMS)
+    cur.execute(APPLY_FACET_DELTAS)
+    cur.execute(PRUNE_FACETS)
+    cur.execute(CLEAR_FACET_DELTAS)
+    cur.execute(MERGE_DELETE_EVENTS)
+    cur.execute(MERGE_INSERT_EVENTS)
+    return inserted, updated
+
+
+def ingest_batch_copy(cur, batch: list[dict]) -> IngestStats:
+    embeddings = list(embed_batch([row["text_content"] for row in batch]))
+    inserted, updated = stage_and_merge(cur, batch, embeddings, [True] * len(batch))
+    return IngestStats(
+        rows_read=len(batch),
+        inserted=inserted,
+        updated=updated,
+        re_embedded=len(batch),
+        events_rewritten=inserted + updated,
+    )
+
+
+def ingest_batch_delta(cur, batch: list[dict]) -> IngestStats:
+    """Stage only new or changed clusters; re-embed only on text (or model) changes."""
+    latest: dict[str, dict] = {}
+    for row in batch:
+        latest[str(uuid.UUID(row["id"]))] = row
+    ids = list(latest)
+
+    cur.execute(SELECT_FINGERPRINTS, {"ids": [uuid.UUID(i) for i in ids]})
+    stored = dict(cur.fetchall())
 
-                    history = json.loads(row["query_history"])
-                    cur.execute(DELETE_EVENTS, {"cluster_id": row["id"]})
-                    for event in to_event_rows(row["id"], row["client_id"], history):
-                        cur.execute(INSERT_EVENT, event)
+    new_ids = [i for i in ids if i not in stored]
+    changed_ids = [i for i in ids if i in stored and stored[i] != content_fingerprint(latest[i])]
 
+    same_embedding_input: dict[str, bool] = {}
+    same_history: dict[str, bool] = {}
+    if changed_ids:
+        cur.execute(
+            COMPARE_CHANGED,
+            {
+                "ids": [uuid.UUID(i) for i in changed_ids],
+                "texts": [latest[i]["text_content"] for i in changed_ids],
+                "histories": [latest[i]["query_history"] for i in changed_ids],
+                "embedding_model": EMBEDDING_MODEL,
+            },
+        )
+        for cluster_id, same_input, same_hist in cur.fetchall():
+            same_embedding_input[cluster_id] = same_input
+            same_history[cluster_id] = same_hist
+
+    stats = IngestStats(rows_read=len(batch), skipped=len(batch) - len(new_ids) - len(changed_ids))
+    staged_ids = new_ids + changed_ids
+    if not staged_ids:
+        return stats
+
+    to_embed = [i for i in staged_ids if not same_embedding_input.get(i, False)]
+    vectors = dict(zip(to_embed, embed_batch([latest[i]["text_content"] for i in to_embed]), strict=True))
+    rewrite = [not same_history.get(i, False) for i in staged_ids]
+
+    inserted, updated = stage_and_merge(
+        cur,
+        [latest[i] for i in staged_ids],
+        [vectors.get(i) for i in staged_ids],
+        rewrite,
+    )
+    stats.inserted = inserted
+    stats.updated = updated
+    stats.re_embedded = len(to_embed)
+    stats.events_rewritten = sum(rewrite)
+    return stats
+
+
+INGEST_BATCH = {"copy": ingest_batch_copy, "delta": ingest_batch_delta, "rows": ingest_batch_rows}
+
+
+def run_serial(args: argparse.Namespace) -> IngestStats:
+    stats = IngestStats()
+    ingest_batch = INGEST_BATCH[args.mode]
+
+    with open(args.csv, "r", encoding="utf-8", newline="") as f, get_ingest_conn() as conn:
+        reader = csv.DictReader(f)
+        with conn.cursor() as cur:
+            # Row mode only needs facet_deltas, but the staging tables are cheap to create.
+            cur.execute(CREATE_STAGING)
             conn.commit()
 
-    print(f"Ingested {len(rows)} rows from {args.csv}")
+            for batch in iter_batches(reader, args.batch_size):
+                stats.add(ingest_batch(cur, batch))
+                if args.mode != "rows":
+                    conn.commit()
+
+            conn.commit()
+    return stats
+
+
+# --- Sharded multi-process ingest ---
+
+
+def shard_for(cluster_id: str, workers: int) -> int:
+    """Stable shard: every occurrence of a cluster id goes to the same worker, in input order."""
+    return uuid.UUID(cluster_id).int % workers
+
+
+def split_batch(batch: list[dict], workers: int) -> dict[int, list[dict]]:
+    """Rows of ``batch`` per shard, each shard's rows in input order."""
+    shards: dict[int, list[dict]] = {}
+    for row in batch:
+        shards.setdefault(shard_for(row["id"], workers), []).append(row)
+    return shards
+
+
+def shard_worker(shard: int, mode: str, max_retries: int, inbox, outbox) -> None:
+    """Commit each received batch on this process's own ingest connection.
+
+    Transient errors (connection loss, deadlocks, serialization failures)
+    roll the batch back and retry it with exponential backoff. A batch that
+    fails otherwise is reported and stops the worker.
+    """
+    ingest_batch = INGEST_BATCH[mode]
+    while (item := inbox.get()) is not None:
+        batch_no, batch = item
+        for attempt in range(max_retries + 1):
+            try:
+                with get_ingest_conn() as conn, conn.cursor() as cur:
+                    cur.execute(CREATE_STAGING)
+                    stats = ingest_batch(cur, batch)
+                    conn.commit()
+                outbox.put((batch_no, shard, stats, None))
+                break
+            except psycopg.OperationalError as exc:
+                if attempt == max_retries:
+                    outbox.put((batch_no, shard, None, f"{type(exc).__name__}: {exc}"))
+                    return
+                time.sleep(0.5 * 2**attempt)
+            except (psycopg.Error, ValueError, KeyError) as exc:
+                # A rejected statement or a malformed row: retrying cannot help.
+                outbox.put((batch_no, shard, None, f"{type(exc).__name__}: {exc}"))
+                return
+
+
+def run_sharded(args: argparse.Namespace) -> IngestStats:
+    """Route rows to per-shard worker processes and report progress in input order."""
+    ctx = multiprocessing.get_context("spawn")
+    outbox = ctx.Queue()
+    inboxes = [ctx.Queue(maxsize=2) for _ in range(args.workers)]
+    workers = [
+        ctx.Process(target=shard_worker, args=(i, args.mode, args.max_retries, inboxes[i], outbox), daemon=True)
+        for i in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    stats = IngestStats()
+    pending: dict[int, int] = {}
+    partial: dict[int, IngestStats] = {}
+    next_report = 0
+    started = time.perf_counter()
+
+    def handle(result) -> None:
+        nonlocal next_report
+        batch_no, shard, batch_stats, error = result
+        if error:
+            for worker in workers:
+                worker.terminate()
+            raise SystemExit(f"Shard {shard} failed on batch {batch_no}: {error}")
+        partial[batch_no].add(batch_stats)
+        pending[batch_no] -= 1
+        while pending.get(next_report) == 0:
+            done = partial.pop(next_report)
+            del pending[next_report]
+            stats.add(done)
+            rate = stats.rows_read / max(time.perf_counter() - started, 1e-9)
+            print(f"  batch {next_report}: {done.rows_read} rows committed ({stats.rows_read} total, {rate:,.0f} rows/s)")
+            next_report += 1
+
+    def drain(block: bool = False) -> None:
+        try:
+            handle(outbox.get(block=block, timeout=5 if block else None))
+            while True:
+                handle(outbox.get_nowait())
+        except queue.Empty:
+            pass
+
+    with open(args.csv, "r", encoding="utf-8", newline="") as f:
+        for batch_no, batch in enumerate(iter_batches(csv.DictReader(f), args.batch_size)):
+            shards = split_batch(batch, args.workers)
+            pending[batch_no] = len(shards)
+            partial[batch_no] = IngestStats()
+            for shard, rows in shards.items():
+                while True:
+                    drain()
+                    try:
+                        inboxes[shard].put((batch_no, rows), timeout=1)
+                        break
+                    except queue.Full:
+                        if not workers[shard].is_alive():
+                            drain()
+                            raise SystemExit(f"Shard {shard} exited (code {workers[shard].exitcode})") from None
+
+    for inbox in inboxes:
+        inbox.put(None)
+    while pending:
+        if not any(worker.is_alive() for worker in workers) and outbox.empty():
+            raise SystemExit("Ingest workers exited before all batches were committed")
+        drain(block=True)
+    for worker in workers:
+        worker.join()
+    return stats
+
+
+def ensure_client_indexes() -> list[str]:
+    """Build missing per-client partial HNSW indexes (see 007_client_hnsw_indexes.sql)."""
+    with get_ingest_conn() as conn, conn.cursor() as cur:
+        cur.execute("SELECT DISTINCT client_id FROM clusters ORDER BY client_id")
+        client_ids = [row[0] for row in cur.fetchall()]
+        indexes = []
+        for client_id in client_ids:
+            # One call per statement: CREATE INDEX cannot run while clusters is being scanned.
+            cur.execute("SELECT ensure_client_hnsw_index(%s)", (client_id,))
+            indexes.append(f"{client_id}: {cur.fetchone()[0]}")
+        conn.commit()
+    return indexes
+
+
+def main() -> None:
+    args = parse_args()
+    started = time.perf_counter()
+    stats = run_sharded(args) if args.workers > 1 else run_serial(args)
+    elapsed = time.perf_counter() - started
+    print(f"Ingested {stats.rows_read} rows from {args.csv} in {elapsed:.1f}s ({args.mode} mode)")
+    print(f"  {stats.summary()}")
+    if args.client_indexes:
+        for line in ensure_client_indexes():
+            print(f"  index {line}")
 
 
 if __name__ == "__main__":
@@ -10,13 +10,15 @@ import sys
 from pathlib import Path
 
 import psycopg
+from pgvector.psycopg import register_vector
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from app.config import settings
-from app.embeddings import embed_text, to_pgvector_literal
+from app.embeddings import EMBEDDING_DIM, EMBEDDING_MODEL, embed_batch
+from app.language import ts_config_for
 
 SCHEMA_SQL = """
 -- Extensions
@@ -37,6 +39,34 @@ CREATE TABLE IF NOT EXISTS clusters (
     prompt_version TEXT NOT NULL DEFAULT 'phase0-prompt-v1',
     last_updated TIMESTAMPTZ
 );
+ALTER TABLE clusters ADD COLUMN IF NOT EXISTS content_fingerprint TEXT;
+ALTER TABLE clusters ADD COLUMN IF NOT EXISTS ingested_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+ALTER TABLE clusters ADD COLUMN IF NOT EXISTS ts_config REGCONFIG NOT NULL DEFAULT 'simple';
+ALTER TABLE clusters ADD COLUMN IF NOT EXISTS search_tsv TSVECTOR
+    GENERATED ALWAYS AS (to_tsvector(ts_config, text_content)) STORED;
+
+CREATE TABLE IF NOT EXISTS cluster_terms (
+    cluster_id UUID NOT NULL REFERENCES clusters(id) ON DELETE CASCADE,
+    client_id VARCHAR(50) NOT NULL,
+    term_lc TEXT NOT NULL,
+    attribute_lc TEXT,
+    value TEXT,
+    term TEXT,
+    attribute TEXT
+);
+ALTER TABLE cluster_terms ADD COLUMN IF NOT EXISTS term TEXT;
+ALTER TABLE cluster_terms ADD COLUMN IF NOT EXISTS attribute TEXT;
+
+CREATE TABLE IF NOT EXISTS term_facets (
+    client_id VARCHAR(50) NOT NULL,
+    term_lc TEXT NOT NULL,
+    attribute_lc TEXT,
+    value TEXT,
+    term TEXT,
+    attribute TEXT,
+    cluster_count INTEGER NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
 
 CREATE TABLE IF NOT EXISTS cluster_events (
     event_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -68,30 +98,93 @@ CREATE TABLE IF NOT EXISTS audit_logs (
 -- Indexes
 CREATE INDEX IF NOT EXISTS idx_clusters_client_id ON clusters (client_id);
 CREATE INDEX IF NOT EXISTS idx_clusters_last_updated ON clusters (last_updated DESC);
+CREATE INDEX IF NOT EXISTS idx_clusters_ingested_at_id ON clusters (ingested_at, id);
+DROP INDEX IF EXISTS idx_clusters_ingested_at;
 CREATE INDEX IF NOT EXISTS idx_clusters_embedding_hnsw
     ON clusters USING hnsw (embedding vector_cosine_ops);
+CREATE INDEX IF NOT EXISTS idx_clusters_search_tsv ON clusters USING gin (search_tsv);
 CREATE INDEX IF NOT EXISTS idx_clusters_codified_data_gin
     ON clusters USING gin (codified_data jsonb_path_ops);
+CREATE INDEX IF NOT EXISTS idx_cluster_terms_client_term ON cluster_terms (client_id, term_lc, attribute_lc);
+CREATE INDEX IF NOT EXISTS idx_cluster_terms_client_attribute ON cluster_terms (client_id, attribute_lc);
+CREATE INDEX IF NOT EXISTS idx_cluster_terms_cluster ON cluster_terms (cluster_id, term_lc, attribute_lc);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_term_facets_key
+    ON term_facets (client_id, term_lc, attribute_lc, value) NULLS NOT DISTINCT;
 CREATE INDEX IF NOT EXISTS idx_cluster_events_cluster ON cluster_events (cluster_id);
 CREATE INDEX IF NOT EXISTS idx_cluster_events_client ON cluster_events (client_id);
 CREATE INDEX IF NOT EXISTS idx_audit_logs_client_created ON audit_logs (client_id, created_at DESC);
+
+-- Per-client partial HNSW indexes (see db/init/007_client_hnsw_indexes.sql)
+CREATE OR REPLACE FUNCTION ensure_client_hnsw_index(p_client_id TEXT)
+RETURNS TEXT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    index_name TEXT := format(
+        'idx_clusters_hnsw_%s_%s',
+        left(regexp_replace(lower(p_client_id), '[^a-z0-9]+', '_', 'g'), 32),
+        left(md5(p_client_id), 8)
+    );
+BEGIN
+    IF to_regclass(index_name) IS NULL THEN
+        EXECUTE format(
+            'CREATE INDEX %I ON clusters USING hnsw (embedding vector_cosine_ops) WHERE client_id = %L',
+            index_name,
+            p_client_id
+        );
+    END IF;
+    RETURN index_name;
+END $$;
 """
 
 UPSERT_CLUSTER = """
 INSERT INTO clusters (
     id, client_id, text_content, codified_data, query_history,
-    doc_count, embedding, embedding_model, embedding_dim, prompt_version, last_updated
+    doc_count, embedding, embedding_model, embedding_dim, prompt_version, last_updated, ts_config
 ) VALUES (
     %(id)s, %(client_id)s, %(text_content)s, %(codified_data)s::jsonb,
-    %(query_history)s::jsonb, %(doc_count)s, %(embedding)s::vector,
-    %(embedding_model)s, %(embedding_dim)s, %(prompt_version)s, %(last_updated)s
+    %(query_history)s::jsonb, %(doc_count)s, %(embedding)b,
+    %(embedding_model)s, %(embedding_dim)s, %(prompt_version)s, %(last_updated)s,
+    %(ts_config)s::regconfig
 )
 ON CONFLICT (id) DO UPDATE SET
     text_content = EXCLUDED.text_content,
     codified_data = EXCLUDED.codified_data,
     query_history = EXCLUDED.query_history,
     embedding = EXCLUDED.embedding,
-    last_updated = EXCLUDED.last_updated
+    last_updated = EXCLUDED.last_updated,
+    ts_config = EXCLUDED.ts_config,
+    ingested_at = NOW()
+"""
+
+# Rebuild structured-search keys and facet counts from codified_data
+# (see db/init/008_cluster_terms.sql and 009_term_facets.sql)
+REBUILD_TERMS = """
+DELETE FROM cluster_terms;
+INSERT INTO cluster_terms (cluster_id, client_id, term_lc, attribute_lc, value, term, attribute)
+SELECT
+    c.id,
+    c.client_id,
+    lower(kv.key),
+    lower(attr.key),
+    CASE WHEN attr.key IS NULL THEN kv.value #>> '{}' ELSE attr.value END,
+    kv.key,
+    attr.key
+FROM clusters AS c
+CROSS JOIN LATERAL jsonb_each(c.codified_data) AS kv
+LEFT JOIN LATERAL jsonb_each_text(CASE WHEN jsonb_typeof(kv.value) = 'object' THEN kv.value END) AS attr ON true
+WHERE jsonb_typeof(c.codified_data) = 'object';
+
+DELETE FROM term_facets;
+INSERT INTO term_facets (client_id, term_lc, attribute_lc, value, term, attribute, cluster_count)
+SELECT client_id, term_lc, COALESCE(attribute_lc, ''), COALESCE(value, ''),
+       min(term), min(attribute), count(DISTINCT cluster_id)
+FROM cluster_terms
+GROUP BY 1, 2, 3, 4
+UNION ALL
+SELECT client_id, term_lc, NULL, NULL, min(term), NULL, count(DISTINCT cluster_id)
+FROM cluster_terms
+GROUP BY 1, 2;
 """
 
 INSERT_EVENT = """
@@ -111,9 +204,9 @@ def seed_data(conn) -> int:
     with csv_path.open("r", encoding="utf-8") as f:
         rows = list(csv.DictReader(f))
 
+    embeddings = embed_batch([row["text_content"] for row in rows])
     with conn.cursor() as cur:
-        for row in rows:
-            embedding = embed_text(row["text_content"])
+        for row, embedding in zip(rows, embeddings, strict=True):
             cur.execute(UPSERT_CLUSTER, {
                 "id": row["id"],
                 "client_id": row["client_id"],
@@ -121,11 +214,12 @@ def seed_data(conn) -> int:
                 "codified_data": row["codified_data"],
                 "query_history": row["query_history"],
                 "doc_count": int(row["doc_count"]),
-                "embedding": to_pgvector_literal(embedding),
-                "embedding_model": "phase0-hash-v1",
-                "embedding_dim": 384,
+                "embedding": embedding,
+                "embedding_model": EMBEDDING_MODEL,
+                "embedding_dim": EMBEDDING_DIM,
                 "prompt_version": "phase0-prompt-v1",
                 "last_updated": row["last_updated"],
+                "ts_config": ts_config_for(row["text_content"]),
             })
 
             # Seed query history as events
@@ -157,12 +251,23 @@ def main():
         print("  Creating schema + indexes...")
         conn.execute(SCHEMA_SQL)
         conn.commit()
+        register_vector(conn)
 
         # 2. Seed data
         print("  Seeding mock data...")
         count = seed_data(conn)
         print(f"  Seeded {count} clusters.")
 
+        conn.execute(REBUILD_TERMS)
+        conn.commit()
+
+        # 3. Per-client vector indexes
+        print("  Creating per-client HNSW indexes...")
+        client_ids = [row[0] for row in conn.execute("SELECT DISTINCT client_id FROM clusters").fetchall()]
+        for client_id in client_ids:
+            conn.execute("SELECT ensure_client_hnsw_index(%s)", (client_id,))
+        conn.commit()
+
     print("Cloud DB setup complete.")
 
 
@@ -0,0 +1,144 @@
+import json
+import os
+import sys
+import uuid
+from datetime import UTC, datetime
+from pathlib import Path
+
+import numpy as np
+import psycopg
+import pytest
+from pgvector.psycopg import register_vector
+from psycopg.types.json import Jsonb
+
+# Tests import the backend as ``app``, like ``uvicorn app.main:app`` run from backend/.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.embeddings import EMBEDDING_DIM
+from scripts.ingest_mock_csv import CREATE_STAGING, INGEST_BATCH
+
+# Far past anything real ingests stamp, so feed and replica tests only see their own rows.
+TEST_EPOCH = datetime(2100, 1, 1, tzinfo=UTC)
+
+
+@pytest.fixture
+def pg():
+    """A connection to ``TEST_DATABASE_URL``, a database set up from db/init.
+
+    Tests that need Postgres are skipped without one. Everything a test
+    writes is rolled back, so the database may also hold real data.
+    """
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    try:
+        conn = psycopg.connect(url)
+    except psycopg.OperationalError as exc:
+        pytest.skip(f"TEST_DATABASE_URL is unreachable: {exc}")
+    register_vector(conn)
+    try:
+        yield conn
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+@pytest.fixture
+def pg_fetch(pg):
+    """Async stand-ins for the pooled ``_scoped_fetch`` helpers, reading through ``pg``."""
+
+    def make(**cursor_options):
+        async def fetch(query: str, params: dict | None = None) -> list:
+            with pg.cursor(**cursor_options) as cur:
+                cur.execute(query, params)
+                return cur.fetchall()
+
+        return fetch
+
+    return make
+
+
+def unit_vector(seed: int) -> np.ndarray:
+    vector = np.random.default_rng(seed).standard_normal(EMBEDDING_DIM).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture
+def add_cluster(pg):
+    """Insert a cluster row; returns its id."""
+
+    def add(
+        client_id: str,
+        embedding: np.ndarray,
+        *,
+        text: str = "Clause text.",
+        codified_data: dict | None = None,
+        ingested_at: datetime = TEST_EPOCH,
+        ts_config: str = "english",
+        cluster_id: uuid.UUID | None = None,
+    ) -> uuid.UUID:
+        cluster_id = cluster_id or uuid.uuid4()
+        pg.execute(
+            """
+            INSERT INTO clusters (id, client_id, text_content, codified_data, embedding, ingested_at, ts_config)
+            VALUES (%s, %s, %s, %s, %s, %s, %s::regconfig)
+            ON CONFLICT (id) DO UPDATE SET
+                client_id = EXCLUDED.client_id,
+                text_content = EXCLUDED.text_content,
+                codified_data = EXCLUDED.codified_data,
+                embedding = EXCLUDED.embedding,
+                ingested_at = EXCLUDED.ingested_at,
+                ts_config = EXCLUDED.ts_config
+            """,
+            (cluster_id, client_id, text, Jsonb(codified_data or {}), embedding, ingested_at, ts_config),
+        )
+        return cluster_id
+
+    return add
+
+
+@pytest.fixture
+def app_role(pg):
+    """Call to continue the test as the API's role, under its row-level security policies."""
+
+    def switch() -> None:
+        pg.execute("SET LOCAL ROLE contract_ai_app")
+
+    return switch
+
+
+def csv_row(
+    cluster_id: uuid.UUID | str | None = None,
+    *,
+    client_id: str = "Test_A",
+    text: str = "The agreement is governed by English law.",
+    codified_data: dict | None = None,
+    history: list[dict] | None = None,
+    doc_count: int = 1,
+) -> dict:
+    """A row as scripts/ingest_mock_csv.py reads it from the CSV: every value a string."""
+    return {
+        "id": str(cluster_id or uuid.uuid4()),
+        "client_id": client_id,
+        "text_content": text,
+        "codified_data": json.dumps(codified_data or {}),
+        "query_history": json.dumps(history or []),
+        "doc_count": str(doc_count),
+        "last_updated": TEST_EPOCH.isoformat(),
+    }
+
+
+@pytest.fixture
+def ingest(pg):
+    """Call with a mode ("copy", "delta", "rows") and a batch to ingest it through ``pg`` as one commit."""
+    with pg.cursor() as cur:
+        cur.execute(CREATE_STAGING)
+
+    def run(mode: str, batch: list[dict]):
+        with pg.cursor() as cur:
+            stats = INGEST_BATCH[mode](cur, batch)
+            # The staging tables empty on commit, which the rolled-back test transaction never does.
+            cur.execute("TRUNCATE stage_clusters, stage_events, facet_deltas")
+        return stats
+
+    return run
@@ -0,0 +1,166 @@
+import asyncio
+import json
+from datetime import UTC, datetime
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.admission import AdmissionController, AdmissionRejected
+from app.config import settings
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _controller(clock=None, **options) -> AdmissionController:
+    defaults = {"max_concurrent": 1, "max_queue": 100, "queue_budget_ms": 1000, "update_ms": 1}
+    return AdmissionController(**{**defaults, **options}, clock=clock or FakeClock())
+
+
+def test_requests_under_capacity_are_admitted_at_once():
+    async def scenario():
+        controller = _controller(max_concurrent=2)
+        tickets = [controller.enqueue("analyst"), controller.enqueue("analyst")]
+        return controller, tickets
+
+    controller, tickets = asyncio.run(scenario())
+
+    assert all(ticket.granted for ticket in tickets)
+    assert controller.stats()["active"] == 2
+
+
+def test_one_user_flooding_the_queue_does_not_starve_another():
+    async def scenario():
+        controller = _controller()
+        running = controller.enqueue("flood")
+        flood = [controller.enqueue("flood") for _ in range(5)]
+        other = controller.enqueue("other")
+        names = {id(ticket): f"flood{n}" for n, ticket in enumerate(flood)} | {id(other): "other"}
+        positions = {names[id(ticket)]: controller.position(ticket) for ticket in [*flood, other]}
+
+        served = []
+        current = running
+        for _ in range(6):
+            current.release()
+            [current] = [ticket for ticket in [*flood, other] if ticket.granted and not ticket.released]
+            served.append(names[id(current)])
+        return positions, served
+
+    positions, served = asyncio.run(scenario())
+
+    assert positions["other"] == 2
+    assert positions["flood4"] == 6
+    assert served == ["flood0", "other", "flood1", "flood2", "flood3", "flood4"]
+
+
+def test_a_request_waiting_past_the_budget_is_shed():
+    clock = FakeClock()
+
+    async def scenario():
+        controller = _controller(clock)
+        controller.enqueue("analyst")
+        waiting = controller.enqueue("analyst")
+        updates = aiter(waiting.wait())
+        assert await anext(updates) == 1
+        clock.now = 0.5
+        assert await anext(updates) == 1
+        clock.now = 1.001
+        with pytest.raises(AdmissionRejected) as rejected:
+            await anext(updates)
+        return controller, waiting, rejected.value
+
+    controller, waiting, rejected = asyncio.run(scenario())
+
+    assert rejected.reason == "queue_timeout"
+    assert waiting.released
+    assert (controller.shed_timeout, controller.queued) == (1, 0)
+
+
+def test_the_wait_until_admission_is_recorded():
+    clock = FakeClock()
+
+    async def scenario():
+        controller = _controller(clock)
+        running = controller.enqueue("a")
+        waiting = controller.enqueue("b")
+        updates = aiter(waiting.wait())
+        await anext(updates)
+        clock.now = 0.25
+        running.release()
+        assert [position async for position in updates] == []
+        return controller
+
+    controller = asyncio.run(scenario())
+
+    assert controller.stats()["max_wait_ms"] == 250.0
+
+
+def test_a_full_queue_rejects_new_requests():
+    async def scenario():
+        controller = _controller(max_queue=2)
+        controller.enqueue("a")
+        controller.enqueue("a")
+        controller.enqueue("b")
+        with pytest.raises(AdmissionRejected) as rejected:
+            controller.enqueue("c")
+        return controller, rejected.value
+
+    controller, rejected = asyncio.run(scenario())
+
+    assert rejected.reason == "queue_full"
+    assert (controller.shed_queue_full, controller.queued) == (1, 2)
+
+
+# ---------- Streaming endpoint ----------
+
+
+def _events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for frame in body.split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines() if ": " in line)
+        if "event" in lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.mark.parametrize(
+    ("options", "reason"),
+    [({"queue_budget_ms": 0}, "queue_timeout"), ({"max_queue": 0}, "queue_full")],
+)
+def test_shed_requests_stream_the_template_answer(monkeypatch, options, reason):
+    row = {
+        "id": uuid4(),
+        "client_id": "Bank_A",
+        "text_content": "This Agreement is governed by English law.",
+        "codified_data": {"Governing Law": {"Jurisdiction": "England"}},
+        "query_history": [],
+        "doc_count": 1,
+        "last_updated": datetime(2024, 1, 1, tzinfo=UTC),
+        "relevance_score": 1.0,
+    }
+
+    async def structured_search(payload, top_k):
+        return [row], [row], {"mode": "fanout"}
+
+    controller = _controller(**options)
+    controller._active = controller.max_concurrent  # Every generation slot is taken.
+    monkeypatch.setattr(main, "_ado_structured_search", structured_search)
+    monkeypatch.setattr(main, "llm_admission", controller)
+    monkeypatch.setattr(settings, "llm_enabled", True)
+
+    response = TestClient(main.app).post(
+        "/api/chat/structured/stream", json={"term": f"Governing Law {uuid4()}"}, headers={"x-user-id": "analyst"}
+    )
+
+    events = _events(response.text)
+    assert ("queue", {"shed": True, "reason": reason}) in events
+    assert events[-1][0] == "done"
+    assert any(kind == "token" for kind, _ in events)
+    assert controller.stats()["active"] == controller.max_concurrent
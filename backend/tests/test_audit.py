@@ -0,0 +1,155 @@
+import time
+from contextlib import contextmanager
+
+import psycopg
+import pytest
+
+from app import audit
+from app.audit import AuditWriter
+
+
+def _event(client_id: str = "Test_A", endpoint: str = "/api/search") -> dict:
+    return {
+        "client_id": client_id,
+        "user_id": "audit-test",
+        "endpoint": endpoint,
+        "query_text": "governing law",
+        "result_count": 1,
+        "evidence_found": True,
+        "top_score": 0.8,
+        "status_code": 200,
+        "response_time_ms": 12,
+    }
+
+
+def _writer(**options) -> AuditWriter:
+    defaults = {
+        "max_queue": 100,
+        "batch_size": 50,
+        "flush_interval_ms": 60_000,
+        "enqueue_timeout_ms": 10,
+        "late_threshold_ms": 60_000,
+    }
+    return AuditWriter(**{**defaults, **options})
+
+
+class _Connection:
+    """The test connection as the API role, recording each scope set; commits are left to the test's rollback."""
+
+    def __init__(self, pg) -> None:
+        self.pg = pg
+        self.scopes: list[str] = []
+
+    @contextmanager
+    def cursor(self):
+        yield self
+
+    def execute(self, query: str, params=None) -> None:
+        if "app.current_client" in query:
+            self.scopes.append(params[0])
+        self.pg.execute(query, params)
+
+    def commit(self) -> None:
+        pass
+
+
+@pytest.fixture
+def audit_conn(pg, app_role, monkeypatch):
+    app_role()
+    conn = _Connection(pg)
+
+    @contextmanager
+    def get_app_conn(timeout=None):
+        yield conn
+
+    monkeypatch.setattr(audit, "get_app_conn", get_app_conn)
+    return conn
+
+
+def _written(pg) -> list[tuple[str, str]]:
+    pg.execute("RESET ROLE")
+    rows = pg.execute(
+        "SELECT client_id, endpoint FROM audit_logs WHERE user_id = 'audit-test' ORDER BY audit_id"
+    ).fetchall()
+    return [tuple(row) for row in rows]
+
+
+def test_a_batch_writes_one_statement_per_client(pg, audit_conn):
+    writer = _writer()
+    for client_id in ["Test_B", "Test_A", "Test_B", "ALL_BANKS"]:
+        assert writer.submit(**_event(client_id))
+
+    writer.start()
+    writer.stop()
+
+    # Each group is inserted under its own client scope, as the RLS insert policy requires.
+    assert audit_conn.scopes == ["ALL_BANKS", "Test_A", "Test_B"]
+    assert sorted(_written(pg)) == sorted(
+        [("Test_B", "/api/search"), ("Test_A", "/api/search"), ("Test_B", "/api/search"), ("ALL_BANKS", "/api/search")]
+    )
+    assert (writer.batches, writer.written, writer.failed) == (1, 4, 0)
+
+
+def test_stop_drains_the_queue_in_batches(pg, audit_conn):
+    writer = _writer(batch_size=2, late_threshold_ms=0)
+    for n in range(5):
+        writer.submit(**_event(endpoint=f"/api/{n}"))
+
+    writer.start()
+    writer.stop()
+
+    assert [endpoint for _, endpoint in _written(pg)] == [f"/api/{n}" for n in range(5)]
+    assert writer.stats() | {"queued": 0} == {
+        "queued": 0,
+        "max_queue": 100,
+        "enqueued": 5,
+        "written": 5,
+        "batches": 3,
+        "dropped": 0,
+        "failed": 0,
+        "late": 5,
+    }
+
+
+def test_events_are_flushed_after_the_interval_without_a_full_batch(pg, audit_conn):
+    writer = _writer(flush_interval_ms=20)
+    writer.start()
+    writer.submit(**_event())
+
+    for _ in range(100):
+        if writer.written:
+            break
+        time.sleep(0.01)
+    writer.stop()
+
+    assert (writer.written, writer.batches) == (1, 1)
+
+
+def test_a_full_queue_drops_events_and_counts_them():
+    writer = _writer(max_queue=2, enqueue_timeout_ms=20)
+    assert writer.submit_nowait(**_event())
+    assert writer.submit(**_event())
+
+    assert writer.submit_nowait(**_event()) is False
+    started = time.perf_counter()
+    assert writer.submit(**_event()) is False
+
+    assert time.perf_counter() - started >= 0.02
+    assert (writer.enqueued, writer.dropped) == (2, 2)
+
+
+def test_a_failed_flush_counts_its_events_as_failed(monkeypatch):
+    @contextmanager
+    def get_app_conn(timeout=None):
+        raise psycopg.OperationalError("connection refused")
+        yield
+
+    monkeypatch.setattr(audit, "get_app_conn", get_app_conn)
+    writer = _writer()
+    for _ in range(3):
+        writer.submit(**_event())
+
+    writer.start()
+    writer.stop()
+
+    assert (writer.written, writer.failed, writer.batches) == (0, 3, 0)
@@ -0,0 +1,171 @@
+import asyncio
+from datetime import timedelta
+
+from conftest import TEST_EPOCH, unit_vector
+from psycopg.rows import dict_row
+
+from app.catalog import FacetCatalog
+from app.change_feed import ClusterChangeFeed
+from app.config import settings
+
+
+def _facet(client_id, term, attribute=None, value=None, count=1):
+    """A term_facets row: no attribute and value is the term total; attribute "" is a value held directly."""
+    return {
+        "client_id": client_id,
+        "term_lc": term.lower(),
+        "attribute_lc": attribute.lower() if attribute else attribute,
+        "value": value,
+        "term": term,
+        "attribute": attribute or None,
+        "cluster_count": count,
+    }
+
+
+FACETS = [
+    _facet("Bank_A", "Governing Law", count=3),
+    _facet("Bank_A", "Governing Law", "Jurisdiction", "England", count=2),
+    _facet("Bank_A", "Governing Law", "Jurisdiction", "France", count=1),
+    _facet("Bank_B", "Governing Law", count=4),
+    _facet("Bank_B", "Governing Law", "Jurisdiction", "England", count=4),
+    _facet("Bank_A", "Confidentiality", count=1),
+    _facet("Bank_A", "Confidentiality", "", "Mutual", count=1),
+    _facet("Bank_B", "Governing Language", count=2),
+    _facet("Bank_B", "Governing Language", "Language", "English", count=2),
+    _facet("Bank_C", "Set-off", count=9),
+]
+
+
+def _catalog(rows=FACETS) -> FacetCatalog:
+    catalog = FacetCatalog()
+    catalog._rows = list(rows)
+    return catalog
+
+
+def test_view_merges_counts_across_banks():
+    view = _catalog().view(["Bank_A", "Bank_B"])
+
+    assert [term["term"] for term in view] == ["Governing Law", "Governing Language", "Confidentiality"]
+    law = view[0]
+    assert (law["clusters"], law["by_client"]) == (7, {"Bank_A": 3, "Bank_B": 4})
+    [jurisdiction] = law["attributes"]
+    assert jurisdiction["by_client"] == {"Bank_A": 3, "Bank_B": 4}
+    assert [(v["value"], v["clusters"], v["by_client"]) for v in jurisdiction["values"]] == [
+        ("England", 6, {"Bank_A": 2, "Bank_B": 4}),
+        ("France", 1, {"Bank_A": 1}),
+    ]
+    assert [(v["value"], v["clusters"]) for v in view[2]["values"]] == [("Mutual", 1)]
+
+
+def test_view_is_limited_to_the_given_banks():
+    catalog = _catalog()
+
+    assert [term["term"] for term in catalog.view(["Bank_C"])] == ["Set-off"]
+    assert catalog.view(["Bank_B", "Bank_A"]) is catalog.view(["Bank_A", "Bank_B"])
+    assert catalog.view(["Bank_X"]) == []
+
+
+def test_query_by_term_is_case_insensitive():
+    terms = _catalog().query(["Bank_A", "Bank_B"], term="GOVERNING LAW")
+
+    assert [term["term"] for term in terms] == ["Governing Law"]
+
+
+def test_query_q_matches_term_names_by_prefix_or_substring():
+    catalog = _catalog()
+
+    assert [t["term"] for t in catalog.query(["Bank_A", "Bank_B"], q="gov")] == [
+        "Governing Law",
+        "Governing Language",
+    ]
+    assert [t["term"] for t in catalog.query(["Bank_A", "Bank_B"], q="dential")] == ["Confidentiality"]
+
+
+def test_query_q_keeps_only_matching_attributes_of_other_terms():
+    [term] = _catalog().query(["Bank_A", "Bank_B"], q="jurisd")
+
+    assert term["term"] == "Governing Law"
+    assert [a["attribute"] for a in term["attributes"]] == ["Jurisdiction"]
+
+
+def test_query_limit_and_values_flag():
+    catalog = _catalog()
+
+    assert [t["term"] for t in catalog.query(["Bank_A", "Bank_B"], limit=2)] == [
+        "Governing Law",
+        "Governing Language",
+    ]
+    [law] = catalog.query(["Bank_A", "Bank_B"], term="governing law", include_values=False)
+    assert law["values"] == []
+    assert "values" not in law["attributes"][0]
+    # The cached view keeps its values.
+    assert catalog.view(["Bank_A", "Bank_B"])[0]["attributes"][0]["values"]
+
+
+def test_invalidate_reloads_in_the_background_and_coalesces_bursts(monkeypatch):
+    catalog = _catalog()
+    loads = []
+
+    async def refresh():
+        loads.append(len(loads))
+        await asyncio.sleep(0)
+        catalog._rows, catalog._views = [_facet("Bank_A", "Termination", count=5)], {}
+
+    monkeypatch.setattr(catalog, "refresh", refresh)
+    assert catalog.view(["Bank_A"])[0]["term"] == "Governing Law"
+
+    async def burst():
+        for _ in range(5):
+            catalog.invalidate([{"id": "x"}])
+        await catalog._task
+
+    asyncio.run(burst())
+
+    assert len(loads) == 1
+    assert [term["term"] for term in catalog.view(["Bank_A"])] == ["Termination"]
+
+
+def test_failed_reload_is_counted_and_keeps_the_old_facets(monkeypatch):
+    catalog = _catalog()
+
+    async def refresh():
+        raise OSError("connection lost")
+
+    monkeypatch.setattr(catalog, "refresh", refresh)
+
+    async def invalidate():
+        catalog.invalidate([{"id": "x"}])
+        await catalog._task
+
+    asyncio.run(invalidate())
+
+    assert catalog.errors == 1
+    assert catalog.view(["Bank_C"])[0]["term"] == "Set-off"
+
+
+def test_clusters_ingested_during_the_first_load_trigger_a_reload(pg, pg_fetch, add_cluster, monkeypatch):
+    monkeypatch.setattr(settings, "allowed_clients", "Test_A")
+    feed = ClusterChangeFeed(interval_seconds=30, overlap_seconds=300)
+    monkeypatch.setattr(feed, "_scoped_fetch", pg_fetch(row_factory=dict_row))
+    catalog = FacetCatalog()
+    loads = []
+
+    async def refresh():
+        loads.append(len(loads))
+
+    monkeypatch.setattr(catalog, "refresh", refresh)
+    feed.subscribe(catalog.invalidate)
+    add_cluster("Test_A", unit_vector(1), ingested_at=TEST_EPOCH)
+
+    async def start_then_ingest():
+        # Lifespan order: prime the feed, load the catalog, then poll.
+        await feed.prime()
+        await catalog.refresh()
+        add_cluster("Test_A", unit_vector(2), ingested_at=TEST_EPOCH + timedelta(seconds=1))
+        await feed.poll_once()
+        if catalog._task is not None:
+            await catalog._task
+
+    asyncio.run(start_then_ingest())
+
+    assert len(loads) == 2
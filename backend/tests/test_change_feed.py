@@ -0,0 +1,109 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from conftest import TEST_EPOCH, unit_vector
+from psycopg.rows import dict_row
+
+from app.change_feed import ClusterChangeFeed
+
+
+def _at(seconds: float):
+    return TEST_EPOCH + timedelta(seconds=seconds)
+
+
+@pytest.fixture
+def feed(pg_fetch, monkeypatch):
+    """A primed feed reading through the test connection; ``feed.reported`` collects each page."""
+
+    def make(overlap_seconds: float = 300, page_size: int = 100) -> ClusterChangeFeed:
+        feed = ClusterChangeFeed(interval_seconds=30, overlap_seconds=overlap_seconds, page_size=page_size)
+        monkeypatch.setattr(feed, "_scoped_fetch", pg_fetch(row_factory=dict_row))
+        feed.reported = []
+        feed.subscribe(lambda rows: feed.reported.append([row["id"] for row in rows]))
+        asyncio.run(feed.prime())
+        return feed
+
+    return make
+
+
+def _poll(feed: ClusterChangeFeed) -> list[str]:
+    feed.reported.clear()
+    asyncio.run(feed.poll_once())
+    return [cluster_id for page in feed.reported for cluster_id in page]
+
+
+def test_prime_starts_after_the_newest_cluster(add_cluster, feed):
+    add_cluster("Test_A", unit_vector(1), ingested_at=_at(0))
+    add_cluster("Test_A", unit_vector(2), ingested_at=_at(1))
+
+    feed = feed()
+
+    assert feed.watermark == _at(1)
+    assert _poll(feed) == []
+
+
+def test_new_clusters_are_reported_once(add_cluster, feed):
+    add_cluster("Test_A", unit_vector(1), ingested_at=_at(0))
+    feed = feed()
+    new = add_cluster("Test_B", unit_vector(2), ingested_at=_at(5))
+
+    assert _poll(feed) == [str(new)]
+    assert feed.watermark == _at(5)
+    assert _poll(feed) == []
+
+
+def test_new_clusters_are_read_in_keyset_pages(add_cluster, feed):
+    add_cluster("Test_A", unit_vector(0), ingested_at=_at(0))
+    feed = feed(page_size=2)
+    # Five rows, four sharing one timestamp, so pages split a transaction.
+    new = sorted(str(add_cluster("Test_A", unit_vector(seed), ingested_at=_at(1))) for seed in range(1, 5))
+    new.append(str(add_cluster("Test_A", unit_vector(5), ingested_at=_at(2))))
+    pages_before = feed.pages
+
+    ids = _poll(feed)
+
+    assert ids == new
+    assert [len(page) for page in feed.reported] == [2, 2, 1]
+    assert feed.pages - pages_before == 3
+    assert _poll(feed) == []
+
+
+def test_late_commits_inside_the_overlap_are_reported(add_cluster, feed):
+    add_cluster("Test_A", unit_vector(1), ingested_at=_at(10))
+    feed = feed(overlap_seconds=60)
+    # A transaction that started before the newest cluster but committed after the poll.
+    late = add_cluster("Test_A", unit_vector(2), ingested_at=_at(5))
+
+    assert _poll(feed) == [str(late)]
+    assert feed.watermark == _at(10)
+    assert _poll(feed) == []
+
+
+def test_commits_older_than_the_overlap_are_not_reported(add_cluster, feed):
+    add_cluster("Test_A", unit_vector(1), ingested_at=_at(600))
+    feed = feed(overlap_seconds=60)
+    add_cluster("Test_A", unit_vector(2), ingested_at=_at(500))
+
+    assert _poll(feed) == []
+
+
+def test_reingested_clusters_are_reported_at_their_new_timestamp(add_cluster, feed):
+    cluster = add_cluster("Test_A", unit_vector(1), ingested_at=_at(0))
+    add_cluster("Test_A", unit_vector(2), ingested_at=_at(1))
+    feed = feed()
+
+    add_cluster("Test_A", unit_vector(3), ingested_at=_at(2), cluster_id=cluster)
+
+    # Its old timestamp now counts one row fewer, which is not reported again.
+    assert _poll(feed) == [str(cluster)]
+    assert _poll(feed) == []
+
+
+def test_first_poll_without_prime_reports_nothing(add_cluster, pg_fetch, monkeypatch):
+    add_cluster("Test_A", unit_vector(1), ingested_at=_at(0))
+    feed = ClusterChangeFeed(interval_seconds=30, overlap_seconds=300)
+    monkeypatch.setattr(feed, "_scoped_fetch", pg_fetch(row_factory=dict_row))
+
+    assert asyncio.run(feed.poll_once()) == 0
+    assert feed.primed and feed.watermark == _at(0)
@@ -0,0 +1,92 @@
+from uuid import UUID
+
+from app.context_packing import estimate_tokens, pack_context
+
+CLAUSE = "This Agreement and any dispute arising out of it shall be governed by the laws of England and Wales. " * 3
+
+
+def _row(n: int, score: float, *, client_id: str = "Bank_A", text: str = CLAUSE, history: int = 0) -> dict:
+    return {
+        "id": UUID(int=n),
+        "client_id": client_id,
+        "text_content": f"{text} Clause {n}." if text == CLAUSE else text,
+        "codified_data": {"Governing Law": {"Jurisdiction": "England"}},
+        "query_history": [{"role": "Analyst", "query": f"Question {i}?"} for i in range(history)],
+        "relevance_score": score,
+    }
+
+
+def _section_tokens(row: dict) -> int:
+    return pack_context([row], 100_000).tokens
+
+
+def test_clusters_are_packed_most_relevant_first():
+    rows = [_row(1, 0.7), _row(2, 0.9), _row(3, 0.8)]
+
+    packed = pack_context(rows, 100_000)
+
+    assert [row["id"].int for row in packed.included] == [2, 3, 1]
+    assert (packed.dropped, packed.compacted, packed.duplicates_merged) == (0, 0, 0)
+    assert packed.tokens == estimate_tokens(packed.text)
+
+
+def test_clusters_past_the_budget_are_dropped():
+    rows = [_row(n, 1 - n / 10) for n in range(1, 4)]
+    # Room for two full sections, and too little left for even a compact third.
+    budget = 2 * _section_tokens(rows[0]) + 10
+
+    packed = pack_context(rows, budget)
+
+    assert [row["id"].int for row in packed.included] == [1, 2]
+    assert (packed.dropped, packed.compacted) == (1, 0)
+    assert packed.tokens <= budget
+
+
+def test_a_cluster_that_does_not_fit_is_retried_compact():
+    first = _row(1, 0.9)
+    second = _row(2, 0.8, text="Governing law: England. " * 40, history=5)
+    budget = _section_tokens(first) + _section_tokens(second) // 2
+
+    packed = pack_context([first, second], budget)
+
+    assert [row["id"].int for row in packed.included] == [1, 2]
+    assert (packed.dropped, packed.compacted) == (0, 1)
+    assert packed.tokens <= budget + 1
+    compact = packed.text.split("--- Cluster 00000000 ---")[2]
+    assert '..."' in compact
+    # Only the most recent history entries are kept.
+    assert "Question 4?" in compact and "Question 3?" in compact and "Question 2?" not in compact
+
+
+def test_identical_clauses_from_other_banks_are_merged_into_one_section():
+    text = "Each party shall keep the other's Confidential Information secret."
+    rows = [
+        _row(1, 0.9, client_id="Bank_A", text=text),
+        _row(2, 0.8, client_id="Bank_B", text="  EACH party shall keep the other's\nconfidential information secret. "),
+        _row(3, 0.7, client_id="Bank_C", text=text),
+    ]
+
+    packed = pack_context(rows, 100_000)
+
+    assert [row["id"].int for row in packed.included] == [1]
+    assert packed.duplicates_merged == 2
+    assert packed.text.count("Clause language:") == 1
+    assert "Identical clause also seen in: Bank_B [00000000], Bank_C [00000000]" in packed.text
+
+
+def test_a_merge_that_does_not_fit_is_dropped():
+    text = "Each party shall keep the other's Confidential Information secret."
+    first = _row(1, 0.9, text=text)
+    budget = _section_tokens(first)
+
+    packed = pack_context([first, _row(2, 0.8, client_id="Bank_B", text=text)], budget)
+
+    assert (packed.duplicates_merged, packed.dropped) == (0, 1)
+    assert "also seen in" not in packed.text
+
+
+def test_no_results():
+    packed = pack_context([], 100)
+
+    assert packed.text == "No clusters were retrieved."
+    assert packed.included == []
@@ -0,0 +1,108 @@
+import pytest
+from conftest import csv_row
+
+from scripts.ingest_mock_csv import INGEST_BATCH
+
+MODES = ["copy", "delta", "rows"]
+
+LAW_ENGLAND = {"Governing Law": {"Jurisdiction": "England", "Exclusive": "No"}}
+LAW_FRANCE = {"Governing Law": {"Jurisdiction": "France", "Exclusive": "No"}}
+
+
+def _facets(pg, client_id="Test_A"):
+    """term_facets for a client as {(term_lc, attribute_lc, value): cluster_count}."""
+    rows = pg.execute(
+        "SELECT term_lc, attribute_lc, value, cluster_count FROM term_facets WHERE client_id = %s",
+        (client_id,),
+    ).fetchall()
+    return {(term, attribute, value): count for term, attribute, value, count in rows}
+
+
+def _row_versions(pg):
+    """The physical location of each Test_A facet row; an UPDATE moves a row even when nothing changed."""
+    return set(pg.execute("SELECT ctid::text FROM term_facets WHERE client_id = 'Test_A'").fetchall())
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_ingest_counts_terms_attributes_and_direct_values(pg, ingest, mode):
+    ingest(
+        mode,
+        [
+            csv_row(codified_data={**LAW_ENGLAND, "Confidentiality": "Mutual"}),
+            csv_row(codified_data=LAW_ENGLAND),
+        ],
+    )
+
+    assert _facets(pg) == {
+        ("governing law", None, None): 2,
+        ("governing law", "jurisdiction", "England"): 2,
+        ("governing law", "exclusive", "No"): 2,
+        ("confidentiality", None, None): 1,
+        ("confidentiality", "", "Mutual"): 1,
+    }
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_later_batches_add_to_existing_counts(pg, ingest, mode):
+    ingest(mode, [csv_row(codified_data=LAW_ENGLAND)])
+
+    ingest(mode, [csv_row(codified_data=LAW_FRANCE)])
+
+    facets = _facets(pg)
+    assert facets[("governing law", None, None)] == 2
+    assert facets[("governing law", "jurisdiction", "England")] == 1
+    assert facets[("governing law", "jurisdiction", "France")] == 1
+    assert facets[("governing law", "exclusive", "No")] == 2
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_values_that_reach_zero_are_pruned(pg, ingest, mode):
+    row = csv_row(codified_data=LAW_ENGLAND)
+    ingest(mode, [row])
+
+    ingest(mode, [csv_row(row["id"], codified_data=LAW_FRANCE)])
+
+    assert _facets(pg) == {
+        ("governing law", None, None): 1,
+        ("governing law", "jurisdiction", "France"): 1,
+        ("governing law", "exclusive", "No"): 1,
+    }
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_terms_no_cluster_carries_are_pruned(pg, ingest, mode):
+    kept = csv_row(codified_data={"Confidentiality": "Mutual"})
+    dropped = csv_row(codified_data={**LAW_ENGLAND, "Confidentiality": "Mutual"})
+    ingest(mode, [kept, dropped])
+
+    ingest(mode, [{**dropped, "codified_data": kept["codified_data"]}])
+
+    assert _facets(pg) == {("confidentiality", None, None): 2, ("confidentiality", "", "Mutual"): 2}
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_swaps_within_a_batch_net_to_no_change(pg, ingest, mode):
+    england, france = csv_row(codified_data=LAW_ENGLAND), csv_row(codified_data=LAW_FRANCE)
+    ingest(mode, [england, france])
+    before = _row_versions(pg)
+
+    # Each cluster takes the other's jurisdiction: every key loses one cluster and gains one.
+    ingest(
+        mode,
+        [
+            {**england, "codified_data": france["codified_data"]},
+            {**france, "codified_data": england["codified_data"]},
+        ],
+    )
+
+    assert _row_versions(pg) == before
+    assert _facets(pg)[("governing law", "jurisdiction", "England")] == 1
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_deltas_are_cleared_after_each_batch(pg, ingest, mode):
+    # ``ingest`` also truncates on its emulated commit, so call the batch function directly.
+    with pg.cursor() as cur:
+        INGEST_BATCH[mode](cur, [csv_row(codified_data=LAW_ENGLAND)])
+
+    assert pg.execute("SELECT count(*) FROM facet_deltas").fetchone()[0] == 0
@@ -0,0 +1,195 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+import psycopg
+import psycopg_pool
+import pytest
+
+from app import retrieval
+from app.config import settings
+
+CLIENTS = ["Test_A", "Test_B", "Test_C"]
+SCORES = {"Test_A": 0.9, "Test_B": 0.8, "Test_C": 0.7}
+
+
+@pytest.fixture
+def fanout(pg, monkeypatch):
+    """Pooled connections are fresh ``TEST_DATABASE_URL`` connections; ``exhausted`` clients get PoolTimeout."""
+    monkeypatch.setattr(settings, "retrieval_deadline_ms", 500)
+    monkeypatch.setattr(settings, "retrieval_fanout_workers", 4)
+    monkeypatch.setattr(retrieval, "_fanout_executor", None)
+    url, exhausted = os.environ["TEST_DATABASE_URL"], set()
+
+    @contextmanager
+    def get_app_conn(timeout=None):
+        if exhausted:
+            raise psycopg_pool.PoolTimeout(f"couldn't get a connection after {timeout:.2f} sec")
+        with psycopg.connect(url) as conn:
+            yield conn
+
+    @asynccontextmanager
+    async def get_app_conn_async(timeout=None):
+        if exhausted:
+            raise psycopg_pool.PoolTimeout(f"couldn't get a connection after {timeout:.2f} sec")
+        async with await psycopg.AsyncConnection.connect(url) as conn:
+            yield conn
+
+    monkeypatch.setattr(retrieval, "get_app_conn", get_app_conn)
+    monkeypatch.setattr(retrieval, "get_app_conn_async", get_app_conn_async)
+    yield exhausted
+    if retrieval._fanout_executor is not None:
+        retrieval._fanout_executor.shutdown(wait=True)
+
+
+def _search(sleep: dict[str, float] | None = None, fail: set[str] = frozenset(), cancelled: list | None = None):
+    """A per-client search that runs ``pg_sleep`` on the connection it is given."""
+
+    def search_one(conn, client_id: str) -> list[dict]:
+        if client_id in fail:
+            raise ValueError(f"bad bank {client_id}")
+        try:
+            if cancelled is not None:
+                # Only an explicit cancel can end this statement.
+                conn.execute("SET statement_timeout = 0")
+            conn.execute("SELECT pg_sleep(%s)", ((sleep or {}).get(client_id, 0),))
+        except psycopg.errors.QueryCanceled:
+            if cancelled is not None:
+                cancelled.append(client_id)
+            raise
+        return [{"id": client_id, "relevance_score": SCORES[client_id]}]
+
+    return search_one
+
+
+def _ids(rows: list[dict]) -> list[str]:
+    return [row["id"] for row in rows]
+
+
+def test_fan_out_merges_every_bank(pg, fanout):
+    stats: dict = {}
+
+    rows = retrieval.fan_out_clients(pg, list(reversed(CLIENTS)), _search(), 10, stats)
+
+    assert _ids(rows) == CLIENTS
+    assert (stats["mode"], stats["timed_out_clients"], stats["failed_clients"]) == ("fanout", [], [])
+    assert set(stats["client_timings_ms"]) == set(CLIENTS)
+
+
+@pytest.mark.parametrize(("workers", "width"), [(4, 3), (1, 2)])
+def test_fanout_width_counts_the_callers_connection(pg, fanout, monkeypatch, workers, width):
+    monkeypatch.setattr(settings, "retrieval_fanout_workers", workers)
+    stats: dict = {}
+
+    retrieval.fan_out_clients(pg, CLIENTS, _search(), 10, stats)
+
+    assert stats["fanout_width"] == width
+
+
+def test_banks_past_the_deadline_are_dropped(pg, fanout):
+    stats: dict = {}
+    started = time.perf_counter()
+
+    rows = retrieval.fan_out_clients(pg, CLIENTS, _search(sleep={"Test_B": 5}), 10, stats)
+
+    assert time.perf_counter() - started < 2
+    assert _ids(rows) == ["Test_A", "Test_C"]
+    assert stats["timed_out_clients"] == ["Test_B"]
+
+
+def test_statements_still_running_at_the_deadline_are_cancelled(pg, fanout):
+    cancelled: list[str] = []
+    stats: dict = {}
+
+    rows = retrieval.fan_out_clients(pg, CLIENTS, _search(sleep={"Test_C": 30}, cancelled=cancelled), 10, stats)
+
+    assert _ids(rows) == ["Test_A", "Test_B"]
+    assert stats["timed_out_clients"] == ["Test_C"]
+    for _ in range(50):
+        if cancelled:
+            break
+        time.sleep(0.05)
+    assert cancelled == ["Test_C"]
+
+
+def test_the_callers_bank_times_out_without_aborting_its_transaction(pg, fanout):
+    stats: dict = {}
+
+    rows = retrieval.fan_out_clients(pg, CLIENTS, _search(sleep={"Test_A": 5}), 10, stats)
+
+    assert _ids(rows) == ["Test_B", "Test_C"]
+    assert stats["timed_out_clients"] == ["Test_A"]
+    # The caller goes on to hydrate in the same transaction, under its own timeout.
+    assert pg.execute("SELECT current_setting('statement_timeout')").fetchone() == ("0",)
+
+
+def test_pool_timeouts_count_as_timed_out(pg, fanout):
+    fanout.add("exhausted")
+    stats: dict = {}
+
+    rows = retrieval.fan_out_clients(pg, CLIENTS, _search(), 10, stats)
+
+    assert _ids(rows) == ["Test_A"]
+    assert sorted(stats["timed_out_clients"]) == ["Test_B", "Test_C"]
+
+
+def test_failing_banks_are_reported_and_dropped(pg, fanout):
+    stats: dict = {}
+
+    rows = retrieval.fan_out_clients(pg, CLIENTS, _search(fail={"Test_A", "Test_C"}), 10, stats)
+
+    assert _ids(rows) == ["Test_B"]
+    assert sorted(stats["failed_clients"]) == ["Test_A", "Test_C"]
+    assert stats["timed_out_clients"] == []
+
+
+# ---------- Async path ----------
+
+
+def _asearch(sleep: dict[str, float] | None = None, fail: set[str] = frozenset()):
+    async def search_one(conn, client_id: str) -> list[dict]:
+        if client_id in fail:
+            raise ValueError(f"bad bank {client_id}")
+        await conn.execute("SELECT pg_sleep(%s)", ((sleep or {}).get(client_id, 0),))
+        return [{"id": client_id, "relevance_score": SCORES[client_id]}]
+
+    return search_one
+
+
+def _afan_out(search_one, client_ids=CLIENTS) -> tuple[list[dict], dict, float]:
+    async def run():
+        stats: dict = {}
+        async with await psycopg.AsyncConnection.connect(os.environ["TEST_DATABASE_URL"]) as conn:
+            started = time.perf_counter()
+            rows = await retrieval.afan_out_clients(conn, client_ids, search_one, 10, stats)
+            elapsed = time.perf_counter() - started
+            await conn.execute("SELECT 1")
+        return rows, stats, elapsed
+
+    return asyncio.run(run())
+
+
+def test_async_fan_out_merges_every_bank(pg, fanout):
+    rows, stats, _ = _afan_out(_asearch(), list(reversed(CLIENTS)))
+
+    assert _ids(rows) == CLIENTS
+    assert stats["fanout_width"] == 3
+    assert set(stats["client_timings_ms"]) == set(CLIENTS)
+
+
+def test_async_banks_past_the_deadline_are_dropped(pg, fanout):
+    rows, stats, elapsed = _afan_out(_asearch(sleep={"Test_A": 5, "Test_B": 5}))
+
+    assert elapsed < 2
+    assert _ids(rows) == ["Test_C"]
+    assert stats["timed_out_clients"] == ["Test_A", "Test_B"]
+
+
+def test_async_pool_timeouts_and_failures_are_reported(pg, fanout):
+    rows, stats, _ = _afan_out(_asearch(fail={"Test_A"}))
+    assert (_ids(rows), stats["failed_clients"]) == (["Test_B", "Test_C"], ["Test_A"])
+
+    fanout.add("exhausted")
+    rows, stats, _ = _afan_out(_asearch())
+    assert (_ids(rows), stats["timed_out_clients"]) == (["Test_A"], ["Test_B", "Test_C"])
@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+
+from app import main, retrieval
+from app.config import settings
+from app.embeddings import EMBEDDING_DIM
+
+QUERY = np.eye(EMBEDDING_DIM, dtype=np.float32)[0]
+
+
+def _at_similarity(score: float, axis: int) -> np.ndarray:
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    vector[0], vector[axis] = score, np.sqrt(1 - score**2)
+    return vector
+
+
+@pytest.fixture
+def no_floor(monkeypatch):
+    monkeypatch.setattr(settings, "retrieval_score_floor", False)
+
+
+def _search(pg, query_text: str, top_k: int = 10) -> list[dict]:
+    return retrieval.search_clusters_hybrid(pg, ["Test_A"], QUERY.tolist(), query_text, top_k, light=True)
+
+
+@pytest.mark.parametrize(
+    ("text", "parts"),
+    [
+        ("governing law", ("governing law", [], "", [])),
+        ("law -french", ("law", [], "french", [])),
+        ('"governing law" or england', ("england", ["governing law"], "", [])),
+        ('contract -"choice of law"', ("contract", [], "", ["choice of law"])),
+        ('"unterminated phrase', ("", ["unterminated phrase"], "", [])),
+    ],
+)
+def test_web_query_parts(text, parts):
+    result = retrieval._web_query_parts(text)
+
+    assert (
+        result["lexical_words"],
+        result["lexical_phrases"],
+        result["excluded_words"],
+        result["excluded_phrases"],
+    ) == parts
+
+
+def test_fusion_ranks_rows_found_by_both_legs_first(pg, add_cluster, app_role, no_floor):
+    both = add_cluster("Test_A", _at_similarity(0.9, 1), text="The indemnity cap limits any indemnity cap claim.")
+    vector_only = add_cluster("Test_A", _at_similarity(0.8, 2), text="Payment is due within thirty days.")
+    lexical_only = add_cluster("Test_A", _at_similarity(0.2, 3), text="An indemnity applies.")
+    app_role()
+
+    rows = _search(pg, "indemnity cap")
+
+    assert [row["id"] for row in rows] == [both, lexical_only, vector_only]
+    k = settings.hybrid_rrf_k
+    assert rows[0]["fusion_score"] == pytest.approx(2 / (k + 1))
+    # relevance_score stays the cosine similarity, whatever the fused rank.
+    assert [row["relevance_score"] for row in rows] == pytest.approx([0.9, 0.2, 0.8], abs=1e-5)
+    assert [row["lexical_match"] for row in rows] == [True, True, False]
+
+
+def test_full_text_matches_are_kept_below_the_similarity_floor(pg, add_cluster, app_role, monkeypatch):
+    monkeypatch.setattr(settings, "retrieval_score_floor", True)
+    monkeypatch.setattr(settings, "similarity_threshold", 0.6)
+    both = add_cluster("Test_A", _at_similarity(0.9, 1), text="The indemnity cap limits any claim.")
+    add_cluster("Test_A", _at_similarity(0.5, 2), text="Payment is due within thirty days.")
+    lexical_only = add_cluster("Test_A", _at_similarity(0.2, 3), text="An indemnity applies.")
+    app_role()
+
+    rows = _search(pg, "indemnity cap")
+
+    assert [row["id"] for row in rows] == [both, lexical_only]
+
+
+def test_full_text_matches_count_as_evidence(monkeypatch):
+    monkeypatch.setattr(settings, "similarity_threshold", 0.6)
+    rows = [
+        {"id": 1, "relevance_score": 0.9, "lexical_match": False},
+        {"id": 2, "relevance_score": 0.2, "lexical_match": True},
+        {"id": 3, "relevance_score": 0.5, "lexical_match": False},
+        {"id": 4, "relevance_score": 0.5},
+    ]
+
+    assert [row["id"] for row in main._filter_results(rows)] == [1, 2]
+
+
+def test_lexical_leg_matches_stems_across_languages(pg, add_cluster, app_role, no_floor):
+    french = add_cluster(
+        "Test_A", _at_similarity(0.1, 1), text="Les résiliations sont notifiées par écrit.", ts_config="french"
+    )
+    add_cluster("Test_A", _at_similarity(0.1, 2), text="Payment is due within thirty days.")
+    app_role()
+
+    rows = _search(pg, "résiliation")
+
+    assert rows[0]["id"] == french
+    assert rows[0]["fusion_score"] > rows[1]["fusion_score"]
+
+
+@pytest.mark.parametrize("query_text", ["law -french", 'law -"french courts"'])
+def test_excluded_terms_keep_rows_out_of_the_lexical_leg(pg, add_cluster, app_role, no_floor, query_text):
+    english = add_cluster("Test_A", _at_similarity(0.9, 1), text="Governing law is English law.")
+    french = add_cluster("Test_A", _at_similarity(0.9, 2), text="Governing law is French law before French courts.")
+    app_role()
+
+    rows = {row["id"]: row for row in _search(pg, query_text)}
+
+    k = settings.hybrid_rrf_k
+    # The French row is still a vector hit, but gets no lexical credit.
+    assert rows[french]["fusion_score"] <= 1 / (k + 1)
+    assert rows[english]["fusion_score"] > 1 / (k + 1)
+
+
+def test_a_query_of_only_exclusions_is_vector_search(pg, add_cluster, app_role, no_floor):
+    near = add_cluster("Test_A", _at_similarity(0.9, 1), text="Governing law is English law.")
+    far = add_cluster("Test_A", _at_similarity(0.5, 2), text="Payment is due within thirty days.")
+    app_role()
+
+    rows = _search(pg, "-french")
+
+    assert [row["id"] for row in rows] == [near, far]
+    k = settings.hybrid_rrf_k
+    assert [row["fusion_score"] for row in rows] == pytest.approx([1 / (k + 1), 1 / (k + 2)])
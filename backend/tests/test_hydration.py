@@ -0,0 +1,81 @@
+from uuid import uuid4
+
+from conftest import unit_vector
+
+from app import main, retrieval
+
+
+def test_merge_hydrated_keeps_candidate_order_and_scores():
+    a, b, c = uuid4(), uuid4(), uuid4()
+    candidates = [
+        {"id": a, "client_id": "Bank_A", "relevance_score": 0.9},
+        {"id": b, "client_id": "Bank_A", "relevance_score": 0.8},
+        {"id": c, "client_id": "Bank_B", "relevance_score": 0.7},
+    ]
+    rows = [
+        {"id": c, "client_id": "Bank_B", "text_content": "c"},
+        # Moved to another client since the candidate was ranked.
+        {"id": a, "client_id": "Bank_C", "text_content": "a"},
+    ]
+
+    merged = retrieval._merge_hydrated(candidates, rows)
+
+    assert [row["id"] for row in merged] == [a, c]
+    assert merged[0]["client_id"] == "Bank_C"
+    assert [row["relevance_score"] for row in merged] == [0.9, 0.7]
+
+
+def test_hydrate_citations_falls_back_to_later_survivors(monkeypatch):
+    filtered = [{"id": uuid4(), "relevance_score": 1 - i / 10} for i in range(6)]
+    gone = {filtered[0]["id"], filtered[2]["id"]}
+    calls = []
+
+    def hydrate(conn, batch, client_ids):
+        calls.append(len(batch))
+        return [row for row in batch if row["id"] not in gone]
+
+    monkeypatch.setattr(main, "hydrate_clusters", hydrate)
+
+    cited = main._hydrate_citations(None, filtered, ["Bank_A"])
+
+    assert [row["id"] for row in cited] == [filtered[i]["id"] for i in (1, 3, 4)]
+    assert calls == [3, 2]
+
+
+def test_hydrate_citations_can_come_back_empty(monkeypatch):
+    monkeypatch.setattr(main, "hydrate_clusters", lambda conn, batch, client_ids: [])
+
+    filtered = [{"id": uuid4(), "relevance_score": 0.9} for _ in range(4)]
+
+    assert main._hydrate_citations(None, filtered, ["Bank_A"]) == []
+
+
+def test_hydrate_returns_heavy_columns_only_for_rows_in_scope(pg, add_cluster, app_role):
+    kept = add_cluster("Test_A", unit_vector(1), text="Governed by English law.", codified_data={"Law": "England"})
+    other_bank = add_cluster("Test_B", unit_vector(2))
+    candidates = [
+        {"id": other_bank, "client_id": "Test_B", "relevance_score": 0.95},
+        {"id": uuid4(), "client_id": "Test_A", "relevance_score": 0.9},  # deleted since it was ranked
+        {"id": kept, "client_id": "Test_A", "relevance_score": 0.8},
+    ]
+    app_role()
+
+    rows = retrieval.hydrate_clusters(pg, candidates, ["Test_A"])
+
+    assert [row["id"] for row in rows] == [kept]
+    assert rows[0]["text_content"] == "Governed by English law."
+    assert rows[0]["codified_data"] == {"Law": "England"}
+    assert rows[0]["relevance_score"] == 0.8
+
+
+def test_answer_cites_later_survivors_when_top_rows_are_gone(pg, add_cluster, app_role):
+    survivors = [add_cluster("Test_A", unit_vector(seed)) for seed in range(4)]
+    filtered = [{"id": uuid4(), "client_id": "Test_A", "relevance_score": 0.99}] + [
+        {"id": cluster_id, "client_id": "Test_A", "relevance_score": 0.9 - i / 10}
+        for i, cluster_id in enumerate(survivors)
+    ]
+    app_role()
+
+    cited = main._hydrate_citations(pg, filtered, ["Test_A"])
+
+    assert [row["id"] for row in cited] == survivors[: main._ANSWER_CITATIONS]
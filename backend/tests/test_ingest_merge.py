@@ -0,0 +1,110 @@
+import uuid
+
+import numpy as np
+import pytest
+from conftest import csv_row
+
+from app.embeddings import EMBEDDING_DIM, embed_text
+
+HISTORY = [
+    {"query": "Is English law acceptable?", "role": "Negotiator", "date": "2024-03-01"},
+    {"response": "Yes, with London courts.", "role": "Legal", "date": "2024-03-02"},
+]
+
+
+def _cluster(pg, cluster_id):
+    return pg.execute(
+        "SELECT text_content, codified_data, query_history, doc_count, embedding FROM clusters WHERE id = %s",
+        (cluster_id,),
+    ).fetchone()
+
+
+def _events(pg, cluster_id):
+    return pg.execute(
+        "SELECT actor_role, event_type, message FROM cluster_events WHERE cluster_id = %s ORDER BY event_at",
+        (cluster_id,),
+    ).fetchall()
+
+
+@pytest.mark.parametrize("mode", ["copy", "delta", "rows"])
+def test_new_clusters_are_inserted_with_their_events(pg, ingest, mode):
+    row = csv_row(codified_data={"Governing Law": "England"}, history=HISTORY, doc_count=3)
+
+    stats = ingest(mode, [row])
+
+    assert (stats.inserted, stats.updated, stats.re_embedded, stats.events_rewritten) == (1, 0, 1, 1)
+    text, codified, history, doc_count, embedding = _cluster(pg, row["id"])
+    assert (text, codified, history, doc_count) == (row["text_content"], {"Governing Law": "England"}, HISTORY, 3)
+    np.testing.assert_allclose(embedding, embed_text(row["text_content"]), rtol=1e-6)
+    assert _events(pg, row["id"]) == [
+        ("Negotiator", "query", "Is English law acceptable?"),
+        ("Legal", "response", "Yes, with London courts."),
+    ]
+
+
+@pytest.mark.parametrize("mode", ["copy", "delta", "rows"])
+def test_changed_clusters_are_updated_and_their_events_rewritten(pg, ingest, mode):
+    row = csv_row(history=HISTORY)
+    ingest(mode, [row])
+    changed = {**row, "text_content": "The agreement is governed by French law.", "query_history": "[]"}
+
+    stats = ingest(mode, [changed])
+
+    assert (stats.inserted, stats.updated) == (0, 1)
+    assert _cluster(pg, row["id"])[0] == changed["text_content"]
+    np.testing.assert_allclose(_cluster(pg, row["id"])[4], embed_text(changed["text_content"]), rtol=1e-6)
+    assert _events(pg, row["id"]) == []
+
+
+def test_delta_skips_unchanged_clusters(pg, ingest):
+    row = csv_row(codified_data={"Governing Law": "England"}, history=HISTORY)
+    ingest("delta", [row])
+    ingested_at = pg.execute("SELECT ingested_at FROM clusters WHERE id = %s", (row["id"],)).fetchone()[0]
+
+    stats = ingest("delta", [dict(row)])
+
+    assert (stats.skipped, stats.inserted, stats.updated, stats.re_embedded, stats.events_rewritten) == (1, 0, 0, 0, 0)
+    assert pg.execute("SELECT ingested_at FROM clusters WHERE id = %s", (row["id"],)).fetchone()[0] == ingested_at
+    assert len(_events(pg, row["id"])) == 2
+
+
+def test_delta_keeps_the_embedding_when_only_the_history_changed(pg, ingest):
+    row = csv_row(history=HISTORY)
+    ingest("delta", [row])
+    # A stored vector the text would not produce shows whether it was recomputed.
+    marker = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    marker[0] = 1.0
+    pg.execute("UPDATE clusters SET embedding = %s WHERE id = %s", (marker, row["id"]))
+
+    stats = ingest("delta", [{**row, "query_history": "[]", "doc_count": "7"}])
+
+    assert (stats.updated, stats.re_embedded, stats.events_rewritten) == (1, 0, 1)
+    _, _, history, doc_count, embedding = _cluster(pg, row["id"])
+    assert (history, doc_count) == ([], 7)
+    np.testing.assert_array_equal(embedding, marker)
+    assert _events(pg, row["id"]) == []
+
+
+def test_delta_keeps_the_events_when_the_history_is_unchanged(pg, ingest):
+    row = csv_row(history=HISTORY)
+    ingest("delta", [row])
+    before = pg.execute("SELECT event_id FROM cluster_events WHERE cluster_id = %s", (row["id"],)).fetchall()
+
+    stats = ingest("delta", [{**row, "text_content": "Governed by the laws of New York."}])
+
+    assert (stats.updated, stats.re_embedded, stats.events_rewritten) == (1, 1, 0)
+    after = pg.execute("SELECT event_id FROM cluster_events WHERE cluster_id = %s", (row["id"],)).fetchall()
+    assert sorted(after) == sorted(before)
+
+
+@pytest.mark.parametrize("mode", ["copy", "delta", "rows"])
+def test_the_last_row_for_a_repeated_id_wins(pg, ingest, mode):
+    cluster_id = uuid.uuid4()
+    first = csv_row(cluster_id, text="First version.", history=HISTORY)
+    last = csv_row(cluster_id, text="Last version.", history=HISTORY[:1])
+
+    ingest(mode, [first, last])
+
+    assert _cluster(pg, cluster_id)[0] == "Last version."
+    assert _events(pg, cluster_id) == [("Negotiator", "query", "Is English law acceptable?")]
+    assert pg.execute("SELECT count(*) FROM clusters WHERE id = %s", (cluster_id,)).fetchone()[0] == 1
@@ -0,0 +1,128 @@
+import queue
+import uuid
+from collections import Counter
+
+import psycopg
+import pytest
+
+from scripts import ingest_mock_csv
+from scripts.ingest_mock_csv import IngestStats, iter_batches, shard_worker, split_batch
+
+
+def _rows(count: int, repeats: int = 0) -> list[dict]:
+    """CSV-like rows; the first ``repeats`` ids occur again at the end, as re-ingested clusters do."""
+    rows = [{"id": str(uuid.UUID(int=n * 7919 + 1)), "n": n} for n in range(count)]
+    return rows + [{**row, "n": count + i} for i, row in enumerate(rows[:repeats])]
+
+
+@pytest.mark.parametrize("workers", [1, 3, 8])
+def test_every_row_goes_to_exactly_one_shard(workers):
+    rows = _rows(500, repeats=40)
+    seen: Counter = Counter()
+    shard_of: dict[str, set[int]] = {}
+
+    for batch in iter_batches(rows, 64):
+        shards = split_batch(batch, workers)
+        assert set(shards) <= set(range(workers))
+        for shard, shard_rows in shards.items():
+            # Input order is kept within a shard, so repeats of one id commit in order.
+            assert [row["n"] for row in shard_rows] == sorted(row["n"] for row in shard_rows)
+            for row in shard_rows:
+                seen[row["n"]] += 1
+                shard_of.setdefault(row["id"], set()).add(shard)
+
+    assert seen == Counter(range(540))
+    assert all(len(shards) == 1 for shards in shard_of.values())
+
+
+class _Connection:
+    """Stands in for an ingest connection; the batch function under test never touches it."""
+
+    commits = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return self
+
+    def execute(self, query):
+        pass
+
+    def commit(self):
+        _Connection.commits += 1
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    """Run ``shard_worker`` in-process over ``batches`` with ``ingest`` as the batch function."""
+    monkeypatch.setattr(ingest_mock_csv, "get_ingest_conn", _Connection)
+    monkeypatch.setattr(_Connection, "commits", 0)
+    monkeypatch.setattr(ingest_mock_csv.time, "sleep", lambda seconds: None)
+
+    def run(ingest, batches: list[list[dict]], max_retries: int = 2) -> list[tuple]:
+        monkeypatch.setitem(ingest_mock_csv.INGEST_BATCH, "copy", ingest)
+        inbox, outbox = queue.Queue(), queue.Queue()
+        for batch_no, batch in enumerate(batches):
+            inbox.put((batch_no, batch))
+        inbox.put(None)
+        shard_worker(1, "copy", max_retries, inbox, outbox)
+        return [outbox.get_nowait() for _ in range(outbox.qsize())]
+
+    return run
+
+
+def test_worker_commits_and_reports_each_batch_once(worker):
+    batches = list(iter_batches(_rows(10), 4))
+
+    results = worker(lambda cur, batch: IngestStats(rows_read=len(batch)), batches)
+
+    assert [(no, shard, stats.rows_read, error) for no, shard, stats, error in results] == [
+        (0, 1, 4, None),
+        (1, 1, 4, None),
+        (2, 1, 2, None),
+    ]
+    assert _Connection.commits == 3
+
+
+def test_worker_retries_transient_errors(worker):
+    attempts = []
+
+    def ingest(cur, batch):
+        attempts.append(len(batch))
+        if len(attempts) < 3:
+            raise psycopg.errors.DeadlockDetected("deadlock detected")
+        return IngestStats(rows_read=len(batch))
+
+    [(batch_no, _, stats, error)] = worker(ingest, [_rows(3)])
+
+    assert (batch_no, stats.rows_read, error) == (0, 3, None)
+    assert attempts == [3, 3, 3]
+    assert _Connection.commits == 1
+
+
+def test_worker_reports_transient_errors_after_the_last_retry(worker):
+    def ingest(cur, batch):
+        raise psycopg.OperationalError("connection lost")
+
+    [(batch_no, _, stats, error)] = worker(ingest, [_rows(3), _rows(3)], max_retries=1)
+
+    assert (batch_no, stats) == (0, None)
+    assert error == "OperationalError: connection lost"
+
+
+def test_worker_stops_on_a_bad_batch_without_retrying(worker):
+    attempts = []
+
+    def ingest(cur, batch):
+        attempts.append(len(batch))
+        raise ValueError("badly formed hexadecimal UUID string")
+
+    results = worker(ingest, [_rows(3), _rows(2)])
+
+    assert [(no, error) for no, _, _, error in results] == [(0, "ValueError: badly formed hexadecimal UUID string")]
+    assert attempts == [3]
+    assert _Connection.commits == 0
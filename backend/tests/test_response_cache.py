@@ -0,0 +1,47 @@
+from datetime import UTC, datetime
+from uuid import UUID
+
+from app.llm import build_chat_prompt
+from app.response_cache import ResponseCache, response_cache_key
+
+ROWS = [
+    {
+        "id": UUID(int=n),
+        "client_id": "Bank_A",
+        "text_content": "Governed by English law.",
+        "codified_data": {},
+        "query_history": [],
+        "last_updated": datetime(2024, 1, n, tzinfo=UTC),
+        "relevance_score": 0.9,
+    }
+    for n in (1, 2)
+]
+
+
+def _key(rows=ROWS, **criteria) -> tuple:
+    criteria = {"term": "Governing Law", "attribute": None, "language": None} | criteria
+    return response_cache_key(rows, prompt_version="v1", **criteria)
+
+
+def test_the_key_follows_the_prompt_criteria():
+    # The prompt quotes the term as typed, so a case variant must not reuse the answer.
+    assert "Term: governing law" in build_chat_prompt(ROWS, term="governing law").messages[1]["content"]
+    assert _key(term="governing law") != _key(term="Governing Law")
+    assert _key(term="Governing Law") == _key(term="Governing Law")
+
+
+def test_the_key_changes_with_the_retrieved_clusters():
+    assert _key(ROWS[:1]) != _key(ROWS)
+    assert _key(ROWS[::-1]) != _key(ROWS)
+    assert _key([{**ROWS[0], "last_updated": datetime(2025, 1, 1, tzinfo=UTC)}, ROWS[1]]) != _key(ROWS)
+
+
+def test_answers_citing_reingested_clusters_are_dropped():
+    cache = ResponseCache(maxsize=8, ttl_seconds=60)
+    cache.put(_key(ROWS[:1]), ["a"])
+    cache.put(_key(ROWS[1:]), ["b"])
+
+    assert cache.invalidate_clusters([{"id": str(ROWS[0]["id"])}]) == 1
+
+    assert cache.get(_key(ROWS[:1])) is None
+    assert list(cache.get(_key(ROWS[1:]))) == ["b"]
@@ -0,0 +1,131 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.single_flight import SingleFlight
+
+
+class Generation:
+    """A stand-in for an Ollama stream that emits tokens when the test releases them."""
+
+    def __init__(self) -> None:
+        self.starts = 0
+        self.cancelled = False
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    async def stream(self):
+        self.starts += 1
+        try:
+            while (token := await self.queue.get()) is not None:
+                if isinstance(token, BaseException):
+                    raise token
+                yield token
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+    def emit(self, *tokens) -> None:
+        for token in tokens:
+            self.queue.put_nowait(token)
+
+
+async def _collect(subscription) -> list[str]:
+    return [token async for token in subscription]
+
+
+def test_identical_requests_share_one_generation():
+    async def scenario():
+        flights, generation, completed = SingleFlight(), Generation(), []
+        leader = flights.subscribe("key", generation.stream, on_complete=completed.append)
+        joiner = flights.subscribe("key", generation.stream)
+        readers = [asyncio.create_task(_collect(s)) for s in (leader, joiner)]
+        generation.emit("Gov", "erning", None)
+        return flights, generation, completed, (leader, joiner), await asyncio.gather(*readers)
+
+    flights, generation, completed, (leader, joiner), results = asyncio.run(scenario())
+
+    assert results == [["Gov", "erning"], ["Gov", "erning"]]
+    assert generation.starts == 1
+    assert (leader.leader, joiner.leader) == (True, False)
+    assert completed == [["Gov", "erning"]]
+    assert flights.stats() == {"in_flight": 0, "leaders": 1, "joined": 1, "late_joined": 0, "abandoned": 0}
+
+
+def test_late_joiners_replay_the_tokens_already_emitted():
+    async def scenario():
+        flights, generation = SingleFlight(), Generation()
+        leader = aiter(flights.subscribe("key", generation.stream))
+        generation.emit("a", "b")
+        assert [await anext(leader), await anext(leader)] == ["a", "b"]
+
+        joiner = asyncio.create_task(_collect(flights.join("key")))
+        await asyncio.sleep(0)
+        generation.emit("c", None)
+        return flights, [token async for token in leader], await joiner
+
+    flights, leader_rest, joined = asyncio.run(scenario())
+
+    assert leader_rest == ["c"]
+    assert joined == ["a", "b", "c"]
+    assert flights.late_joined == 1
+
+
+def test_join_without_a_generation_in_flight_returns_none():
+    assert SingleFlight().join("key") is None
+
+
+def test_generation_is_cancelled_once_the_last_subscriber_leaves():
+    async def scenario():
+        flights, generation, finished = SingleFlight(), Generation(), []
+        first = aiter(flights.subscribe("key", generation.stream, on_finish=lambda: finished.append(True)))
+        second = aiter(flights.join("key"))
+        generation.emit("a")
+        await anext(first)
+        await anext(second)
+
+        await first.aclose()
+        await asyncio.sleep(0)
+        still_running = not generation.cancelled and flights.stats()["in_flight"] == 1
+
+        await second.aclose()
+        await asyncio.sleep(0)
+        return flights, generation, finished, still_running
+
+    flights, generation, finished, still_running = asyncio.run(scenario())
+
+    assert still_running
+    assert generation.cancelled
+    assert finished == [True]
+    assert flights.stats()["in_flight"] == 0
+    assert flights.abandoned == 1
+
+
+def test_ollama_errors_reach_every_subscriber():
+    async def scenario():
+        flights, generation, completed = SingleFlight(), Generation(), []
+        subscriptions = [flights.subscribe("key", generation.stream, on_complete=completed.append) for _ in range(2)]
+        readers = [asyncio.create_task(_collect(s)) for s in subscriptions]
+        generation.emit("a", httpx.ReadTimeout("timed out"))
+        return completed, await asyncio.gather(*readers, return_exceptions=True)
+
+    completed, results = asyncio.run(scenario())
+
+    assert [type(result) for result in results] == [httpx.ReadTimeout, httpx.ReadTimeout]
+    assert completed == []
+
+
+def test_unexpected_errors_are_relayed_and_raised_from_the_generation(caplog):
+    async def scenario():
+        flights, generation = SingleFlight(), Generation()
+        subscription = flights.subscribe("key", generation.stream)
+        task = flights._flights["key"].task
+        generation.emit(KeyError("message"))
+        with pytest.raises(KeyError):
+            await _collect(subscription)
+        return task
+
+    task = asyncio.run(scenario())
+
+    assert isinstance(task.exception(), KeyError)
+    assert "Shared LLM generation failed" in caplog.text
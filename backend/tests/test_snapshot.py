@@ -0,0 +1,86 @@
+from datetime import UTC, datetime
+
+import numpy as np
+import pytest
+
+from app.snapshot import SnapshotError, create_snapshot, open_snapshot
+
+DIM = 8
+WATERMARK = datetime(2026, 1, 2, 3, 4, 5, tzinfo=UTC)
+
+
+def _write(path, client_rows, *, embedding_model="test-model", dim=DIM):
+    rng = np.random.default_rng(0)
+    snapshot = create_snapshot(
+        path, embedding_model=embedding_model, dim=dim, watermark=WATERMARK, client_rows=client_rows
+    )
+    written = {}
+    for client_id, rows in client_rows.items():
+        if rows <= 0:
+            continue
+        ids = rng.integers(0, 256, size=(rows, 16), dtype=np.uint8)
+        vectors = rng.standard_normal((rows, dim)).astype(np.float32)
+        snapshot.ids[client_id][:] = ids
+        snapshot.vectors[client_id][:] = vectors
+        written[client_id] = (ids, vectors)
+    snapshot.flush()
+    return written
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "embeddings.snap"
+    written = _write(path, {"Bank_A": 3, "Bank_B": 0, "Bank_C": 5})
+
+    snapshot = open_snapshot(path, embedding_model="test-model", dim=DIM)
+
+    assert snapshot.embedding_model == "test-model"
+    assert snapshot.dim == DIM
+    assert snapshot.rows == 8
+    assert snapshot.watermark == WATERMARK
+    assert snapshot.client_ids == ["Bank_A", "Bank_B", "Bank_C"]
+    assert set(snapshot.ids) == {"Bank_A", "Bank_C"}
+    for client_id, (ids, vectors) in written.items():
+        np.testing.assert_array_equal(snapshot.ids[client_id], ids)
+        np.testing.assert_array_equal(snapshot.vectors[client_id], vectors)
+        assert not snapshot.vectors[client_id].flags.writeable
+
+
+def test_round_trip_without_rows(tmp_path):
+    path = tmp_path / "embeddings.snap"
+    _write(path, {"Bank_A": 0})
+
+    snapshot = open_snapshot(path)
+
+    assert snapshot.rows == 0
+    assert snapshot.client_ids == ["Bank_A"]
+    assert snapshot.ids == {} and snapshot.vectors == {}
+
+
+def test_rejects_other_model(tmp_path):
+    path = tmp_path / "embeddings.snap"
+    _write(path, {"Bank_A": 2})
+
+    with pytest.raises(SnapshotError, match="other-model"):
+        open_snapshot(path, embedding_model="other-model", dim=DIM)
+
+
+def test_rejects_other_dim(tmp_path):
+    path = tmp_path / "embeddings.snap"
+    _write(path, {"Bank_A": 2})
+
+    with pytest.raises(SnapshotError, match="dim"):
+        open_snapshot(path, embedding_model="test-model", dim=DIM * 2)
+
+
+def test_rejects_foreign_and_truncated_files(tmp_path):
+    foreign = tmp_path / "foreign.snap"
+    foreign.write_bytes(b"NOTASNAP" + bytes(64))
+    with pytest.raises(SnapshotError, match="not an embedding snapshot"):
+        open_snapshot(foreign)
+
+    truncated = tmp_path / "truncated.snap"
+    _write(truncated, {"Bank_A": 4})
+    with open(truncated, "r+b") as f:
+        f.truncate(truncated.stat().st_size - 1)
+    with pytest.raises(SnapshotError, match="truncated data"):
+        open_snapshot(truncated)
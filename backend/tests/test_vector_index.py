@@ -0,0 +1,164 @@
+import asyncio
+from datetime import timedelta
+from uuid import UUID, uuid4
+
+import numpy as np
+import pytest
+from conftest import TEST_EPOCH, unit_vector
+from psycopg.rows import dict_row
+
+from app.change_feed import ClusterChangeFeed
+from app.config import settings
+from app.snapshot import create_snapshot, open_snapshot
+from app.vector_index import ClientMatrix, VectorIndex, unit_rows
+
+DIM = 16
+CLIENTS = ["Bank_A", "Bank_B", "Bank_C"]
+
+
+def _matrix(vectors: np.ndarray) -> tuple[ClientMatrix, list[UUID]]:
+    ids = [uuid4() for _ in range(len(vectors))]
+    matrix = ClientMatrix(
+        ids=np.frombuffer(b"".join(i.bytes for i in ids), dtype=np.uint8).reshape(-1, 16),
+        vectors=unit_rows(vectors),
+    )
+    return matrix, ids
+
+
+def _index(vectors_by_client: dict[str, np.ndarray]) -> tuple[VectorIndex, dict[str, list[UUID]]]:
+    index = VectorIndex()
+    ids_by_client = {}
+    for client_id, vectors in vectors_by_client.items():
+        index._clients[client_id], ids_by_client[client_id] = _matrix(vectors)
+    index.loaded = True
+    return index, ids_by_client
+
+
+def _brute_force(vectors_by_client, ids_by_client, client_ids, query, top_k, min_score):
+    query = query / np.linalg.norm(query)
+    rows = []
+    for ord_, client_id in enumerate(client_ids):
+        vectors = unit_rows(vectors_by_client[client_id])
+        for row, score in enumerate(vectors @ query):
+            rows.append((float(score), ord_, ids_by_client[client_id][row], client_id))
+    rows.sort(key=lambda r: (-r[0], r[1]))
+    best = rows[0][0]
+    rows = [r for r in rows if r[0] >= min_score or r[0] == best]
+    return [(cluster_id, client_id) for _, _, cluster_id, client_id in rows[:top_k]]
+
+
+@pytest.mark.parametrize("top_k", [1, 5, 40, 500])
+@pytest.mark.parametrize("min_score", [-1.0, 0.1])
+def test_search_matches_brute_force(top_k, min_score):
+    rng = np.random.default_rng(top_k)
+    vectors_by_client = {c: rng.standard_normal((50 + 10 * i, DIM)) for i, c in enumerate(CLIENTS)}
+    index, ids_by_client = _index(vectors_by_client)
+    query = rng.standard_normal(DIM)
+
+    hits = index.search(CLIENTS, query.tolist(), top_k, min_score)
+
+    expected = _brute_force(vectors_by_client, ids_by_client, CLIENTS, query, top_k, min_score)
+    assert [(hit["id"], hit["client_id"]) for hit in hits] == expected
+    scores = [hit["relevance_score"] for hit in hits]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_search_keeps_best_row_below_floor():
+    rng = np.random.default_rng(1)
+    index, _ = _index({c: rng.standard_normal((20, DIM)) for c in CLIENTS})
+
+    hits = index.search(CLIENTS, rng.standard_normal(DIM).tolist(), 10, min_score=2.0)
+
+    assert len(hits) == 1
+
+
+def test_search_breaks_ties_by_client_order():
+    vector = np.ones((1, DIM))
+    index, ids_by_client = _index({c: vector for c in CLIENTS})
+
+    hits = index.search(["Bank_C", "Bank_A", "Bank_B"], vector[0].tolist(), 3, min_score=-1.0)
+
+    assert [hit["client_id"] for hit in hits] == ["Bank_C", "Bank_A", "Bank_B"]
+    assert [hit["id"] for hit in hits] == [ids_by_client[c][0] for c in ["Bank_C", "Bank_A", "Bank_B"]]
+
+
+def test_search_scans_only_requested_clients():
+    rng = np.random.default_rng(2)
+    index, _ = _index({c: rng.standard_normal((10, DIM)) for c in CLIENTS})
+
+    hits = index.search(["Bank_B", "Bank_X"], rng.standard_normal(DIM).tolist(), 30, min_score=-1.0)
+
+    assert {hit["client_id"] for hit in hits} == {"Bank_B"}
+    assert len(hits) == 10
+
+
+def _mapped_matrix(path, vectors: np.ndarray) -> tuple[ClientMatrix, list[UUID]]:
+    """A read-only snapshot mapping of ``vectors``, as ``VectorIndex.load`` serves it."""
+    ids = [uuid4() for _ in range(len(vectors))]
+    snapshot = create_snapshot(
+        path, embedding_model="test-model", dim=DIM, watermark=None, client_rows={"Bank_A": len(vectors)}
+    )
+    snapshot.ids["Bank_A"][:] = np.frombuffer(b"".join(i.bytes for i in ids), dtype=np.uint8).reshape(-1, 16)
+    snapshot.vectors["Bank_A"][:] = vectors
+    snapshot.flush()
+    mapped = open_snapshot(path)
+    return ClientMatrix(ids=mapped.ids["Bank_A"], vectors=mapped.vectors["Bank_A"]), ids
+
+
+def test_patched_copies_read_only_snapshot(tmp_path):
+    rng = np.random.default_rng(3)
+    vectors = unit_rows(rng.standard_normal((4, DIM)))
+    matrix, ids = _mapped_matrix(tmp_path / "embeddings.snap", vectors)
+    assert not matrix.vectors.flags.writeable
+
+    replaced, added = unit_rows(rng.standard_normal((2, DIM)))
+    new_id = uuid4()
+    patched = matrix.patched([(ids[1].bytes, replaced), (new_id.bytes, added)], removed={ids[2].bytes})
+
+    expected_ids = [ids[0], ids[1], ids[3], new_id]
+    assert [UUID(bytes=row.tobytes()) for row in patched.ids] == expected_ids
+    assert patched.positions() == {cluster_id.bytes: i for i, cluster_id in enumerate(expected_ids)}
+    np.testing.assert_array_equal(patched.vectors, np.stack([vectors[0], replaced, vectors[3], added]))
+    # The mapping itself is untouched.
+    assert len(matrix) == 4
+    np.testing.assert_array_equal(matrix.vectors, vectors)
+
+
+def test_patched_replaces_rows_of_read_only_snapshot(tmp_path):
+    rng = np.random.default_rng(4)
+    vectors = unit_rows(rng.standard_normal((3, DIM)))
+    matrix, ids = _mapped_matrix(tmp_path / "embeddings.snap", vectors)
+
+    replaced = unit_rows(rng.standard_normal((1, DIM)))[0]
+    patched = matrix.patched([(ids[0].bytes, replaced)])
+
+    assert patched.vectors.flags.writeable
+    np.testing.assert_array_equal(patched.vectors[0], replaced)
+    np.testing.assert_array_equal(matrix.vectors[0], vectors[0])
+
+
+def test_rows_ingested_during_load_are_patched_in(pg, pg_fetch, add_cluster, monkeypatch):
+    monkeypatch.setattr(settings, "allowed_clients", "Test_A")
+    monkeypatch.setattr(settings, "embedding_snapshot_path", "")
+    feed = ClusterChangeFeed(interval_seconds=30, overlap_seconds=300)
+    index = VectorIndex()
+    monkeypatch.setattr(feed, "_scoped_fetch", pg_fetch(row_factory=dict_row))
+    monkeypatch.setattr(index, "_scoped_fetch", pg_fetch(binary=True))
+    feed.subscribe(index.apply_changes)
+    loaded = add_cluster("Test_A", unit_vector(1), ingested_at=TEST_EPOCH)
+    late_vector = unit_vector(2)
+
+    async def start_then_ingest() -> UUID:
+        # Lifespan order: prime the feed, load the replica, then poll.
+        await feed.prime()
+        await index.load()
+        late = add_cluster("Test_A", late_vector, ingested_at=TEST_EPOCH + timedelta(seconds=1))
+        assert await feed.poll_once()
+        await index._task
+        return late
+
+    late = asyncio.run(start_then_ingest())
+
+    hits = index.search(["Test_A"], late_vector.tolist(), 5, min_score=-1.0)
+    assert [hit["id"] for hit in hits] == [late, loaded]
+    assert hits[0]["relevance_score"] == pytest.approx(1.0, abs=1e-5)
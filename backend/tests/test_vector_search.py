@@ -0,0 +1,142 @@
+import numpy as np
+import pytest
+
+from app import db, retrieval
+from app.config import settings
+from app.embeddings import EMBEDDING_DIM
+
+QUERY = np.eye(EMBEDDING_DIM, dtype=np.float32)[0]
+
+
+def _at_similarity(score: float, axis: int) -> np.ndarray:
+    """A unit vector whose cosine similarity to ``QUERY`` is ``score``."""
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    vector[0], vector[axis] = score, np.sqrt(1 - score**2)
+    return vector
+
+
+@pytest.fixture
+def bank(add_cluster):
+    """Add clusters at the given similarities to ``QUERY``; returns their ids in that order."""
+
+    def add(client_id: str, scores: list[float]) -> list:
+        return [add_cluster(client_id, _at_similarity(score, axis)) for axis, score in enumerate(scores, start=1)]
+
+    return add
+
+
+@pytest.fixture
+def score_floor(monkeypatch):
+    monkeypatch.setattr(settings, "retrieval_score_floor", True)
+    monkeypatch.setattr(settings, "similarity_threshold", 0.6)
+
+
+def _ids(rows: list[dict]) -> list:
+    return [row["id"] for row in rows]
+
+
+def test_floor_drops_rows_below_the_threshold(pg, bank, app_role, score_floor):
+    ids = bank("Test_A", [0.9, 0.7, 0.5, 0.3])
+    app_role()
+
+    rows = retrieval.search_clusters(pg, "Test_A", QUERY.tolist(), 10, light=True)
+
+    assert _ids(rows) == ids[:2]
+    assert [row["relevance_score"] for row in rows] == pytest.approx([0.9, 0.7], abs=1e-5)
+
+
+def test_floor_keeps_the_best_row_when_nothing_passes(pg, bank, app_role, score_floor):
+    ids = bank("Test_A", [0.5, 0.3])
+    app_role()
+
+    rows = retrieval.search_clusters(pg, "Test_A", QUERY.tolist(), 10, light=True)
+
+    assert _ids(rows) == ids[:1]
+
+
+def test_disabled_floor_returns_the_full_top_k(pg, bank, app_role, monkeypatch):
+    monkeypatch.setattr(settings, "retrieval_score_floor", False)
+    ids = bank("Test_A", [0.9, 0.7, 0.5, 0.3])
+    app_role()
+
+    rows = retrieval.search_clusters(pg, "Test_A", QUERY.tolist(), 3, light=True)
+
+    assert _ids(rows) == ids[:3]
+
+
+def test_multi_client_search_floors_and_merges_across_banks(pg, bank, app_role, score_floor):
+    a = bank("Test_A", [0.9, 0.5])
+    b = bank("Test_B", [0.8, 0.7, 0.65])
+    bank("Test_C", [0.95])
+    app_role()
+
+    rows = retrieval.search_clusters_multi(pg, ["Test_A", "Test_B"], QUERY.tolist(), 3, light=True)
+
+    assert _ids(rows) == [a[0], b[0], b[1]]
+    assert {row["client_id"] for row in rows} == {"Test_A", "Test_B"}
+
+
+def test_multi_client_search_breaks_ties_by_client_order(pg, add_cluster, app_role, score_floor):
+    a = add_cluster("Test_A", _at_similarity(0.8, 1))
+    b = add_cluster("Test_B", _at_similarity(0.8, 2))
+    app_role()
+
+    rows = retrieval.search_clusters_multi(pg, ["Test_B", "Test_A"], QUERY.tolist(), 2, light=True)
+
+    assert _ids(rows) == [b, a]
+
+
+def test_structured_similarity_search_applies_the_floor(pg, bank, app_role, score_floor):
+    ids = bank("Test_A", [0.55, 0.4])
+    app_role()
+
+    rows = retrieval.search_clusters_structured(pg, "Test_A", 5, embedding=QUERY.tolist(), light=True)
+
+    assert _ids(rows) == ids[:1]
+
+
+def test_light_rows_carry_ids_and_scores_only(pg, bank, app_role, score_floor):
+    bank("Test_A", [0.9])
+    app_role()
+
+    [row] = retrieval.search_clusters(pg, "Test_A", QUERY.tolist(), 5, light=True)
+
+    assert set(row) == {"id", "client_id", "relevance_score"}
+
+
+# ---------- HNSW settings ----------
+
+
+def test_ann_settings_raise_ef_search_to_top_k(monkeypatch):
+    monkeypatch.setattr(settings, "hnsw_ef_search", 100)
+    monkeypatch.setattr(db, "pgvector_version", (0, 6, 2))
+
+    assert retrieval._ann_settings(10) == [("hnsw.ef_search", "100")]
+    assert retrieval._ann_settings(250) == [("hnsw.ef_search", "250")]
+    assert retrieval._ann_settings(5000) == [("hnsw.ef_search", str(retrieval._MAX_EF_SEARCH))]
+
+
+def test_ann_settings_enable_iterative_scans_on_pgvector_0_8(monkeypatch):
+    monkeypatch.setattr(settings, "hnsw_iterative_scan", "relaxed_order")
+    monkeypatch.setattr(settings, "hnsw_max_scan_tuples", 20000)
+    monkeypatch.setattr(db, "pgvector_version", (0, 8, 0))
+
+    knobs = dict(retrieval._ann_settings(10))
+
+    assert knobs["hnsw.iterative_scan"] == "relaxed_order"
+    assert knobs["hnsw.max_scan_tuples"] == "20000"
+
+    monkeypatch.setattr(settings, "hnsw_iterative_scan", "off")
+    assert "hnsw.iterative_scan" not in dict(retrieval._ann_settings(10))
+
+
+def test_scope_applies_ann_settings_to_the_transaction(pg, app_role, monkeypatch):
+    monkeypatch.setattr(settings, "hnsw_ef_search", 40)
+    monkeypatch.setattr(db, "pgvector_version", (0, 6, 2))
+    app_role()
+
+    retrieval.set_client_scope(pg, "Test_A", 250)
+
+    assert pg.execute(
+        "SELECT current_setting('app.current_client'), current_setting('hnsw.ef_search')"
+    ).fetchone() == ("Test_A", "250")
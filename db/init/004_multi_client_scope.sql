@@ -0,0 +1,13 @@
+-- Multi-client scope for single-statement cross-bank retrieval.
+-- The app sets app.current_clients to a comma-separated list of client ids;
+-- permissive policies are OR'ed with the single-client policies in 003.
+
+DROP POLICY IF EXISTS clusters_app_select_multi ON clusters;
+CREATE POLICY clusters_app_select_multi ON clusters
+    FOR SELECT TO contract_ai_app
+    USING (client_id = ANY (string_to_array(current_setting('app.current_clients', true), ',')));
+
+DROP POLICY IF EXISTS cluster_events_app_select_multi ON cluster_events;
+CREATE POLICY cluster_events_app_select_multi ON cluster_events
+    FOR SELECT TO contract_ai_app
+    USING (client_id = ANY (string_to_array(current_setting('app.current_clients', true), ',')));
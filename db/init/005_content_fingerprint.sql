@@ -0,0 +1,2 @@
+-- Per-cluster content fingerprint used by delta ingestion to skip unchanged rows.
+ALTER TABLE clusters ADD COLUMN IF NOT EXISTS content_fingerprint TEXT;
@@ -0,0 +1,4 @@
+-- Ingest watermark: set to now() whenever ingestion inserts or rewrites a cluster.
+-- The API polls it to invalidate cached LLM answers for re-ingested clusters.
+ALTER TABLE clusters ADD COLUMN IF NOT EXISTS ingested_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+CREATE INDEX IF NOT EXISTS idx_clusters_ingested_at ON clusters (ingested_at);
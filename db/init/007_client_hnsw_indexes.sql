@@ -0,0 +1,33 @@
+-- Per-client partial HNSW indexes.
+-- A single global HNSW index returns ef_search nearest rows across all banks;
+-- with WHERE client_id = ... most of them are filtered out and the scan can
+-- come back short. A partial index per client only contains that client's rows.
+--
+-- Index DDL needs table ownership, so ingestion calls this SECURITY DEFINER
+-- function for every client it has loaded. It is a no-op when the index exists.
+
+CREATE OR REPLACE FUNCTION ensure_client_hnsw_index(p_client_id TEXT)
+RETURNS TEXT
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    index_name TEXT := format(
+        'idx_clusters_hnsw_%s_%s',
+        left(regexp_replace(lower(p_client_id), '[^a-z0-9]+', '_', 'g'), 32),
+        left(md5(p_client_id), 8)
+    );
+BEGIN
+    IF to_regclass(index_name) IS NULL THEN
+        EXECUTE format(
+            'CREATE INDEX %I ON clusters USING hnsw (embedding vector_cosine_ops) WHERE client_id = %L',
+            index_name,
+            p_client_id
+        );
+    END IF;
+    RETURN index_name;
+END $$;
+
+REVOKE ALL ON FUNCTION ensure_client_hnsw_index(TEXT) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION ensure_client_hnsw_index(TEXT) TO contract_ai_ingest;
@@ -0,0 +1,56 @@
+-- Normalized codified_data keys for structured search.
+-- One row per (cluster, term, attribute) with lowercased keys, so term /
+-- attribute filters are btree lookups instead of jsonb_each scans of every
+-- cluster. Terms whose value is not an object get a single row with a NULL
+-- attribute. Ingestion rewrites a cluster's rows whenever it merges the cluster.
+
+CREATE TABLE IF NOT EXISTS cluster_terms (
+    cluster_id UUID NOT NULL REFERENCES clusters(id) ON DELETE CASCADE,
+    client_id VARCHAR(50) NOT NULL,
+    term_lc TEXT NOT NULL,
+    attribute_lc TEXT,
+    value TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_cluster_terms_client_term
+    ON cluster_terms (client_id, term_lc, attribute_lc);
+CREATE INDEX IF NOT EXISTS idx_cluster_terms_client_attribute
+    ON cluster_terms (client_id, attribute_lc);
+CREATE INDEX IF NOT EXISTS idx_cluster_terms_cluster
+    ON cluster_terms (cluster_id, term_lc, attribute_lc);
+
+GRANT SELECT ON cluster_terms TO contract_ai_app;
+GRANT SELECT, INSERT, UPDATE, DELETE ON cluster_terms TO contract_ai_ingest;
+
+ALTER TABLE cluster_terms ENABLE ROW LEVEL SECURITY;
+ALTER TABLE cluster_terms FORCE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS cluster_terms_app_select ON cluster_terms;
+CREATE POLICY cluster_terms_app_select ON cluster_terms
+    FOR SELECT TO contract_ai_app
+    USING (client_id = current_setting('app.current_client', true));
+
+DROP POLICY IF EXISTS cluster_terms_app_select_multi ON cluster_terms;
+CREATE POLICY cluster_terms_app_select_multi ON cluster_terms
+    FOR SELECT TO contract_ai_app
+    USING (client_id = ANY (string_to_array(current_setting('app.current_clients', true), ',')));
+
+DROP POLICY IF EXISTS cluster_terms_ingest_all ON cluster_terms;
+CREATE POLICY cluster_terms_ingest_all ON cluster_terms
+    FOR ALL TO contract_ai_ingest
+    USING (true)
+    WITH CHECK (true);
+
+-- Backfill clusters ingested before this table existed.
+INSERT INTO cluster_terms (cluster_id, client_id, term_lc, attribute_lc, value)
+SELECT
+    c.id,
+    c.client_id,
+    lower(kv.key),
+    lower(attr.key),
+    CASE WHEN attr.key IS NULL THEN kv.value #>> '{}' ELSE attr.value END
+FROM clusters AS c
+CROSS JOIN LATERAL jsonb_each(c.codified_data) AS kv
+LEFT JOIN LATERAL jsonb_each_text(CASE WHEN jsonb_typeof(kv.value) = 'object' THEN kv.value END) AS attr ON true
+WHERE jsonb_typeof(c.codified_data) = 'object'
+  AND NOT EXISTS (SELECT 1 FROM cluster_terms AS t WHERE t.cluster_id = c.id);
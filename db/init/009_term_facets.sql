@@ -0,0 +1,68 @@
+-- Facet counts for the term / attribute / value catalog (/api/catalog).
+-- term_facets holds, per client, how many clusters carry each
+-- (term, attribute, value); rows with a NULL attribute and value are term
+-- totals. Ingestion applies +/- deltas from the cluster_terms rows it rewrites,
+-- so the table is never re-aggregated from scratch.
+
+-- Original key spelling, for display.
+ALTER TABLE cluster_terms ADD COLUMN IF NOT EXISTS term TEXT;
+ALTER TABLE cluster_terms ADD COLUMN IF NOT EXISTS attribute TEXT;
+
+CREATE TABLE IF NOT EXISTS term_facets (
+    client_id VARCHAR(50) NOT NULL,
+    term_lc TEXT NOT NULL,
+    attribute_lc TEXT,
+    value TEXT,
+    term TEXT,
+    attribute TEXT,
+    cluster_count INTEGER NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_term_facets_key
+    ON term_facets (client_id, term_lc, attribute_lc, value) NULLS NOT DISTINCT;
+
+GRANT SELECT ON term_facets TO contract_ai_app;
+GRANT SELECT, INSERT, UPDATE, DELETE ON term_facets TO contract_ai_ingest;
+
+ALTER TABLE term_facets ENABLE ROW LEVEL SECURITY;
+ALTER TABLE term_facets FORCE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS term_facets_app_select ON term_facets;
+CREATE POLICY term_facets_app_select ON term_facets
+    FOR SELECT TO contract_ai_app
+    USING (client_id = current_setting('app.current_client', true));
+
+DROP POLICY IF EXISTS term_facets_app_select_multi ON term_facets;
+CREATE POLICY term_facets_app_select_multi ON term_facets
+    FOR SELECT TO contract_ai_app
+    USING (client_id = ANY (string_to_array(current_setting('app.current_clients', true), ',')));
+
+DROP POLICY IF EXISTS term_facets_ingest_all ON term_facets;
+CREATE POLICY term_facets_ingest_all ON term_facets
+    FOR ALL TO contract_ai_ingest
+    USING (true)
+    WITH CHECK (true);
+
+-- Backfill display keys and facet counts for data ingested before this migration.
+UPDATE cluster_terms AS t
+SET term = kv.key, attribute = attr.key
+FROM clusters AS c
+CROSS JOIN LATERAL jsonb_each(c.codified_data) AS kv
+LEFT JOIN LATERAL jsonb_object_keys(CASE WHEN jsonb_typeof(kv.value) = 'object' THEN kv.value END) AS attr(key) ON true
+WHERE jsonb_typeof(c.codified_data) = 'object'
+  AND t.cluster_id = c.id
+  AND t.term_lc = lower(kv.key)
+  AND t.attribute_lc IS NOT DISTINCT FROM lower(attr.key)
+  AND t.term IS NULL;
+
+INSERT INTO term_facets (client_id, term_lc, attribute_lc, value, term, attribute, cluster_count)
+SELECT client_id, term_lc, COALESCE(attribute_lc, ''), COALESCE(value, ''),
+       min(term), min(attribute), count(DISTINCT cluster_id)
+FROM cluster_terms
+GROUP BY 1, 2, 3, 4
+UNION ALL
+SELECT client_id, term_lc, NULL, NULL, min(term), NULL, count(DISTINCT cluster_id)
+FROM cluster_terms
+GROUP BY 1, 2
+ON CONFLICT DO NOTHING;
@@ -0,0 +1,20 @@
+-- Full-text search over clause text for hybrid (lexical + vector) retrieval.
+-- ts_config is the text search configuration for the clause language, set by
+-- ingestion (app/language.py: ts_config_for); search_tsv is derived from it.
+
+ALTER TABLE clusters ADD COLUMN IF NOT EXISTS ts_config REGCONFIG NOT NULL DEFAULT 'simple';
+
+-- Backfill rows ingested before this migration (same heuristics as detect_clause_language).
+UPDATE clusters
+SET ts_config = CASE
+    WHEN lower(text_content) ~ '(soumise au droit|la présente|convention-cadre|aux termes de)' THEN 'french'
+    WHEN lower(text_content) ~ '(unterliegt dem|vereinbarung|rahmenvertrag|gemäß)' THEN 'german'
+    WHEN lower(text_content) ~ '(conforme a la ley|acuerdo marco|obligaciones)' THEN 'spanish'
+    ELSE 'english'
+END::regconfig
+WHERE ts_config = 'simple'::regconfig;
+
+ALTER TABLE clusters ADD COLUMN IF NOT EXISTS search_tsv TSVECTOR
+    GENERATED ALWAYS AS (to_tsvector(ts_config, text_content)) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_clusters_search_tsv ON clusters USING gin (search_tsv);
@@ -0,0 +1,5 @@
+-- Change feed keyset: the API pages through new clusters by (ingested_at, id)
+-- and counts rows per ingested_at inside its overlap window (app/change_feed.py).
+-- The composite index serves both, and every plain ingested_at range scan.
+CREATE INDEX IF NOT EXISTS idx_clusters_ingested_at_id ON clusters (ingested_at, id);
+DROP INDEX IF EXISTS idx_clusters_ingested_at;